@@ -0,0 +1,48 @@
+"""add_imports_ledger
+
+Revision ID: a3f1c9e2b7d4
+Revises: e1a2b3c4d5e6
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c9e2b7d4'
+down_revision: Union[str, Sequence[str], None] = 'e1a2b3c4d5e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('imports',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('file_hash', sa.String(length=64), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('source_type', sa.String(), nullable=True),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('stats', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_imports_file_hash'), 'imports', ['file_hash'], unique=True)
+    op.add_column('transactions', sa.Column('import_id', sa.UUID(), nullable=True))
+    op.create_index(op.f('ix_transactions_import_id'), 'transactions', ['import_id'], unique=False)
+    op.create_foreign_key('fk_transactions_import_id_imports', 'transactions', 'imports', ['import_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('fk_transactions_import_id_imports', 'transactions', type_='foreignkey')
+    op.drop_index(op.f('ix_transactions_import_id'), table_name='transactions')
+    op.drop_column('transactions', 'import_id')
+    op.drop_index(op.f('ix_imports_file_hash'), table_name='imports')
+    op.drop_table('imports')
@@ -0,0 +1,88 @@
+"""add_monthly_rollups
+
+Revision ID: a7c5e3d9f102
+Revises: f3a9d2c6b418
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c5e3d9f102'
+down_revision: Union[str, Sequence[str], None] = 'f3a9d2c6b418'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Applies the net change of one statement to the rollup. Statement-level with transition
+# tables, so a COPY/INSERT ... SELECT import of 100k rows is one aggregate, not 100k upserts.
+# Rows are upserted in key order so concurrent writers lock them in the same order.
+ROLLUP_FUNCTION = """
+CREATE OR REPLACE FUNCTION monthly_rollups_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO monthly_rollups AS r (month, source_type, category_name, type, total, count)
+        SELECT date_trunc('month', o.reference_date)::date, o.source_type,
+               coalesce(c.name, o.category, 'Uncategorized'), o.type, -sum(o.amount), -count(*)
+        FROM old_rows o LEFT JOIN categories c ON c.id = o.category_id
+        GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+        ON CONFLICT (month, source_type, category_name, type)
+        DO UPDATE SET total = r.total + EXCLUDED.total, count = r.count + EXCLUDED.count;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'INSERT') THEN
+        INSERT INTO monthly_rollups AS r (month, source_type, category_name, type, total, count)
+        SELECT date_trunc('month', n.reference_date)::date, n.source_type,
+               coalesce(c.name, n.category, 'Uncategorized'), n.type, sum(n.amount), count(*)
+        FROM new_rows n LEFT JOIN categories c ON c.id = n.category_id
+        GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+        ON CONFLICT (month, source_type, category_name, type)
+        DO UPDATE SET total = r.total + EXCLUDED.total, count = r.count + EXCLUDED.count;
+    END IF;
+    DELETE FROM monthly_rollups WHERE count = 0;
+    RETURN NULL;
+END;
+$$;
+"""
+
+TRIGGERS = {
+    'transactions_rollup_insert': "AFTER INSERT ON transactions REFERENCING NEW TABLE AS new_rows",
+    'transactions_rollup_update': "AFTER UPDATE ON transactions REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    'transactions_rollup_delete': "AFTER DELETE ON transactions REFERENCING OLD TABLE AS old_rows",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('monthly_rollups',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('source_type', sa.String(), nullable=False),
+    sa.Column('category_name', sa.String(), nullable=False),
+    sa.Column('type', postgresql.ENUM('INCOME', 'EXPENSE', 'TRANSFER', name='transactiontype', create_type=False), nullable=False),
+    sa.Column('total', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('month', 'source_type', 'category_name', 'type')
+    )
+    op.execute(ROLLUP_FUNCTION)
+    for name, timing in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER {name} {timing} FOR EACH STATEMENT EXECUTE FUNCTION monthly_rollups_apply()")
+
+    # Backfill from the existing transactions
+    op.execute("""
+        INSERT INTO monthly_rollups (month, source_type, category_name, type, total, count)
+        SELECT date_trunc('month', t.reference_date)::date, t.source_type,
+               coalesce(c.name, t.category, 'Uncategorized'), t.type, sum(t.amount), count(*)
+        FROM transactions t LEFT JOIN categories c ON c.id = t.category_id
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON transactions")
+    op.execute("DROP FUNCTION IF EXISTS monthly_rollups_apply()")
+    op.drop_table('monthly_rollups')
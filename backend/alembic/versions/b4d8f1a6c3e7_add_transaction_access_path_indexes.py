@@ -0,0 +1,35 @@
+"""add_transaction_access_path_indexes
+
+Revision ID: b4d8f1a6c3e7
+Revises: a7c5e3d9f102
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d8f1a6c3e7'
+down_revision: Union[str, Sequence[str], None] = 'a7c5e3d9f102'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY so a large transactions table stays writable while the indexes build
+    with op.get_context().autocommit_block():
+        op.create_index('ix_transactions_reference_date_source_type_type', 'transactions', ['reference_date', 'source_type', 'type'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_transactions_category_id_reference_date', 'transactions', ['category_id', 'reference_date'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_transactions_unverified', 'transactions', ['id'], unique=False, postgresql_where=sa.text('is_verified = false'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_transactions_unverified', table_name='transactions', postgresql_concurrently=True)
+        op.drop_index('ix_transactions_category_id_reference_date', table_name='transactions', postgresql_concurrently=True)
+        op.drop_index('ix_transactions_reference_date_source_type_type', table_name='transactions', postgresql_concurrently=True)
@@ -0,0 +1,42 @@
+"""add_import_job_progress
+
+Revision ID: b81d2f6e0c95
+Revises: a3f1c9e2b7d4
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81d2f6e0c95'
+down_revision: Union[str, Sequence[str], None] = 'a3f1c9e2b7d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('imports', sa.Column('reconciliation_candidates', sa.JSON(), nullable=True))
+    op.add_column('imports', sa.Column('rows_parsed', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('imports', sa.Column('rows_categorized', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('imports', sa.Column('chunks_committed', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('imports', sa.Column('storage_path', sa.String(), nullable=True))
+    op.add_column('imports', sa.Column('chunk_size', sa.Integer(), nullable=True))
+    op.add_column('imports', sa.Column('override_reference_date', sa.Date(), nullable=True))
+    op.add_column('imports', sa.Column('started_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('imports', 'started_at')
+    op.drop_column('imports', 'override_reference_date')
+    op.drop_column('imports', 'chunk_size')
+    op.drop_column('imports', 'storage_path')
+    op.drop_column('imports', 'chunks_committed')
+    op.drop_column('imports', 'rows_categorized')
+    op.drop_column('imports', 'rows_parsed')
+    op.drop_column('imports', 'reconciliation_candidates')
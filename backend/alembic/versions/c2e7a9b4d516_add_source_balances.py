@@ -0,0 +1,98 @@
+"""add_source_balances
+
+Revision ID: c2e7a9b4d516
+Revises: b4d8f1a6c3e7
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e7a9b4d516'
+down_revision: Union[str, Sequence[str], None] = 'b4d8f1a6c3e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Applies the net change of one statement to the monthly nets, then rewrites the closing
+# balances that moved. Updates that leave amount, date and source alone (categorization,
+# verification) return right away. The ledger has one row per source and month, so the
+# running sum is a few hundred rows; an advisory lock serializes it between writers.
+BALANCES_FUNCTION = """
+CREATE OR REPLACE FUNCTION source_balances_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NOT EXISTS (
+        SELECT 1 FROM old_rows o JOIN new_rows n ON n.id = o.id
+        WHERE (o.amount, o.reference_date, o.source_type) IS DISTINCT FROM (n.amount, n.reference_date, n.source_type)
+    ) THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_advisory_xact_lock(hashtext('source_balances'));
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO source_balances AS b (source_type, month, net, count, closing)
+        SELECT o.source_type, date_trunc('month', o.reference_date)::date, -sum(o.amount), -count(*), 0
+        FROM old_rows o
+        GROUP BY 1, 2
+        ON CONFLICT (source_type, month)
+        DO UPDATE SET net = b.net + EXCLUDED.net, count = b.count + EXCLUDED.count;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'INSERT') THEN
+        INSERT INTO source_balances AS b (source_type, month, net, count, closing)
+        SELECT n.source_type, date_trunc('month', n.reference_date)::date, sum(n.amount), count(*), 0
+        FROM new_rows n
+        GROUP BY 1, 2
+        ON CONFLICT (source_type, month)
+        DO UPDATE SET net = b.net + EXCLUDED.net, count = b.count + EXCLUDED.count;
+    END IF;
+    DELETE FROM source_balances WHERE count = 0;
+    UPDATE source_balances b SET closing = s.closing
+    FROM (
+        SELECT source_type, month, sum(net) OVER (PARTITION BY source_type ORDER BY month) AS closing
+        FROM source_balances
+    ) s
+    WHERE b.source_type = s.source_type AND b.month = s.month AND b.closing IS DISTINCT FROM s.closing;
+    RETURN NULL;
+END;
+$$;
+"""
+
+TRIGGERS = {
+    'transactions_balance_insert': "AFTER INSERT ON transactions REFERENCING NEW TABLE AS new_rows",
+    'transactions_balance_update': "AFTER UPDATE ON transactions REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    'transactions_balance_delete': "AFTER DELETE ON transactions REFERENCING OLD TABLE AS old_rows",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('source_balances',
+    sa.Column('source_type', sa.String(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('net', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('closing', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('source_type', 'month')
+    )
+    op.execute(BALANCES_FUNCTION)
+    for name, timing in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER {name} {timing} FOR EACH STATEMENT EXECUTE FUNCTION source_balances_apply()")
+
+    # Backfill from the existing transactions
+    op.execute("""
+        INSERT INTO source_balances (source_type, month, net, count, closing)
+        SELECT t.source_type, date_trunc('month', t.reference_date)::date, sum(t.amount), count(*),
+               sum(sum(t.amount)) OVER (PARTITION BY t.source_type ORDER BY date_trunc('month', t.reference_date)::date)
+        FROM transactions t
+        GROUP BY 1, 2
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON transactions")
+    op.execute("DROP FUNCTION IF EXISTS source_balances_apply()")
+    op.drop_table('source_balances')
@@ -0,0 +1,35 @@
+"""add_categorization_cache
+
+Revision ID: c2e7a9d41f38
+Revises: b81d2f6e0c95
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e7a9d41f38'
+down_revision: Union[str, Sequence[str], None] = 'b81d2f6e0c95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('categorization_cache',
+    sa.Column('description_key', sa.String(), nullable=False),
+    sa.Column('amount_bucket', sa.Integer(), nullable=False),
+    sa.Column('category_name', sa.String(), nullable=False),
+    sa.Column('verified_count', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('description_key', 'amount_bucket')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('categorization_cache')
@@ -0,0 +1,62 @@
+"""add_categorization_rules
+
+Revision ID: d5b3f0a8c1e2
+Revises: c2e7a9d41f38
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b3f0a8c1e2'
+down_revision: Union[str, Sequence[str], None] = 'c2e7a9d41f38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The keyword logic of the categorizer prompt: (pattern, category, min_amount, priority)
+DEFAULT_RULES = [
+    ("ifood", "Delivery", None, 30),
+    ("rappi", "Delivery", None, 30),
+    ("uber eats", "Delivery", None, 30),
+    ("ze delivery", "Delivery", None, 30),
+    ("carrefour", "Mercado", None, 20),
+    ("pao de acucar", "Mercado", None, 20),
+    ("tenda", "Mercado", None, 20),
+    ("atacadao", "Mercado", None, 20),
+    ("acougue", "Mercado", None, 20),
+    ("hortifruti", "Mercado", None, 20),
+    ("padaria", "Restaurante", None, 10),
+    ("mcdonalds", "Restaurante", None, 10),
+    ("outback", "Restaurante", None, 10),
+    ("restaurante", "Restaurante", None, 10),
+    ("folha", "Salário", 1000, 10),
+    ("salario", "Salário", 1000, 10),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rules = op.create_table('categorization_rules',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('pattern', sa.String(), nullable=False),
+    sa.Column('category_name', sa.String(), nullable=False),
+    sa.Column('min_amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('max_amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('priority', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('is_active', sa.Boolean(), server_default=sa.text('true'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(rules, [
+        {"id": uuid.uuid4(), "pattern": pattern, "category_name": category, "min_amount": min_amount, "max_amount": None, "priority": priority, "is_active": True}
+        for pattern, category, min_amount, priority in DEFAULT_RULES
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('categorization_rules')
@@ -0,0 +1,30 @@
+"""add_transaction_verified_at
+
+Revision ID: e8c4a1f7b923
+Revises: d5b3f0a8c1e2
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c4a1f7b923'
+down_revision: Union[str, Sequence[str], None] = 'd5b3f0a8c1e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('transactions', sa.Column('verified_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_transactions_verified_at'), 'transactions', ['verified_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_transactions_verified_at'), table_name='transactions')
+    op.drop_column('transactions', 'verified_at')
@@ -0,0 +1,45 @@
+"""add_categorization_jobs
+
+Revision ID: f3a9d2c6b418
+Revises: e8c4a1f7b923
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9d2c6b418'
+down_revision: Union[str, Sequence[str], None] = 'e8c4a1f7b923'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('categorization_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('month', sa.Integer(), nullable=True),
+    sa.Column('year', sa.Integer(), nullable=True),
+    sa.Column('force', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    sa.Column('chunk_size', sa.Integer(), nullable=False),
+    sa.Column('last_transaction_id', sa.UUID(), nullable=True),
+    sa.Column('rows_total', sa.Integer(), nullable=True),
+    sa.Column('rows_processed', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rows_updated', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('chunks_committed', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('categorization_jobs')
@@ -0,0 +1,107 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from uuid import UUID
+from typing import List
+from datetime import datetime, timezone
+
+from app.core.database import get_db
+from app.models.categorization import CategorizationRule, CategorizationJob
+from app.schemas.categorization import CategorizationRuleCreate, CategorizationRuleResponse, CategorizationJobCreate, CategorizationJobResponse
+from app.services.categorization_jobs import categorization_jobs, CATEGORIZATION_JOB_CHUNK_SIZE
+from app.services.categorizer_service import categorizer_service
+from app.services.circuit_breaker import llm_breaker, llm_timeouts
+
+router = APIRouter()
+
+@router.get("/rules", response_model=List[CategorizationRuleResponse])
+async def get_rules(db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(CategorizationRule).order_by(CategorizationRule.priority.desc(), CategorizationRule.pattern))
+    return result.scalars().all()
+
+@router.post("/rules", response_model=CategorizationRuleResponse)
+async def create_rule(
+    rule: CategorizationRuleCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    db_rule = CategorizationRule(**rule.model_dump())
+    db.add(db_rule)
+    await db.commit()
+    await db.refresh(db_rule)
+    categorizer_service.invalidate_rules()
+    return db_rule
+
+@router.delete("/rules/{rule_id}")
+async def delete_rule(
+    rule_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(select(CategorizationRule).where(CategorizationRule.id == rule_id))
+    db_rule = result.scalar_one_or_none()
+    if not db_rule:
+        raise HTTPException(status_code=404, detail="Rule not found")
+
+    await db.delete(db_rule)
+    await db.commit()
+    categorizer_service.invalidate_rules()
+    return {"status": "success"}
+
+@router.get("/llm-status")
+async def get_llm_status():
+    """
+    Circuit breaker state and counters of the model client, and the current adaptive timeouts.
+    """
+    return {
+        "breaker": llm_breaker.snapshot(),
+        "timeouts": {kind: timeout.snapshot() for kind, timeout in llm_timeouts.items()},
+    }
+
+def build_job_response(record: CategorizationJob) -> CategorizationJobResponse:
+    response = CategorizationJobResponse.model_validate(record)
+    if record.started_at:
+        elapsed = ((record.finished_at or datetime.now(timezone.utc)) - record.started_at).total_seconds()
+        if elapsed > 0:
+            response.rows_per_second = round(record.rows_processed / elapsed, 2)
+    return response
+
+@router.post("/jobs", response_model=CategorizationJobResponse, status_code=202)
+async def create_job(
+    job: CategorizationJobCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Auto-categorizes the whole backlog (or one month) in the background, committing every
+    chunk_size rows. Poll GET /categorization/jobs/{job_id} for progress.
+    """
+    if (job.month is None) != (job.year is None):
+        raise HTTPException(status_code=400, detail="month and year must be given together")
+    record = await categorization_jobs.enqueue(db, job.month, job.year, job.force, job.chunk_size or CATEGORIZATION_JOB_CHUNK_SIZE)
+    return build_job_response(record)
+
+@router.get("/jobs", response_model=List[CategorizationJobResponse])
+async def get_jobs(db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(CategorizationJob).order_by(CategorizationJob.created_at.desc()).limit(50))
+    return [build_job_response(record) for record in result.scalars().all()]
+
+@router.get("/jobs/{job_id}", response_model=CategorizationJobResponse)
+async def get_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    record = await db.get(CategorizationJob, job_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return build_job_response(record)
+
+@router.post("/jobs/{job_id}/cancel", response_model=CategorizationJobResponse)
+async def cancel_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Cancels a queued job, or stops a running one after its current chunk (already committed chunks stay).
+    """
+    record = await db.get(CategorizationJob, job_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return build_job_response(await categorization_jobs.cancel(db, record))
@@ -1,13 +1,68 @@
+from datetime import date
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, case
-from typing import Optional, List, Dict
+from sqlalchemy import select, func, case, and_, tuple_
+from typing import Optional, List, Dict, Tuple
 
 from app.core.database import get_db
-from app.models.transaction import Transaction, TransactionType, Category
+from app.models.transaction import TransactionType
+from app.models.rollup import MonthlyRollup
+from app.core.queries import period_filter, until_filter
+from app.services.balances import LIQUID_SOURCES, LIABILITY_SOURCE, balances_at, balance_series, health_totals
 
 router = APIRouter()
 
+def build_summary(year: int, months: Dict[int, Tuple[float, float]]) -> Dict:
+    """
+    Summary payload from {month number: (income, expense)}; months without rows are zero.
+    """
+    monthly_data = []
+    total_income = 0
+    total_expense = 0
+
+    for m in range(1, 13):
+        inc, exp = months.get(m, (0, 0))
+        monthly_data.append({
+            "month": m,
+            "income": inc,
+            "expense": exp
+        })
+        total_income += inc
+        total_expense += exp
+
+    return {
+        "year": year,
+        "total_income": total_income,
+        "total_expense": total_expense,
+        "balance": total_income + total_expense,
+        "monthly_data": monthly_data
+    }
+
+def build_health(liquidity: float, liability: float) -> Dict:
+    abs_liability = abs(liability)
+
+    ratio = 0.0
+    # Avoid division by zero
+    if abs_liability > 0:
+        ratio = (liquidity / abs_liability) * 100
+    else:
+        # If no liability, and we have positive liquidity, we are reasonably "100%" safe or more.
+        if liquidity >= 0:
+            ratio = 100.0  # Or treat as infinite coverage
+
+    status = "SURVIVAL"
+    # Status is "COMFORT" if liquidity >= abs(liability).
+    # This implies we can pay off the debt immediately.
+    if liquidity >= abs_liability:
+        status = "COMFORT"
+
+    return {
+        "liquidity": liquidity,
+        "liability": liability,
+        "ratio": ratio,
+        "status": status
+    }
+
 @router.get("/summary")
 async def get_dashboard_summary(
     db: AsyncSession = Depends(get_db),
@@ -20,56 +75,25 @@ async def get_dashboard_summary(
     """
     
     # Monthly breakdown
-    # We want: Month, Income, Expense
-    
+    # We want: Month, Income, Expense (read from the monthly rollup: at most 12 months x sources x categories)
     query = select(
-        func.extract('month', Transaction.reference_date).label('month'),
-        func.sum(case((Transaction.type == TransactionType.INCOME, Transaction.amount), else_=0)).label('income'),
-        func.sum(case((Transaction.type == TransactionType.EXPENSE, Transaction.amount), else_=0)).label('expense')
+        MonthlyRollup.month,
+        func.sum(case((MonthlyRollup.type == TransactionType.INCOME, MonthlyRollup.total), else_=0)).label('income'),
+        func.sum(case((MonthlyRollup.type == TransactionType.EXPENSE, MonthlyRollup.total), else_=0)).label('expense')
     ).filter(
-        func.extract('year', Transaction.reference_date) == year,
-        Transaction.type.in_([TransactionType.INCOME, TransactionType.EXPENSE])
+        *period_filter(MonthlyRollup.month, year),
+        MonthlyRollup.type.in_([TransactionType.INCOME, TransactionType.EXPENSE])
     ).group_by(
-        func.extract('month', Transaction.reference_date)
+        MonthlyRollup.month
     ).order_by(
-        func.extract('month', Transaction.reference_date)
+        MonthlyRollup.month
     )
     
     result = await db.execute(query)
     rows = result.all()
     
-    monthly_data = []
-    total_income = 0
-    total_expense = 0
-    
-    # Initialize all 12 months with 0
-    data_map = {m: {"income": 0, "expense": 0} for m in range(1, 13)}
-    
-    for row in rows:
-        m = int(row.month)
-        inc = float(row.income or 0)
-        exp = float(row.expense or 0)
-        
-        data_map[m]["income"] = inc
-        data_map[m]["expense"] = exp
-        
-        total_income += inc
-        total_expense += exp
-        
-    for m in range(1, 13):
-        monthly_data.append({
-            "month": m,
-            "income": data_map[m]["income"],
-            "expense": data_map[m]["expense"]
-        })
-        
-    return {
-        "year": year,
-        "total_income": total_income,
-        "total_expense": total_expense,
-        "balance": total_income + total_expense,
-        "monthly_data": monthly_data
-    }
+    months = {row.month.month: (float(row.income or 0), float(row.expense or 0)) for row in rows}
+    return build_summary(year, months)
 
 @router.get("/breakdown")
 async def get_dashboard_breakdown(
@@ -77,41 +101,32 @@ async def get_dashboard_breakdown(
     year: int = Query(2025),
     month: Optional[int] = Query(None)
 ):
+    # Both breakdowns come from the monthly rollup
+    period = period_filter(MonthlyRollup.month, year, month)
+
     # 1. Source Breakdown
     query_source = select(
-        Transaction.source_type,
-        func.sum(Transaction.amount).label('total')
+        MonthlyRollup.source_type,
+        func.sum(MonthlyRollup.total).label('total')
     ).filter(
-        func.extract('year', Transaction.reference_date) == year
-    )
-    
-    if month:
-        query_source = query_source.filter(func.extract('month', Transaction.reference_date) == month)
-        
-    query_source = query_source.group_by(Transaction.source_type)
+        *period
+    ).group_by(MonthlyRollup.source_type)
     
     res_source = await db.execute(query_source)
     by_source = {row.source_type: float(row.total or 0) for row in res_source}
 
     # 2. Category Breakdown
-    # Prioritize Category.name, then legacy, then 'Uncategorized'
-    cat_field = func.coalesce(Category.name, Transaction.category_legacy, 'Uncategorized')
-    
+    # The rollup's category_name already prioritizes Category.name, then legacy, then 'Uncategorized'
     query_cat = select(
-        cat_field.label('name'),
-        Transaction.type,
-        func.sum(Transaction.amount).label('value')
-    ).outerjoin(
-        Category, Transaction.category_id == Category.id
+        MonthlyRollup.category_name.label('name'),
+        MonthlyRollup.type,
+        func.sum(MonthlyRollup.total).label('value')
     ).filter(
-        func.extract('year', Transaction.reference_date) == year,
-        Transaction.type != TransactionType.TRANSFER
-    )
-    
-    if month:
-        query_cat = query_cat.filter(func.extract('month', Transaction.reference_date) == month)
-        
-    query_cat = query_cat.group_by(cat_field, Transaction.type).order_by(func.sum(Transaction.amount))
+        *period,
+        MonthlyRollup.type != TransactionType.TRANSFER
+    ).group_by(
+        MonthlyRollup.category_name, MonthlyRollup.type
+    ).order_by(func.sum(MonthlyRollup.total))
     
     res_cat = await db.execute(query_cat)
     by_category = [
@@ -127,11 +142,12 @@ async def get_dashboard_breakdown(
 @router.get("/health-ratio")
 async def get_health_ratio(
     db: AsyncSession = Depends(get_db),
-    year: Optional[int] = Query(None)
+    year: Optional[int] = Query(None),
+    at: Optional[date] = Query(None)
 ):
     """
     Returns the financial health ratio (Liquidity / Liability).
-    - Params: year (optional, strictly mainly considers ALL TIME up to reference date, but let's base it on the current snapshot).
+    - Params: year (optional, balances at the end of that year), at (optional, balances at the end of that day; wins over year).
     - Logic:
      - liquidity: Sum of amount where source_type IN ('XP_ACCOUNT', 'MANUAL').
      - liability: Sum of amount where source_type = 'XP_CARD'. (This should be negative).
@@ -140,54 +156,103 @@ async def get_health_ratio(
      - Status is "COMFORT" if liquidity >= abs(liability).
     """
 
-    # We calculate the running balance (sum of signed amounts).
-    # If year is provided, we filter for transactions referencing a date up to the end of that year.
-    # Otherwise, we sum everything (current snapshot).
-
-    query = select(
-        func.sum(
-            case(
-                (Transaction.source_type.in_(['XP_ACCOUNT', 'MANUAL']), Transaction.amount),
-                else_=0
-            )
-        ).label('liquidity'),
-        func.sum(
-            case(
-                (Transaction.source_type == 'XP_CARD', Transaction.amount),
-                else_=0
-            )
-        ).label('liability')
-    )
+    # Balances come from the per-source ledger: a lookup of the closing balances, plus the
+    # transactions of the partial month when `at` is not a month's last day.
+    # If year is provided, the balance at the end of that year; otherwise everything (current snapshot).
+    on = at or (date(year, 12, 31) if year else None)
+    liquidity, liability = health_totals(await balances_at(db, on))
+    return build_health(liquidity, liability)
 
-    if year:
-        # Filter for all transactions up to the end of the specified year
-        query = query.filter(func.extract('year', Transaction.reference_date) <= year)
+@router.get("/health-ratio/series")
+async def get_health_ratio_series(
+    db: AsyncSession = Depends(get_db),
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None)
+):
+    """
+    Month-end health ratio for every month from `start` (default: the first month with
+    transactions) to `end` (default: the current month), read from the balances ledger.
+    """
+    series = await balance_series(db, start, end)
+    return [
+        {"month": month, **build_health(*health_totals(balances))}
+        for month, balances in series
+    ]
 
-    result = await db.execute(query)
-    row = result.one()
+def overview_query(year: int, month: Optional[int] = None):
+    """
+    One pass over the rollup rows up to the end of `year`, aggregated by GROUPING SETS:
+    per month (the year's income/expense series), per source and per category (the year or
+    `month`), and overall (liquidity/liability up to the end of the year). Each set reads
+    only its own FILTERed sums; grouping() tells the sets apart.
+    """
+    in_year = and_(*period_filter(MonthlyRollup.month, year))
+    in_period = and_(*period_filter(MonthlyRollup.month, year, month))
+    return select(
+        func.grouping(MonthlyRollup.month).label('no_month'),
+        func.grouping(MonthlyRollup.source_type).label('no_source'),
+        func.grouping(MonthlyRollup.category_name, MonthlyRollup.type).label('no_category'),
+        MonthlyRollup.month,
+        MonthlyRollup.source_type,
+        MonthlyRollup.category_name,
+        MonthlyRollup.type,
+        func.sum(MonthlyRollup.total).filter(in_year, MonthlyRollup.type == TransactionType.INCOME).label('income'),
+        func.sum(MonthlyRollup.total).filter(in_year, MonthlyRollup.type == TransactionType.EXPENSE).label('expense'),
+        func.sum(MonthlyRollup.total).filter(in_period).label('period_total'),
+        func.count().filter(in_period).label('period_rows'),
+        func.sum(MonthlyRollup.total).filter(MonthlyRollup.source_type.in_(LIQUID_SOURCES)).label('liquidity'),
+        func.sum(MonthlyRollup.total).filter(MonthlyRollup.source_type == LIABILITY_SOURCE).label('liability')
+    ).filter(
+        until_filter(MonthlyRollup.month, year)
+    ).group_by(
+        func.grouping_sets(
+            tuple_(MonthlyRollup.month),
+            tuple_(MonthlyRollup.source_type),
+            tuple_(MonthlyRollup.category_name, MonthlyRollup.type),
+            tuple_()
+        )
+    )
 
-    liquidity = float(row.liquidity or 0)
-    liability = float(row.liability or 0)
-    abs_liability = abs(liability)
+@router.get("/overview")
+async def get_dashboard_overview(
+    db: AsyncSession = Depends(get_db),
+    year: int = Query(2025),
+    month: Optional[int] = Query(None)
+):
+    """
+    Everything the dashboard page shows, in one round-trip and one statement:
+    - summary: as /summary for the year
+    - breakdown: as /breakdown for the year (or month)
+    - health: as /health-ratio up to the end of the year
+    """
+    result = await db.execute(overview_query(year, month))
 
-    ratio = 0.0
-    # Avoid division by zero
-    if abs_liability > 0:
-        ratio = (liquidity / abs_liability) * 100
-    else:
-        # If no liability, and we have positive liquidity, we are reasonably "100%" safe or more.
-        if liquidity >= 0:
-            ratio = 100.0  # Or treat as infinite coverage
-    
-    status = "SURVIVAL"
-    # Status is "COMFORT" if liquidity >= abs(liability).
-    # This implies we can pay off the debt immediately.
-    if liquidity >= abs_liability:
-        status = "COMFORT"
+    months: Dict[int, Tuple[float, float]] = {}
+    by_source: Dict[str, float] = {}
+    by_category: List[Dict] = []
+    health = build_health(0.0, 0.0)
+    for row in result.all():
+        if not row.no_month:
+            # Earlier months are only read for the health totals
+            if row.month.year == year:
+                months[row.month.month] = (float(row.income or 0), float(row.expense or 0))
+        elif not row.no_source:
+            if row.period_rows:
+                by_source[row.source_type] = float(row.period_total or 0)
+        elif not row.no_category:
+            if row.period_rows and row.type != TransactionType.TRANSFER:
+                by_category.append({"name": row.category_name, "type": row.type, "value": float(row.period_total or 0)})
+        else:
+            health = build_health(float(row.liquidity or 0), float(row.liability or 0))
+    by_category.sort(key=lambda c: c["value"])
 
     return {
-        "liquidity": liquidity,
-        "liability": liability,
-        "ratio": ratio,
-        "status": status
+        "year": year,
+        "month": month,
+        "summary": build_summary(year, months),
+        "breakdown": {
+            "by_source": by_source,
+            "by_category": by_category
+        },
+        "health": health
     }
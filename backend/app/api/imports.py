@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+from uuid import UUID
+from typing import List
+from datetime import datetime, timezone
+
+from app.core.database import get_db
+from app.models.imports import Import
+from app.models.transaction import Transaction
+from app.schemas.imports import ImportResponse
+from app.services.import_jobs import import_jobs
+
+router = APIRouter()
+
+def build_import_response(record: Import) -> ImportResponse:
+    """
+    Serializes a ledger entry, overlaying the live progress of a job running in this
+    process and the throughput since it started.
+    """
+    response = ImportResponse.model_validate(record)
+
+    live = import_jobs.live_progress(record.id)
+    if live:
+        response.rows_categorized = max(response.rows_categorized, live.get("rows_categorized", 0))
+
+    if record.started_at:
+        elapsed = ((record.finished_at or datetime.now(timezone.utc)) - record.started_at).total_seconds()
+        if elapsed > 0:
+            response.rows_per_second = round(record.row_count / elapsed, 2)
+
+    return response
+
+@router.get("/", response_model=List[ImportResponse])
+async def get_imports(
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(select(Import).order_by(Import.created_at.desc()).limit(limit))
+    return [build_import_response(record) for record in result.scalars().all()]
+
+@router.get("/{import_id}", response_model=ImportResponse)
+async def get_import(
+    import_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    record = await db.get(Import, import_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return build_import_response(record)
+
+@router.delete("/{import_id}")
+async def delete_import(
+    import_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Deletes every transaction created by an import, then the ledger entry itself,
+    so the same file can be imported again.
+    """
+    record = await db.get(Import, import_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Import not found")
+
+    result = await db.execute(delete(Transaction).where(Transaction.import_id == import_id))
+    await db.delete(record)
+    await db.commit()
+
+    return {
+        "deleted_count": result.rowcount,
+        "message": f"Deleted {result.rowcount} transactions from '{record.filename}'"
+    }
@@ -2,15 +2,21 @@ from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File,
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc, delete
 
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import UUID
-from datetime import date
+from datetime import date, datetime, timezone
 import calendar
 from pydantic import BaseModel, ConfigDict
 
 from app.core.database import get_db
-from app.etl.importer import import_transactions_from_file
-from app.models.transaction import Transaction, TransactionType, Category
+from app.core.queries import period_filter
+from app.etl.importer import import_transactions_from_files, stream_transactions_from_file, IMPORT_CHUNK_SIZE
+from app.etl.preview import preview_transactions_from_files, commit_preview
+from app.services.import_jobs import import_jobs
+from app.services.categorization_cache import categorization_cache
+from app.services.categorizer_service import categorizer_service
+from app.services.categorization_jobs import backlog_filter, apply_predictions
+from app.models.transaction import Transaction, TransactionType, Category, CategoryEnum
 from app.models.recurring import RecurringTransaction
 from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionResponse, TransactionList
 
@@ -37,10 +43,8 @@ async def get_transactions(
         Category, Transaction.category_id == Category.id
     )
     
-    if month:
-        query = query.filter(func.extract('month', Transaction.reference_date) == month)
-    if year:
-        query = query.filter(func.extract('year', Transaction.reference_date) == year)
+    # Half-open reference_date range (index friendly), see period_filter
+    query = query.filter(*period_filter(Transaction.reference_date, year, month))
     if category:
         # We can filter by category name or legacy category
         query = query.filter(
@@ -122,38 +126,84 @@ async def create_transaction(
 async def upload_transactions(
     file: List[UploadFile] = File(...),
     manual_reference_date: Optional[date] = Form(None),
+    chunk_size: Optional[int] = Form(None, ge=100),
+    background: bool = Form(False),
+    preview: bool = Form(False),
     db: AsyncSession = Depends(get_db)
 ):
+    """
+    Imports one or more statement CSVs.
+    When `chunk_size` is given, each file is streamed and committed in chunks of that many
+    rows, keeping memory flat for very large histories.
+    With `background=true` every file is queued as an import job and the response returns
+    right away with the job ids; poll /imports/{job_id} for progress.
+    With `preview=true` nothing is written: each result lists the rows that would be
+    imported and their reconciliation candidates, and the batch can then be saved with
+    POST /upload/preview/{file_hash}/commit without parsing or categorizing again.
+    """
     override_reference_date = manual_reference_date
 
-    results = []
+    results = [None] * len(file)
     total_imported = 0
+    csv_files = []
 
-    for f in file:
+    for i, f in enumerate(file):
         if not f.filename.endswith('.csv'):
-            results.append({
+            results[i] = {
                 "filename": f.filename, 
                 "status": "error", 
                 "message": "Invalid file format. Only CSV allowed."
-            })
+            }
             continue
+        csv_files.append((i, f))
+
+    if background:
+        for i, f in csv_files:
+            try:
+                job = await import_jobs.enqueue(f.file, f.filename, db, override_reference_date, chunk_size or IMPORT_CHUNK_SIZE)
+                results[i] = {"filename": f.filename, "status": "queued", "job_id": str(job.id)}
+            except Exception as e:
+                results[i] = {"filename": f.filename, "status": "error", "message": f"Processing error: {str(e)}"}
+        return {"status": "queued", "results": results}
+
+    if preview:
+        outcomes = await preview_transactions_from_files([(f.file, f.filename) for _, f in csv_files], db, override_reference_date)
+        for (i, f), outcome in zip(csv_files, outcomes):
+            if isinstance(outcome, Exception):
+                results[i] = {"filename": f.filename, "status": "error", "message": f"Processing error: {str(outcome)}"}
+            else:
+                results[i] = {"filename": f.filename, "status": "preview", **outcome}
+        return {"status": "preview", "results": results}
+
+    if chunk_size:
+        # Streaming mode: files are imported one after another to keep memory flat
+        outcomes = []
+        for _, f in csv_files:
+            try:
+                outcomes.append(await stream_transactions_from_file(f.file, f.filename, db, override_reference_date, chunk_size))
+            except Exception as e:
+                outcomes.append(e)
+    else:
+        outcomes = await import_transactions_from_files([(f.file, f.filename) for _, f in csv_files], db, override_reference_date)
 
-        try:
-            transactions, candidates = await import_transactions_from_file(f.file, f.filename, db, override_reference_date)
-            count = len(transactions)
-            total_imported += count
-            results.append({
-                "filename": f.filename, 
-                "status": "success", 
-                "count": count,
-                "reconciliation_candidates": candidates
-            })
-        except Exception as e:
-            results.append({
+    for (i, f), outcome in zip(csv_files, outcomes):
+        if isinstance(outcome, Exception):
+            results[i] = {
                 "filename": f.filename, 
                 "status": "error", 
-                "message": f"Processing error: {str(e)}"
-            })
+                "message": f"Processing error: {str(outcome)}"
+            }
+            continue
+
+        transactions, candidates = outcome
+        count = transactions if isinstance(transactions, int) else len(transactions)
+        total_imported += count
+        results[i] = {
+            "filename": f.filename, 
+            "status": "success", 
+            "count": count,
+            "reconciliation_candidates": candidates
+        }
             
     return {
         "status": "success",
@@ -161,6 +211,33 @@ async def upload_transactions(
         "results": results
     }
 
+@router.post("/upload/preview/{file_hash}/commit")
+async def commit_upload_preview(
+    file_hash: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Persists a batch previously returned by /upload with preview=true.
+    """
+    try:
+        outcome = await commit_preview(file_hash, db)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Processing error: {str(e)}")
+    if outcome is None:
+        raise HTTPException(status_code=404, detail="Preview not found or expired. Upload the file again.")
+
+    filename, transactions, candidates = outcome
+    return {
+        "status": "success",
+        "total_imported": len(transactions),
+        "results": [{
+            "filename": filename,
+            "status": "success",
+            "count": len(transactions),
+            "reconciliation_candidates": candidates
+        }]
+    }
+
 class ProjectRequest(BaseModel):
     model_config = ConfigDict(strict=True)
 
@@ -222,6 +299,7 @@ async def update_transaction(
         raise HTTPException(status_code=404, detail="Transaction not found")
     
     update_data = transaction_update.model_dump(exclude_unset=True)
+    category = None
     
     # Logic to link category_id if category name is provided
     if 'category_legacy' in update_data:
@@ -252,6 +330,13 @@ async def update_transaction(
         setattr(db_transaction, key, value)
         
     db_transaction.is_verified = True
+    db_transaction.verified_at = datetime.now(timezone.utc)
+
+    # Categories the user picked feed the merchant cache, so the next import skips the model for them.
+    # Free text that is not a category, or edits that leave the category alone, are not recorded.
+    if category is not None and db_transaction.description and category.name != CategoryEnum.UNCATEGORIZED.value:
+        await categorization_cache.record_verified(db, db_transaction.description, float(db_transaction.amount), category.name)
+
     await db.commit()
     await db.refresh(db_transaction)
     
@@ -276,14 +361,7 @@ async def batch_delete_transactions(
     category_id: Optional[UUID] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    _, last_day = calendar.monthrange(year, month)
-    start_date = date(year, month, 1)
-    end_date = date(year, month, last_day)
-
-    stmt = delete(Transaction).where(
-        Transaction.reference_date >= start_date,
-        Transaction.reference_date <= end_date
-    )
+    stmt = delete(Transaction).where(*period_filter(Transaction.reference_date, year, month))
 
     if source_type:
         stmt = stmt.where(Transaction.source_type == source_type)
@@ -341,12 +419,10 @@ async def auto_categorize_transactions(
     force: bool = Query(False),
     db: AsyncSession = Depends(get_db)
 ):
-    from app.services.categorizer import AICategorizer
     from app.models.transaction import CategoryEnum
     
-    # Initialize Categorizer
-    categorizer = AICategorizer()
-    await categorizer.load_history(db)
+    # Shared categorizer; only rows verified since its last use are loaded
+    categorizer = await categorizer_service.get(db)
     
     # 1. Get ID for "Não Categorizado"
     stmt_uncat = select(Category).where(Category.name == CategoryEnum.UNCATEGORIZED.value)
@@ -359,40 +435,13 @@ async def auto_categorize_transactions(
     uncat_id = uncat_category.id
     
     # 2. Build Query
-    stmt_tx = select(Transaction)
-    
     if month and year:
-        # Month-specific mode
-        _, last_day = calendar.monthrange(year, month)
-        start_date = date(year, month, 1)
-        end_date = date(year, month, last_day)
-        
-        stmt_tx = stmt_tx.where(
-            Transaction.reference_date >= start_date,
-            Transaction.reference_date <= end_date
-        )
-        
-        if not force:
-            # Only uncat
-            stmt_tx = stmt_tx.where(
-                (Transaction.category_id == None) | (Transaction.category_id == uncat_id)
-            )
-        else:
-            # Force mode: re-evaluate ALL transactions in that month
-            # BUT: Do not overwrite verified transactions
-            stmt_tx = stmt_tx.where(Transaction.is_verified == False)
-            
-        # If month/year is specified, we might want to process ALL of them, not just 100.
-        # But to be safe, maybe increase limit or just remove it? 
-        # User said "Select ALL".
-        # We won't apply .limit(limit) here.
-        
+        # Month-specific mode: every matching row of that month (force re-evaluates all unverified ones)
+        stmt_tx = backlog_filter(select(Transaction), uncat_id, month, year, force)
     else:
-        # Standard mode: Next N uncategorized
-        # Also ensure we don't pick up verified ones that happen to be uncategorized (unlikely but possible)
-        stmt_tx = stmt_tx.where(
-            (Transaction.category_id == None) | (Transaction.category_id == uncat_id)
-        ).where(Transaction.is_verified == False).limit(limit)
+        # Standard mode: Next N uncategorized (force only applies to month mode here);
+        # the whole backlog is a job (POST /categorization/jobs)
+        stmt_tx = backlog_filter(select(Transaction), uncat_id).limit(limit)
     
     result_tx = await db.execute(stmt_tx)
     transactions = result_tx.scalars().all()
@@ -404,53 +453,30 @@ async def auto_categorize_transactions(
     stmt_cats = select(Category)
     res_cats = await db.execute(stmt_cats)
     all_categories = {c.name: c.id for c in res_cats.scalars().all()}
+
+    # One lookup of the verified merchant cache for the whole selection
+    await categorizer.cache.warm(db, [(tx.description, float(tx.amount)) for tx in transactions])
+
+    # Skip if description is empty
+    processed_count = len(transactions)
+    transactions = [tx for tx in transactions if tx.description]
+
+    # Batched model calls: several transactions per prompt
+    stats: Dict[str, int] = {}
+    predictions = await categorizer.predict_categories([(tx.description, float(tx.amount)) for tx in transactions], stats=stats)
     
-    processed_count = 0
-    updated_count = 0
-    
-    for tx in transactions:
-        try:
-            processed_count += 1
-            # Skip if description is empty
-            if not tx.description: 
-                continue
-                
-            predicted_name = await categorizer.predict_category(tx.description, float(tx.amount), db=db)
-            
-            # If AI returns UNCAT, we don't need to change anything if it's already UNCAT.
-            # But if it was NULL, we should set it to UNCAT ID.
-            
-            new_cat_id = all_categories.get(predicted_name)
-            
-            # Fallback to UNCAT if not found
-            if not new_cat_id:
-                new_cat_id = uncat_id
-            
-            # Update fields
-            # Only update if it actually changes something meaningful 
-            # (e.g. from NULL to UNCAT, or UNCAT to SOMETHING ELSE)
-            if tx.category_id != new_cat_id:
-                tx.category_id = new_cat_id
-                tx.category_legacy = predicted_name
-                tx.manual_tag = predicted_name # Store AI guess
-                tx.is_verified = False # Automatic classification is not verified
-                updated_count += 1
-            elif tx.category_id == uncat_id and new_cat_id == uncat_id:
-                 # It was UNCAT, and AI said UNCAT. 
-                 # Maybe we just want to mark we tried? 
-                 # For now, do nothing.
-                 pass
-
-        except Exception as e:
-            print(f"Error auto-categorizing transaction {tx.id}: {e}")
-            # Continue to next
-            continue
+    updated_count = apply_predictions(transactions, predictions, all_categories, uncat_id)
             
     await db.commit()
     
     return {
         "processed": processed_count,
         "updated": updated_count,
+        # Counted for this call only; the categorizer is shared with concurrent imports and jobs
+        "cache_hits": stats.get("cache", 0),
+        "rule_hits": stats.get("rule", 0),
+        "local_hits": stats.get("local", 0),
+        "llm_calls": stats.get("llm_calls", 0), # Model requests, each covering up to CATEGORIZER_BATCH_SIZE rows
         "message": f"Processed {processed_count} transactions. Updated {updated_count}. Run again to continue."
     }
 
@@ -486,6 +512,7 @@ async def pay_invoice(
         category_legacy="Transferência/Ajuste",
         reference_date=request.date,
         is_verified=True,
+        verified_at=datetime.now(timezone.utc),
         manual_tag="InvoicePayment"
     )
     
@@ -499,6 +526,7 @@ async def pay_invoice(
         category_legacy="Transferência/Ajuste",
         reference_date=request.date,
         is_verified=True,
+        verified_at=datetime.now(timezone.utc),
         manual_tag="InvoicePayment"
     )
     
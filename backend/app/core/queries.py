@@ -0,0 +1,32 @@
+from datetime import date
+from typing import List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.sql import ColumnElement
+
+def month_range(year: int, month: Optional[int] = None) -> Tuple[date, date]:
+    """
+    Half-open [start, end) date range of a year or one of its months.
+    """
+    if month:
+        return date(year, month, 1), (date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1))
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+def period_filter(column, year: Optional[int] = None, month: Optional[int] = None) -> List[ColumnElement]:
+    """
+    Conditions restricting a date column to a year or a month of it, written as a half-open
+    range (column >= start AND column < end) so a B-tree index on the column can serve it.
+    A month without a year (that month of every year) has no single range and falls back
+    to extract(), which cannot use the index.
+    """
+    if year:
+        start, end = month_range(year, month)
+        return [column >= start, column < end]
+    if month:
+        return [func.extract('month', column) == month]
+    return []
+
+def until_filter(column, year: int) -> ColumnElement:
+    """
+    Everything up to the end of `year`.
+    """
+    return column < date(year + 1, 1, 1)
@@ -0,0 +1,167 @@
+import os
+import time
+import hashlib
+from datetime import date
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Responses kept in memory, by count and by total body size
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Upper bound on staleness for writes this process cannot see (other workers, CLI scripts)
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+# GET endpoints whose responses only depend on their parameters and the data version
+CACHED_PATH_PREFIXES = ("/dashboard", "/analytics")
+# Writes to these tables bump the data version
+VERSIONED_TABLES = {"transactions", "categories", "monthly_rollups", "source_balances"}
+# Raw SQL starting with these never writes
+READ_ONLY_SQL = ("SELECT", "SET", "SHOW", "EXPLAIN")
+
+# (path, query parameters, current date)
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...], str]
+
+class ResponseCache:
+    """
+    LRU of serialized GET responses keyed by path and query parameters. Each entry is
+    stamped with the data version it was computed at; a commit that wrote to a versioned
+    table bumps the version (see track_writes), which invalidates every entry at once.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, max_bytes: int = RESPONSE_CACHE_MAX_BYTES, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.size = 0
+        self.entries: "OrderedDict[CacheKey, Dict[str, Any]]" = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+
+    def bump(self) -> None:
+        self.version += 1
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        if entry is not None and (entry["version"] != self.version or time.monotonic() - entry["stored_at"] > self.ttl_seconds):
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return entry
+
+    def put(self, key: CacheKey, version: int, body: bytes, media_type: Optional[str]) -> Dict[str, Any]:
+        """
+        Stores a response computed at data `version` (read before computing it, so a write
+        committed meanwhile leaves the entry already stale). Returns the entry.
+        """
+        entry = {
+            "version": version,
+            "stored_at": time.monotonic(),
+            "body": body,
+            "media_type": media_type,
+            "etag": f'"{hashlib.sha1(body).hexdigest()}"',
+        }
+        if version != self.version or len(body) > self.max_bytes:
+            return entry
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = entry
+        self.size += len(body)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.counters["evictions"] += 1
+        return entry
+
+    def _remove(self, key: CacheKey) -> None:
+        self.size -= len(self.entries.pop(key)["body"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            "version": self.version,
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else None,
+            **self.counters,
+        }
+
+def track_writes(cache: ResponseCache, session_class=Session) -> None:
+    """
+    Bumps the cache's data version after every commit that wrote to a versioned table, through
+    the ORM (flushed objects) or a statement (bulk update/delete, insert, raw SQL such as the
+    importer's COPY merge). Statements whose target is unknown count as writes.
+    """
+
+    @event.listens_for(session_class, "after_flush")
+    def _flushed(session, flush_context):
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if getattr(obj, "__tablename__", None) in VERSIONED_TABLES:
+                session.info["data_changed"] = True
+                return
+
+    @event.listens_for(session_class, "do_orm_execute")
+    def _executed(orm_execute_state):
+        statement = orm_execute_state.statement
+        if orm_execute_state.is_select or (isinstance(statement, TextClause) and statement.text.lstrip().upper().startswith(READ_ONLY_SQL)):
+            return
+        table = getattr(statement, "table", None)
+        if table is None or getattr(table, "name", None) in VERSIONED_TABLES:
+            orm_execute_state.session.info["data_changed"] = True
+
+    @event.listens_for(session_class, "after_commit")
+    def _committed(session):
+        if session.info.pop("data_changed", False):
+            cache.bump()
+
+    @event.listens_for(session_class, "after_rollback")
+    def _rolled_back(session):
+        session.info.pop("data_changed", None)
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """
+    Serves GETs under `prefixes` from the cache and answers If-None-Match with 304.
+    Responses carry an ETag (hash of the body) and Cache-Control: no-cache, so browsers
+    revalidate every time and mostly get an empty 304.
+    Keys include the current date: endpoints whose date parameters default to today
+    (average spending, the health-ratio series) change at midnight without any write.
+    """
+
+    def __init__(self, app, cache: ResponseCache, prefixes: Tuple[str, ...] = CACHED_PATH_PREFIXES, today: Callable[[], date] = date.today):
+        super().__init__(app)
+        self.cache = cache
+        self.prefixes = prefixes
+        self.today = today
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        if request.method != "GET" or not request.url.path.startswith(self.prefixes):
+            return await call_next(request)
+
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())), self.today().isoformat())
+        entry = self.cache.get(key)
+        status = "HIT"
+        if entry is None:
+            status = "MISS"
+            version = self.cache.version
+            response = await call_next(request)
+            if response.status_code != 200:
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            entry = self.cache.put(key, version, body, response.media_type or response.headers.get("content-type"))
+
+        headers = {"ETag": entry["etag"], "Cache-Control": "no-cache", "X-Cache": status}
+        if entry["etag"] in request.headers.get("if-none-match", ""):
+            self.cache.counters["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(entry["body"], media_type=entry["media_type"], headers=headers)
+
+response_cache = ResponseCache()
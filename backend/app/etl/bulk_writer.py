@@ -0,0 +1,101 @@
+import enum
+import json
+from typing import List, Dict, Any, Set
+from sqlalchemy import text, JSON
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.transaction import Transaction
+
+# Session-local staging table, dropped automatically at commit
+STAGING_TABLE = "transactions_import_staging"
+
+# Rows per statement on the fallback (non-asyncpg) path
+FALLBACK_CHUNK_SIZE = 1000
+
+transactions_table = Transaction.__table__
+
+# ORM attribute name -> table column (e.g. 'raw_data' -> 'metadata', 'category_legacy' -> 'category')
+COLUMN_BY_ATTRIBUTE = {attr.key: attr.columns[0] for attr in Transaction.__mapper__.column_attrs}
+
+JSON_COLUMNS = {c.name for c in transactions_table.columns if isinstance(c.type, JSON)}
+
+def build_record(tx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Maps a transaction dict (ORM attribute names) to a row keyed by table column name,
+    applying the Python-side column defaults the ORM would otherwise fill in.
+    """
+    record = {}
+    for key, column in COLUMN_BY_ATTRIBUTE.items():
+        if key in tx:
+            record[column.name] = tx[key]
+        elif column.default is not None and column.default.is_scalar:
+            record[column.name] = column.default.arg
+        elif column.default is not None and column.default.is_callable:
+            record[column.name] = column.default.arg(None)
+        else:
+            record[column.name] = None
+    return record
+
+async def bulk_insert_transactions(session: AsyncSession, transactions: List[Dict[str, Any]]) -> Set[str]:
+    """
+    Inserts transactions skipping any whose unique_hash already exists.
+    On asyncpg the rows are COPY'd into a temp staging table and merged with a single
+    INSERT ... ON CONFLICT (unique_hash) DO NOTHING; other drivers fall back to a
+    multi-row INSERT with the same conflict clause.
+    Does not commit. Returns the unique_hash of every inserted row.
+    """
+    if not transactions:
+        return set()
+
+    records = [build_record(tx) for tx in transactions]
+
+    if session.bind.dialect.driver == "asyncpg":
+        return await _copy_insert(session, records)
+    return await _multirow_insert(session, records)
+
+async def _copy_insert(session: AsyncSession, records: List[Dict[str, Any]]) -> Set[str]:
+    columns = [c.name for c in transactions_table.columns]
+    column_list = ", ".join(f'"{c}"' for c in columns)
+
+    # Runs through the session first so the staging table and the COPY share its transaction
+    await session.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+        f"(LIKE {transactions_table.name} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    await session.execute(text(f"TRUNCATE {STAGING_TABLE}"))
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+
+    rows = [tuple(_copy_value(record[c], c in JSON_COLUMNS) for c in columns) for record in records]
+    await driver_connection.copy_records_to_table(STAGING_TABLE, records=rows, columns=columns)
+
+    result = await session.execute(text(
+        f"INSERT INTO {transactions_table.name} ({column_list}) "
+        f"SELECT {column_list} FROM {STAGING_TABLE} "
+        f"ON CONFLICT (unique_hash) DO NOTHING "
+        f"RETURNING unique_hash"
+    ))
+    return set(result.scalars().all())
+
+def _copy_value(value: Any, is_json: bool) -> Any:
+    """
+    Encodes a value the way asyncpg's COPY expects it: JSON as text and enums by value.
+    """
+    if value is None:
+        return None
+    if is_json:
+        return json.dumps(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+async def _multirow_insert(session: AsyncSession, records: List[Dict[str, Any]]) -> Set[str]:
+    inserted = set()
+    for i in range(0, len(records), FALLBACK_CHUNK_SIZE):
+        stmt = insert(transactions_table).values(records[i:i + FALLBACK_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_nothing(index_elements=["unique_hash"]).returning(transactions_table.c.unique_hash)
+        result = await session.execute(stmt)
+        inserted.update(result.scalars().all())
+    return inserted
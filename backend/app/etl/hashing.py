@@ -0,0 +1,60 @@
+import hashlib
+from typing import Any, Dict, List, Optional
+import polars as pl
+
+# Columns that identify a transaction for dedup, in hashing order
+HASH_COLUMNS = ["date", "amount", "description", "source_type"]
+
+def hash_key_expr() -> pl.Expr:
+    """
+    Normalized concatenation of the dedup columns: date + amount + description + source_type.
+    Matches the legacy f-string of generate_transaction_hash, so stored hashes stay valid:
+    dates render as ISO, amounts as canonical decimal text (see importer.currency_expr).
+    """
+    return pl.concat_str([
+        pl.col("date").cast(pl.Utf8),
+        pl.col("amount").cast(pl.Utf8),
+        pl.col("description").cast(pl.Utf8).str.strip_chars(),
+        pl.col("source_type").cast(pl.Utf8),
+    ])
+
+def sha256_batch(keys: pl.Series) -> pl.Series:
+    return pl.Series([hashlib.sha256(key.encode('utf-8')).hexdigest() for key in keys], dtype=pl.Utf8)
+
+def compute_unique_hashes(frame: pl.DataFrame, hash_counter: Optional[Dict[str, int]] = None) -> pl.DataFrame:
+    """
+    Adds the 'unique_hash' column (sha256 of the dedup key + '_<occurrence>') to a parsed frame.
+    The occurrence counts identical rows within the file, so legitimate repeated purchases
+    are kept apart. `hash_counter` (base hash -> rows seen) carries the counts between
+    chunks of one file and is updated in place.
+    Works for any importer whose frame has the HASH_COLUMNS.
+    """
+    if frame.is_empty():
+        return frame.with_columns(pl.lit(None, dtype=pl.Utf8).alias("unique_hash"))
+
+    base = frame.select(hash_key_expr().map_batches(sha256_batch, return_dtype=pl.Utf8).alias("base_hash"))["base_hash"]
+
+    occurrence = base.to_frame().select(pl.col("base_hash").cum_count().over("base_hash") - 1)["base_hash"]
+    if hash_counter:
+        occurrence = occurrence + pl.Series([hash_counter.get(h, 0) for h in base], dtype=pl.UInt32)
+
+    if hash_counter is not None:
+        for h, count in base.value_counts().iter_rows():
+            hash_counter[h] = hash_counter.get(h, 0) + count
+
+    return frame.with_columns((base + "_" + occurrence.cast(pl.Utf8)).alias("unique_hash"))
+
+def records_frame(entries: List[Dict[str, Any]]) -> pl.DataFrame:
+    """
+    Builds a frame of the dedup columns from transaction dicts, for callers outside the
+    Polars pipeline. Amounts are rendered with str() like the legacy hash.
+    """
+    return pl.DataFrame(
+        {
+            "date": [str(e.get('date', '')) for e in entries],
+            "amount": [str(e.get('amount', '')) for e in entries],
+            "description": [str(e.get('description', '')) for e in entries],
+            "source_type": [str(e.get('source_type', '')) for e in entries],
+        },
+        schema={c: pl.Utf8 for c in HASH_COLUMNS}
+    )
@@ -1,352 +1,600 @@
+import io
+import os
+import time
+import asyncio
+import tempfile
 import polars as pl
-import re
-import uuid
 import hashlib
 from decimal import Decimal
-from datetime import date, datetime, timedelta
+from datetime import date
 from typing import List, Dict, Any, Optional, Tuple
+from uuid import UUID
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.transaction import Transaction, TransactionType, Category, CategoryEnum
-from app.services.categorizer import AICategorizer
+from fastapi.encoders import jsonable_encoder
+from app.models.transaction import TransactionType, Category, CategoryEnum
+from app.models.imports import Import
+from app.services.categorizer import AICategorizer, CATEGORIZER_BATCH_SIZE
+from app.services.categorizer_service import categorizer_service
+from app.services.categorization_cache import categorization_stats
+from app.services.categorization_executor import CategorizationExecutor
+from app.etl.bulk_writer import bulk_insert_transactions
+from app.etl.reconciliation import find_reconciliation_candidates
+from app.etl.hashing import compute_unique_hashes, records_frame
+from app.etl.ledger import hash_bytes, stage_timer, start_import, finish_import, fail_import
 
-def parse_currency(value: Any) -> Optional[Decimal]:
+# Rows per chunk in streaming imports (stream_transactions_from_file)
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+SPOOL_COPY_BUFFER = 1024 * 1024
+
+# Descriptions containing this marker are invoice payments (TRANSFER), not income/expense
+INVOICE_PAYMENT_MARKER = "pagamento de fatura"
+
+def text_expr(col: str) -> pl.Expr:
     """
-    Parses currency string like 'R$ 1.200,50' to Decimal.
-    Returns None if empty or invalid.
+    Cleans a free-text column (description, cardholder).
+    Nulls become 'None' to mirror the legacy str(value) conversion, which keeps
+    the dedup hashes of previously imported rows stable.
     """
-    if value is None or (isinstance(value, float) and value != value) or value == '' or value == '-':
-        return None
-    
-    if isinstance(value, (int, float)):
-        return Decimal(value)
-        
-    str_val = str(value).strip()
-    
-    # Sanitize using Regex: Keep only digits, minus (-), and comma (,)
-    # This removes 'R$', '.', spaces, non-breaking spaces, etc.
-    # Example: "-R$ 3.655,34" -> "-3655,34"
-    clean_val = re.sub(r'[^\d,-]', '', str_val)
-
-    if not clean_val:
-        return None
-        
-    # Handle Brazilian format: Replace decimal comma with dot
-    # Example: "-3655,34" -> "-3655.34"
-    clean_val = clean_val.replace(',', '.')
-    
-    try:
-        return Decimal(clean_val)
-    except:
-        return None
+    return pl.col(col).cast(pl.Utf8).fill_null("None").str.strip_chars()
+
+def currency_expr(col: str) -> pl.Expr:
+    """
+    Parses currency strings like 'R$ 1.200,50' into a canonical decimal string ('1200.50').
+    The output matches str(Decimal(...)) of the cleaned value, so it can be fed to
+    Decimal() and to the dedup hash without changing historical hashes.
+    Returns null if empty or invalid.
+    """
+    # Sanitize: Keep only digits, minus (-), and comma (,)
+    # Example: "-R$ 3.655,34" -> "-3655,34" -> "-3655.34"
+    clean = (
+        pl.col(col).cast(pl.Utf8)
+        .str.replace_all(r"[^\d,-]", "")
+        .str.replace_all(",", ".", literal=True)
+    )
+    parts = clean.str.extract_groups(r"^(?P<sign>-?)(?P<int>\d*)(?:\.(?P<frac>\d*))?$")
+    sign = parts.struct.field("sign")
+    int_part = parts.struct.field("int").str.strip_chars_start("0")
+    frac = parts.struct.field("frac").fill_null("")
+
+    has_digits = (parts.struct.field("int").str.len_chars() + frac.str.len_chars()) > 0
+    canonical = pl.concat_str([
+        sign,
+        pl.when(int_part == "").then(pl.lit("0")).otherwise(int_part),
+        pl.when(frac == "").then(pl.lit("")).otherwise(pl.lit(".") + frac),
+    ])
+    return pl.when(has_digits).then(canonical).otherwise(None)
 
-def parse_date(date_str: Any) -> Optional[date]:
+def date_expr(col: str) -> pl.Expr:
     """
-    Parses DD/MM/YYYY or DD/MM/YY (plus time) to date object.
+    Parses DD/MM/YYYY or DD/MM/YY (plus time) to a Date column.
     Handles '28/11/25 às 11:09:43'.
     """
-    if date_str is None or (isinstance(date_str, float) and date_str != date_str):
-        return None
-        
-    s = str(date_str).strip()
-    
+    s = pl.col(col).cast(pl.Utf8).str.strip_chars()
+
     # Cleaning: remove " às ..." or " HH:MM:SS"
-    if " às " in s:
-        s = s.split(" às ")[0]
-    elif " " in s:
-        s = s.split(" ")[0]
-        
+    s = (
+        pl.when(s.str.contains(" às ", literal=True))
+        .then(s.str.split(" às ").list.first())
+        .otherwise(s.str.split(" ").list.first())
+    )
     # Remove potentially invisible chars
-    s = "".join(s.split())
+    s = s.str.replace_all(r"\s", "")
 
-    try:
-        # Try DD/MM/YYYY
-        return datetime.strptime(s, "%d/%m/%Y").date()
-    except ValueError:
-        pass
-        
-    try:
-        # Try DD/MM/YY
-        return datetime.strptime(s, "%d/%m/%y").date()
-    except ValueError:
-        return None
+    # Gate each format on its exact shape so 'DD/MM/YY' is never read as year 00YY
+    return pl.coalesce(
+        pl.when(s.str.contains(r"^\d{1,2}/\d{1,2}/\d{4}$"))
+        .then(s.str.strptime(pl.Date, "%d/%m/%Y", strict=False)),
+        pl.when(s.str.contains(r"^\d{1,2}/\d{1,2}/\d{2}$"))
+        .then(s.str.strptime(pl.Date, "%d/%m/%y", strict=False)),
+    )
 
-def parse_installments(description: str) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+def installment_exprs(col: str) -> Tuple[pl.Expr, pl.Expr]:
     """
-    Extracts description, installment number and total from string like "Purchase Description 01/10".
-    Returns (cleaned_description, current, total).
-    
-    Actually, usually XP puts "Purchase Name - Parcela X de Y" or similar, 
-    but sometimes it is in a separate column "Parcela".
-    The user task says: 'Parse "X de Y" column.' implies a specific column named "Parcela".
+    Parses strings like "1 de 10" or "01/12" into (current, total) Int64 columns.
+    A bare number is treated as a single installment (1, 1).
     """
-    return description, None, None
+    s = pl.col(col).cast(pl.Utf8).str.strip_chars().str.to_lowercase()
 
-def parse_installment_column(val: Any) -> Tuple[Optional[int], Optional[int]]:
+    # Matches "1 de 10" or "1/10"
+    groups = s.str.extract_groups(r"(?P<current>\d+)\s*(?:de|/)\s*(?P<total>\d+)")
+    is_single = s.str.contains(r"^\d+$")
+
+    def part(name: str) -> pl.Expr:
+        value = groups.struct.field(name)
+        return (
+            pl.when(value.is_not_null()).then(value.cast(pl.Int64, strict=False))
+            .when(is_single).then(pl.lit(1, dtype=pl.Int64))
+            .otherwise(None)
+        )
+
+    return part("current"), part("total")
+
+def reference_date_expr(override_reference_date: Optional[date] = None) -> pl.Expr:
     """
-    Parses string "1 de 10" or "01/12" to (1, 10).
+    Competence month of each row: the override if given, else the first day of the row's month.
     """
-    if val is None or (isinstance(val, float) and val != val):
-        return None, None
-    s = str(val).strip().lower()
-    
-    # Matches "1 de 10" or "1/10"
-    match = re.search(r"(\d+)\s*(?:de|/)\s*(\d+)", s)
-    if match:
-        return int(match.group(1)), int(match.group(2))
-    
-    # Just a number "1" -> (1, 1)? No, usually implies 1/1 if single.
-    if s.isdigit():
-        return 1, 1
-        
-    return None, None
+    if override_reference_date:
+        return pl.lit(override_reference_date, dtype=pl.Date)
+    return pl.col("date").dt.month_start()
 
-async def import_transactions_from_file(file_obj: Any, filename: str, session: AsyncSession, override_reference_date: Optional[date] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+def with_missing_columns(df: pl.DataFrame, columns: List[str]) -> pl.DataFrame:
     """
-    Reads the CSV and extracts detailed line-item transactions.
-    Supports XP Credit Card and XP Bank Account formats.
+    Adds any of the given columns missing from the frame as nulls, so the expressions can reference them.
     """
-    # Check for duplicate file import
-    try:
-        stmt = select(Transaction).where(Transaction.raw_data['source_filename'].astext == filename).limit(1)
-        result = await session.execute(stmt)
-        if result.scalar_one_or_none():
-            raise Exception(f"File '{filename}' has already been imported.")
-    except Exception as e:
-        # If any DB error (e.g. malformed json), just log and proceed or raise? 
-        # Better raise to be safe, but 'astext' requires PG. 
-        # Assuming PG.
-        if "already imported" in str(e): raise e
-        print(f"Warning: Could not check filename duplication: {e}")
+    missing = [pl.lit(None, dtype=pl.Utf8).alias(c) for c in columns if c not in df.columns]
+    return df.with_columns(missing) if missing else df
+
+def parse_xp_card_frame(df: pl.DataFrame, override_reference_date: Optional[date] = None) -> pl.DataFrame:
+    """
+    Parses a raw XP Credit Card frame into typed transaction columns in a single pass.
+    Rows without a valid amount or date are dropped.
+    """
+    df = with_missing_columns(df, ["Data", "Valor", "Parcela"])
+    description = text_expr("Estabelecimento") if "Estabelecimento" in df.columns else pl.lit("")
+    cardholder = text_expr("Portador") if "Portador" in df.columns else pl.lit("")
+    curr_inst, total_inst = installment_exprs("Parcela")
+    raw_amount = currency_expr("Valor")
+
+    parsed = df.select(
+        date_expr("Data").alias("date"),
+        description.alias("description"),
+        raw_amount.alias("raw_amount"),
+        cardholder.alias("cardholder"),
+        curr_inst.alias("installment_current"),
+        total_inst.alias("installment_total"),
+    ).filter(
+        pl.col("raw_amount").is_not_null() & pl.col("date").is_not_null()
+    )
+
+    # Polarity Inversion for CARD: purchases come positive, credits negative
+    is_purchase = pl.col("raw_amount").cast(pl.Float64, strict=False) > 0
+    return parsed.select(
+        "date",
+        "description",
+        pl.when(is_purchase)
+        .then(pl.lit("-") + pl.col("raw_amount"))
+        .otherwise(pl.col("raw_amount").str.strip_prefix("-"))
+        .alias("amount"),
+        # Payment of invoice in Card view is a Transfer (Credit)
+        pl.when(pl.col("description").str.to_lowercase().str.contains(INVOICE_PAYMENT_MARKER, literal=True))
+        .then(pl.lit(TransactionType.TRANSFER.value))
+        .when(is_purchase).then(pl.lit(TransactionType.EXPENSE.value))
+        .otherwise(pl.lit(TransactionType.INCOME.value))
+        .alias("type"),
+        "cardholder",
+        "installment_current",
+        "installment_total",
+        pl.lit("XP_CARD").alias("source_type"),
+        (pl.col("installment_total").fill_null(0) > 1).alias("is_recurring"),
+        reference_date_expr(override_reference_date).alias("reference_date"),
+    )
+
+def parse_xp_account_frame(df: pl.DataFrame, desc_col: str, override_reference_date: Optional[date] = None) -> pl.DataFrame:
+    """
+    Parses a raw XP Bank Account frame into typed transaction columns in a single pass.
+    Rows without a valid amount or date are dropped.
+    """
+    df = with_missing_columns(df, ["Data", "Valor"])
+    description = text_expr(desc_col) if desc_col in df.columns else pl.lit("")
+
+    parsed = df.select(
+        date_expr("Data").alias("date"),
+        description.alias("description"),
+        currency_expr("Valor").alias("amount"),
+    ).filter(
+        pl.col("amount").is_not_null() & pl.col("date").is_not_null()
+    )
+
+    # Polarity: account amounts are already signed
+    is_credit = pl.col("amount").cast(pl.Float64, strict=False) >= 0
+    return parsed.select(
+        "date",
+        "description",
+        "amount",
+        # Detect Transfer
+        pl.when(pl.col("description").str.to_lowercase().str.contains(INVOICE_PAYMENT_MARKER, literal=True))
+        .then(pl.lit(TransactionType.TRANSFER.value))
+        .when(is_credit).then(pl.lit(TransactionType.INCOME.value))
+        .otherwise(pl.lit(TransactionType.EXPENSE.value))
+        .alias("type"),
+        pl.lit("XP_ACCOUNT").alias("source_type"),
+        pl.lit(False).alias("is_recurring"),
+        reference_date_expr(override_reference_date).alias("reference_date"),
+    )
+
+def detect_format(columns: List[str]) -> Optional[str]:
+    """
+    Detects the statement format from the (stripped) CSV header.
+    Returns 'XP_CARD', 'XP_ACCOUNT' or None if unknown.
+    """
+    if 'Portador' in columns and 'Parcela' in columns:
+        return "XP_CARD"
+    if 'Saldo' in columns and ('Descrição' in columns or 'Descricao' in columns):
+        return "XP_ACCOUNT"
+    # Check for "Lancamento" or "Lançamento" which is common in account statements
+    if 'Data' in columns and ('Lançamento' in columns or 'Lancamento' in columns) and 'Valor' in columns:
+        return "XP_ACCOUNT"
+    return None
+
+def parse_frame(df: pl.DataFrame, source_format: str, override_reference_date: Optional[date] = None) -> pl.DataFrame:
+    """
+    Parses a raw frame of a detected format into typed transaction columns.
+    """
+    if source_format == "XP_CARD":
+        return parse_xp_card_frame(df, override_reference_date)
+    return parse_xp_account_frame(df, get_account_description_column(df.columns), override_reference_date)
+
+def normalize_columns(df: pl.DataFrame) -> pl.DataFrame:
+    return df.rename({c: c.strip() for c in df.columns})
+
+class UnsupportedFileError(Exception):
+    """
+    The upload could not be read as CSV or matches no known statement format.
+    """
+
+def read_upload(file_obj: Any) -> Tuple[bytes, str]:
+    """
+    Reads an uploaded file and returns (content, sha256 of the content).
+    """
+    content = file_obj.read()
+    return content, hash_bytes(content)
+
+def parse_upload(content: bytes, override_reference_date: Optional[date] = None, stats: Optional[Dict[str, float]] = None) -> Tuple[str, pl.DataFrame]:
+    """
+    Reads the CSV content, detects its format and parses it into a typed frame.
+    Pure CPU work with no DB access, so it can run in a worker thread.
+    Returns (source_format, frame); raises UnsupportedFileError for unreadable or unknown files.
+    """
+    stats = stats if stats is not None else {}
 
     try:
-        # Read with ; delimiter
-        df = pl.read_csv(file_obj, separator=';', ignore_errors=True)
+        with stage_timer(stats, "read"):
+            # Read with ; delimiter, every column as text: parsing is done by the Polars expressions above
+            df = pl.read_csv(io.BytesIO(content), separator=';', ignore_errors=True, infer_schema=False)
     except Exception as e:
-        print(f"Error reading CSV: {e}")
-        return [], []
+        raise UnsupportedFileError(f"Error reading CSV: {e}") from e
 
-    # Detect Type
-    columns = [c.strip() for c in df.columns]
-    
-    is_xp_card = 'Portador' in columns and 'Parcela' in columns
-    is_xp_account = 'Saldo' in columns and 'Descricao' in columns 
     # Let's normalize columns to be safe
-    df = df.rename({c: c.strip() for c in df.columns})
-    
-    # Check again
-    if 'Portador' in df.columns and 'Parcela' in df.columns:
-        return await process_xp_card(df, filename, session, override_reference_date)
-    elif 'Saldo' in df.columns and 'Descrição' in df.columns: 
-         return await process_xp_account(df, filename, session, override_reference_date)
-    elif 'Saldo' in df.columns and 'Descricao' in df.columns: 
-         return await process_xp_account(df, filename, session, override_reference_date)
-    
-    # Check for "Lancamento" or "Lançamento" which is common in account statements
-    if 'Data' in df.columns and ('Lançamento' in df.columns or 'Lancamento' in df.columns) and 'Valor' in df.columns:
-         return await process_xp_account(df, filename, session, override_reference_date)
+    df = normalize_columns(df)
 
-    print(f"Unknown CSV format. Columns: {df.columns}")
-    return [], []
+    source_format = detect_format(df.columns)
+    if source_format is None:
+        raise UnsupportedFileError(f"Unknown CSV format. Columns: {df.columns}")
 
-async def process_xp_card(df: pl.DataFrame, filename: str, session: AsyncSession, override_reference_date: Optional[date] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    with stage_timer(stats, "parse"):
+        frame = parse_frame(df, source_format, override_reference_date)
+    with stage_timer(stats, "hash"):
+        frame = compute_unique_hashes(frame)
+    return source_format, frame
+
+async def import_transactions_from_file(file_obj: Any, filename: str, session: AsyncSession, override_reference_date: Optional[date] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
-    Process XP Credit Card CSV.
-    Columns expected: Data, Estabelecimento, Portador, Valor, Parcela...
+    Reads the CSV and extracts detailed line-item transactions.
+    Supports XP Credit Card and XP Bank Account formats.
+    The file is registered in the import ledger (by content hash) before parsing starts.
     """
-    extracted = []
-    
-    # Initialize Categorizer
-    categorizer = AICategorizer()
-    await categorizer.load_history(session)
-    
-    # Pre-fetch categories map to avoid N+1 queries if possible, or query on the fly. 
-    # For now, let's query on the fly or maybe better, fetch all categories to a dict?
-    # Fetching all categories is safer and faster.
-    stmt_cats = select(Category)
-    res_cats = await session.execute(stmt_cats)
-    all_categories = {c.name: c.id for c in res_cats.scalars().all()}
+    result = (await import_transactions_from_files([(file_obj, filename)], session, override_reference_date))[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+async def import_transactions_from_files(files: List[Tuple[Any, str]], session: AsyncSession, override_reference_date: Optional[date] = None) -> List[Any]:
+    """
+    Imports several (file_obj, filename) uploads at once.
+    Reading, hashing and parsing of every file run concurrently in worker threads (Polars
+    releases the GIL) and categorization of all files is interleaved; the session is only
+    used by a single writer that registers and persists one file at a time.
+    Returns, per file and in order, (saved_transactions, reconciliation_candidates) or the
+    Exception that failed that file; a failure never affects the other files.
+    """
+    batch_start = time.perf_counter()
+    results: List[Any] = [None] * len(files)
+    stats: Dict[int, Dict[str, float]] = {i: {} for i in range(len(files))}
+
+    # 1. Read and hash every file concurrently
+    uploads = await asyncio.gather(*(asyncio.to_thread(read_upload, file_obj) for file_obj, _ in files), return_exceptions=True)
+
+    # 2. Register each file in the ledger before parsing (duplicates stop here)
+    records = {}
+    batch_hashes = {}
+    for i, ((_, filename), upload) in enumerate(zip(files, uploads)):
+        if isinstance(upload, Exception):
+            results[i] = upload
+            continue
+        if upload[1] in batch_hashes:
+            results[i] = Exception(f"File '{filename}' has the same content as '{files[batch_hashes[upload[1]]][1]}' in this upload.")
+            continue
+        batch_hashes[upload[1]] = i
+        try:
+            records[i] = await start_import(session, upload[1], filename)
+        except Exception as e:
+            results[i] = e
+
+    # 3. Parse the registered files concurrently
+    pending = list(records)
+    parsed = await asyncio.gather(
+        *(asyncio.to_thread(parse_upload, uploads[i][0], override_reference_date, stats[i]) for i in pending),
+        return_exceptions=True
+    )
+
+    frames = {}
+    for i, outcome in zip(pending, parsed):
+        if isinstance(outcome, UnsupportedFileError):
+            print(f"{files[i][1]}: {outcome}")
+            await fail_import(session, records[i], outcome)
+            results[i] = ([], [])
+        elif isinstance(outcome, Exception):
+            await fail_import(session, records[i], outcome)
+            results[i] = outcome
+        else:
+            frames[i] = outcome
+
+    if not frames:
+        return results
 
-    for idx, row in enumerate(df.to_dicts()):
+    # 4. Categorize all files concurrently against one shared context
+    context = await load_categorization_context(session)
+
+    async def categorize(i: int) -> List[Dict[str, Any]]:
+        with stage_timer(stats[i], "categorize"):
+            return await categorize_frame(frames[i][1], files[i][1], session, context, records[i].id, stats=stats[i])
+
+    categorized = await asyncio.gather(*(categorize(i) for i in frames), return_exceptions=True)
+
+    # 5. Single writer: persist one file at a time
+    for i, extracted in zip(frames, categorized):
+        record = records[i]
         try:
-            # Parse Amount
-            raw_amount = parse_currency(row.get('Valor'))
-            if raw_amount is None:
-                continue
-
-            # Polarity Inversion for CARD
-            if raw_amount > 0:
-                amount = -raw_amount
-                tx_type = TransactionType.EXPENSE
-            else:
-                amount = abs(raw_amount)
-                tx_type = TransactionType.INCOME # Default, might check payment below
-            
-            # Date
-            tx_date = parse_date(row.get('Data'))
-            if not tx_date:
-                continue
-            
-            # Determine Reference Date
-            reference_date = override_reference_date or tx_date.replace(day=1)
-
-            # Description
-            description = str(row.get('Estabelecimento', '')).strip()
-            
-            # Payment of invoice in Card view is a Transfer (Credit)
-            if "pagamento de fatura" in description.lower():
-                tx_type = TransactionType.TRANSFER
-            
-            # Cardholder
-            cardholder = str(row.get('Portador', '')).strip()
-            
-            # Installments
-            inst_str = str(row.get('Parcela', ''))
-            curr_inst, total_inst = parse_installment_column(inst_str)
-            
-            # Category
-            # AI Categorization Logic
-            predicted_category_name = None
-            category_id = None
-            
-            # Use AI to predict category
-            try:
-                # We prioritize the amount magnitude for context, but pass descriptive amount
-                predicted_category_name = await categorizer.predict_category(description, float(amount))
-                
-                # Resolve ID
-                if predicted_category_name in all_categories:
-                    category_id = all_categories[predicted_category_name]
-                else:
-                    # Fallback if AI gave a valid enum string but it's somehow not in DB (shouldn't happen due to seed)
-                    # Or check for 'Não Categorizado'
-                    if predicted_category_name == CategoryEnum.UNCATEGORIZED.value:
-                         category_id = all_categories.get(CategoryEnum.UNCATEGORIZED.value)
-                    else:
-                         # Try finding UNCAT
-                         category_id = all_categories.get(CategoryEnum.UNCATEGORIZED.value)
-            
-            except Exception as e:
-                print(f"AI Categorization error (ignoring): {e}")
-                category_id = all_categories.get(CategoryEnum.UNCATEGORIZED.value)
-            
-            extracted.append({
-                "date": tx_date,
-                "description": description,
-                "amount": amount,
-                "type": tx_type,
-                "cardholder": cardholder,
-                "installment_current": curr_inst,
-                "installment_total": total_inst,
-                "source_type": "XP_CARD",
-                "category_id": category_id,
-                "category_legacy": predicted_category_name or "Uncategorized", 
-                "manual_tag": predicted_category_name, # Storing AI prediction here for reference
-                "is_recurring": (total_inst is not None and total_inst > 1),
-                "reference_date": reference_date,
-                "raw_data": {"source_filename": filename}
-            })
-            
+            if isinstance(extracted, Exception):
+                raise extracted
+            with stage_timer(stats[i], "persist"):
+                saved, candidates = await persist_transactions(session, extracted)
         except Exception as e:
-            print(f"Error parsing card row {idx}: {e}")
+            await fail_import(session, record, e, stats=stats[i])
+            results[i] = e
             continue
 
-    return await persist_transactions(session, extracted)
+        stats[i]["total_ms"] = round((time.perf_counter() - batch_start) * 1000, 2)
+        record.rows_parsed = frames[i][1].height
+        record.rows_categorized = len(extracted)
+        await finish_import(session, record, frames[i][0], len(saved), stats[i], candidates)
+        results[i] = (saved, candidates)
 
-async def process_xp_account(df: pl.DataFrame, filename: str, session: AsyncSession, override_reference_date: Optional[date] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    return results
+
+def spool_to_disk(file_obj: Any, directory: Optional[str] = None) -> Tuple[str, str]:
     """
-    Process XP Bank Account CSV.
-    Columns expected: Data, Lançamento (or Descrição), Valor, Saldo...
+    Copies an uploaded file object to a named temp file (in `directory` if given) so Polars
+    can scan it lazily, hashing the content on the way.
+    The caller is responsible for removing the file.
+    Returns (path, sha256 of the content).
     """
-    extracted = []
-    
-    # Identify Description column
-    desc_col = 'Descrição' if 'Descrição' in df.columns else 'Descricao'
-    if desc_col not in df.columns and 'Lançamento' in df.columns:
-        desc_col = 'Lançamento'
-    if desc_col not in df.columns and 'Lancamento' in df.columns:
-        desc_col = 'Lancamento'
+    hasher = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(mode="wb", suffix=".csv", dir=directory, delete=False) as spool:
+        while block := file_obj.read(SPOOL_COPY_BUFFER):
+            hasher.update(block)
+            spool.write(block)
+        return spool.name, hasher.hexdigest()
 
-    # Initialize Categorizer
-    categorizer = AICategorizer()
-    await categorizer.load_history(session)
-    
-    # Pre-fetch categories map to avoid N+1 queries if possible, or query on the fly. 
-    # For now, let's query on the fly or maybe better, fetch all categories to a dict?
-    # Fetching all categories is safer and faster.
+async def stream_transactions_from_file(file_obj: Any, filename: str, session: AsyncSession, override_reference_date: Optional[date] = None, chunk_size: int = IMPORT_CHUNK_SIZE) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Bounded-memory variant of import_transactions_from_file for very large statements.
+    The upload is spooled to disk and scanned lazily; each chunk of `chunk_size` rows is
+    parsed, categorized, deduplicated and committed before the next one is read.
+    Returns (saved_count, reconciliation_candidates).
+    """
+    path, file_hash = spool_to_disk(file_obj)
+    try:
+        record = await start_import(session, file_hash, filename)
+        return await import_chunks(session, record, path, override_reference_date, chunk_size)
+    finally:
+        os.remove(path)
+
+async def import_chunks(session: AsyncSession, record: Import, path: str, override_reference_date: Optional[date] = None, chunk_size: int = IMPORT_CHUNK_SIZE, progress: Optional[Dict[str, int]] = None) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Imports a spooled CSV for a registered ledger record, one chunk at a time.
+    Each chunk's rows and the record's progress counters are committed together, so an
+    interrupted import resumes after record.chunks_committed: earlier chunks are only
+    re-parsed to replay the duplicate counters, never re-categorized or re-persisted.
+    `progress` receives live per-row categorization counts for polling.
+    Marks the record as completed or failed. Returns (saved_count, reconciliation_candidates).
+    """
+    skip_chunks = record.chunks_committed
+    saved_count = record.row_count
+    candidates = list(record.reconciliation_candidates or [])
+    stats: Dict[str, float] = dict(record.stats or {})
+    # Shared across chunks so the intra-file duplicate suffixes match a full-file import
+    hash_counter: Dict[str, int] = {}
+
+    try:
+        with stage_timer(stats, "total"):
+            batches = pl.scan_csv(path, separator=';', ignore_errors=True, infer_schema=False).collect_batches(chunk_size=chunk_size)
+
+            source_format = None
+            context = None
+            index = 0
+            while True:
+                with stage_timer(stats, "read"):
+                    df = next(batches, None)
+                if df is None:
+                    break
+                df = normalize_columns(df)
+
+                if source_format is None:
+                    source_format = detect_format(df.columns)
+                    if source_format is None:
+                        raise UnsupportedFileError(f"Unknown CSV format. Columns: {df.columns}")
+                    context = await load_categorization_context(session)
+
+                with stage_timer(stats, "parse"):
+                    frame = parse_frame(df, source_format, override_reference_date)
+                with stage_timer(stats, "hash"):
+                    frame = compute_unique_hashes(frame, hash_counter)
+
+                if index < skip_chunks:
+                    # Committed before an interruption: the hashing above replayed the duplicate counters
+                    index += 1
+                    continue
+
+                with stage_timer(stats, "categorize"):
+                    extracted = await categorize_frame(frame, record.filename, session, context, record.id, progress, stats)
+                with stage_timer(stats, "persist"):
+                    saved, chunk_candidates = await persist_transactions(session, extracted, hash_counter, commit=False)
+
+                saved_count += len(saved)
+                candidates.extend(chunk_candidates)
+                index += 1
+
+                # Checkpoint: progress is committed with the chunk's rows
+                record.rows_parsed += frame.height
+                record.rows_categorized += len(extracted)
+                record.row_count = saved_count
+                record.chunks_committed = index
+                record.stats = dict(stats)
+                record.reconciliation_candidates = jsonable_encoder(candidates) or None
+                await session.commit()
+    except (UnsupportedFileError, pl.exceptions.PolarsError) as e:
+        print(f"{record.filename}: {e}")
+        await fail_import(session, record, e, saved_count, stats)
+        if saved_count == 0:
+            return 0, []
+        # Chunks already committed stay in place; surface the partial import
+        raise Exception(f"Import stopped after {saved_count} rows: {e}") from e
+    except Exception as e:
+        await fail_import(session, record, e, saved_count, stats)
+        raise
+
+    await finish_import(session, record, source_format, saved_count, stats, candidates)
+    return saved_count, candidates
+
+async def load_categorization_context(session: AsyncSession) -> Tuple[AICategorizer, Dict[str, Any]]:
+    """
+    Fetches the shared categorizer (history refreshed incrementally) and pre-fetches the category name -> id map.
+    """
+    categorizer = await categorizer_service.get(session)
+
+    # Pre-fetch categories map to avoid N+1 queries
     stmt_cats = select(Category)
     res_cats = await session.execute(stmt_cats)
     all_categories = {c.name: c.id for c in res_cats.scalars().all()}
+    return categorizer, all_categories
 
-    for idx, row in enumerate(df.to_dicts()):
-        try:
-            # Parse Amount
-            val_col = 'Valor'
-            raw_amount = parse_currency(row.get(val_col))
-            if raw_amount is None:
-                continue
-            
-            # Polarity
-            if raw_amount >= 0:
-                amount = raw_amount
-                tx_type = TransactionType.INCOME
-            else:
-                amount = raw_amount # Store negative?
-                tx_type = TransactionType.EXPENSE
-            
-            # Date
-            tx_date = parse_date(row.get('Data'))
-            if not tx_date:
-                continue
-                
-            # Determine Reference Date
-            reference_date = override_reference_date or tx_date.replace(day=1)
-
-            # Description
-            description = str(row.get(desc_col, '')).strip()
-
-            # Detect Transfer
-            if "pagamento de fatura" in description.lower():
-                tx_type = TransactionType.TRANSFER
-            
-            # AI Categorization Logic
-            predicted_category_name = None
-            category_id = None
-            
-            try:
-                predicted_category_name = await categorizer.predict_category(description, float(amount))
-                 # Resolve ID
-                if predicted_category_name in all_categories:
-                    category_id = all_categories[predicted_category_name]
-                else:
-                     category_id = all_categories.get(CategoryEnum.UNCATEGORIZED.value)
-            except Exception as e:
-                print(f"AI Categorization error (ignoring): {e}")
-                category_id = all_categories.get(CategoryEnum.UNCATEGORIZED.value)
-
-            extracted.append({
-                "date": tx_date,
-                "description": description,
-                "amount": amount,
-                "type": tx_type,
-                "source_type": "XP_ACCOUNT",
-                "category_id": category_id,
-                "category_legacy": predicted_category_name or "Uncategorized",
-                "manual_tag": predicted_category_name,
-                "is_recurring": False,
-                "reference_date": reference_date,
-                "raw_data": {"source_filename": filename}
-            })
-            
-        except Exception as e:
-            print(f"Error parsing account row {idx}: {e}")
-            continue
-            
-    return await persist_transactions(session, extracted)
+async def categorize_frame(frame: pl.DataFrame, filename: str, session: AsyncSession, context: Optional[Tuple[AICategorizer, Dict[str, Any]]] = None, import_id: Optional[UUID] = None, progress: Optional[Dict[str, int]] = None, stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Turns a parsed frame into transaction dicts, running the AI categorizer over the rows.
+    Rows the cache and rules cannot resolve are sent to the model CATEGORIZER_BATCH_SIZE
+    per prompt, several prompts at once (see CategorizationExecutor).
+    A context from load_categorization_context can be passed to reuse it across chunks;
+    `progress['rows_categorized']` is incremented as rows complete. Each row records the path
+    that classified it (cache, rule, local, llm, or timeout when the model missed the deadline and the
+    local classifier's guess was used) in raw_data['classified_by']; the counts per path are added to `stats`.
+    """
+    extracted = []
+    if frame.is_empty():
+        return extracted
+
+    categorizer, all_categories = context or await load_categorization_context(session)
+    uncategorized_id = all_categories.get(CategoryEnum.UNCATEGORIZED.value)
+
+    # One lookup of the verified merchant cache for the whole frame
+    await categorizer.cache.warm(session, zip(frame["description"], frame["amount"].cast(pl.Float64)))
+    rows = list(frame.iter_rows(named=True))
+    amounts = [Decimal(row["amount"]) for row in rows]
+
+    # Verified merchants, rules and confident local predictions answer in microseconds; the rest goes to the model in batches
+    fast = [categorizer.classify_fast(row["description"], float(amount)) for row, amount in zip(rows, amounts)]
+    predicted: List[Optional[str]] = [category for category, _ in fast]
+    paths = [path or "llm" for _, path in fast]
+    if progress is not None:
+        progress["rows_categorized"] = progress.get("rows_categorized", 0) + sum(1 for category in predicted if category)
+
+    def batch_done(count: int) -> None:
+        if progress is not None:
+            progress["rows_categorized"] = progress.get("rows_categorized", 0) + count
+
+    # Concurrent model calls; rows not answered before the deadline get the local classifier's guess
+    pending = [i for i, category in enumerate(predicted) if not category]
+    # Few-shot examples of every pending row in one vectorized retrieval
+    await categorizer.prefetch_examples([rows[i]["description"] for i in pending])
+    executor = CategorizationExecutor(categorizer, CATEGORIZER_BATCH_SIZE)
+    names = await executor.run([(rows[i]["description"], float(amounts[i])) for i in pending], batch_done)
+    for i, name in zip(pending, names):
+        if name is None:
+            paths[i] = "timeout"
+            name = categorizer.fallback_category(rows[i]["description"])
+        predicted[i] = name
+
+    for row, amount, predicted_category_name, path in zip(rows, amounts, predicted, paths):
+        # Resolve ID, falling back to 'Não Categorizado' if the name is not in DB
+        category_id = all_categories.get(predicted_category_name, uncategorized_id)
+
+        extracted.append({
+            **row,
+            "amount": amount,
+            "type": TransactionType(row["type"]),
+            "category_id": category_id,
+            "category_legacy": predicted_category_name or "Uncategorized",
+            "manual_tag": predicted_category_name, # Storing AI prediction here for reference
+            "raw_data": {"source_filename": filename, "classified_by": path},
+            "import_id": import_id
+        })
+
+    if stats is not None:
+        stats.update(categorization_stats(
+            stats.get("cache_hits", 0) + paths.count("cache"),
+            stats.get("rule_hits", 0) + paths.count("rule"),
+            stats.get("llm_rows", 0) + paths.count("llm"),
+            stats.get("llm_timeouts", 0) + paths.count("timeout"),
+            stats.get("local_hits", 0) + paths.count("local")
+        ))
+    return extracted
+
+async def process_statement(df: pl.DataFrame, source_format: str, filename: str, session: AsyncSession, override_reference_date: Optional[date] = None, import_id: Optional[UUID] = None, stats: Optional[Dict[str, float]] = None, context: Optional[Tuple[AICategorizer, Dict[str, Any]]] = None, hash_counter: Optional[Dict[str, int]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Runs the parse -> categorize -> persist stages over a raw frame (a whole file or one chunk),
+    accumulating the time spent in each stage into `stats`.
+    """
+    stats = stats if stats is not None else {}
+
+    with stage_timer(stats, "parse"):
+        frame = parse_frame(df, source_format, override_reference_date)
+    with stage_timer(stats, "hash"):
+        frame = compute_unique_hashes(frame, hash_counter)
+    with stage_timer(stats, "categorize"):
+        extracted = await categorize_frame(frame, filename, session, context, import_id, stats=stats)
+    with stage_timer(stats, "persist"):
+        return await persist_transactions(session, extracted, hash_counter)
+
+async def process_xp_card(df: pl.DataFrame, filename: str, session: AsyncSession, override_reference_date: Optional[date] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Process XP Credit Card CSV.
+    Columns expected: Data, Estabelecimento, Portador, Valor, Parcela...
+    """
+    return await process_statement(df, "XP_CARD", filename, session, override_reference_date)
+
+def get_account_description_column(columns: List[str]) -> str:
+    """
+    Identifies the description column of an XP Bank Account CSV.
+    """
+    desc_col = 'Descrição' if 'Descrição' in columns else 'Descricao'
+    if desc_col not in columns and 'Lançamento' in columns:
+        desc_col = 'Lançamento'
+    if desc_col not in columns and 'Lancamento' in columns:
+        desc_col = 'Lancamento'
+    return desc_col
+
+async def process_xp_account(df: pl.DataFrame, filename: str, session: AsyncSession, override_reference_date: Optional[date] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Process XP Bank Account CSV.
+    Columns expected: Data, Lançamento (or Descrição), Valor, Saldo...
+    """
+    return await process_statement(df, "XP_ACCOUNT", filename, session, override_reference_date)
 
 def generate_transaction_hash(entry: Dict[str, Any]) -> str:
     """
     Generates a deterministic hash for checking duplicates.
+    Per-row reference of hashing.hash_key_expr, which the import pipeline uses.
     Hash = sha256(date + amount + description + source_type + source_filename)
        
     The user requested: sha256(date + description + amount + source_id)
@@ -363,87 +611,33 @@ def generate_transaction_hash(entry: Dict[str, Any]) -> str:
     
     return hashlib.sha256(raw.encode('utf-8')).hexdigest()
 
-async def persist_transactions(session: AsyncSession, transactions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+async def persist_transactions(session: AsyncSession, transactions: List[Dict[str, Any]], hash_counter: Optional[Dict[str, int]] = None, commit: bool = True) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
     Deduplicates and saves transactions.
+    Rows without a precomputed unique_hash are hashed here; `hash_counter` carries the intra-file duplicate counts between chunks of a streamed import.
+    With commit=False the caller commits (e.g. together with a progress checkpoint).
     Returns (saved_transactions, reconciliation_candidates)
     """
-    saved = []
-    candidates = []
-    
-    # 1. Compute Hashes with Intra-Batch Counter
-    # (To handle legitimate duplicates within the same file)
-    batch_hashes_counter = {} # hash_base -> count
-    entries_to_check = []
-    
-    for tx in transactions:
-        base_hash = generate_transaction_hash(tx)
-        
-        current_count = batch_hashes_counter.get(base_hash, 0)
-        unique_hash = f"{base_hash}_{current_count}"
-        
-        batch_hashes_counter[base_hash] = current_count + 1
-        
-        tx['unique_hash'] = unique_hash
-        entries_to_check.append(tx)
-        
-    if not entries_to_check:
+    if not transactions:
         return [], []
-        
-    # 2. Check Database for Existing Hashes
-    unique_hashes = [tx['unique_hash'] for tx in entries_to_check]
-    
-    # We query for any of these hashes already existing.
-    # We use chunks to avoid hitting parameter limits if batch is huge (though usually it's small).
-    # For now, simplistic approach.
-    existing_hashes = set()
+
+    # 1. Rows from the Polars pipeline already carry their hash (see hashing.compute_unique_hashes);
+    # other callers get the same column-wise computation here
+    if any('unique_hash' not in tx for tx in transactions):
+        hashes = compute_unique_hashes(records_frame(transactions), hash_counter if hash_counter is not None else {})["unique_hash"]
+        for tx, unique_hash in zip(transactions, hashes):
+            tx['unique_hash'] = unique_hash
+    entries_to_check = transactions
+
+    # 2. Bulk insert, letting the unique_hash constraint skip rows already in the DB
+    inserted_hashes = await bulk_insert_transactions(session, entries_to_check)
     
-    # Chunking just in case (Postgres limit ~32k or 65k params)
-    chunk_size = 1000
-    for i in range(0, len(unique_hashes), chunk_size):
-        chunk = unique_hashes[i:i + chunk_size]
-        stmt_check = select(Transaction.unique_hash).where(Transaction.unique_hash.in_(chunk))
-        result_check = await session.execute(stmt_check)
-        existing_hashes.update(result_check.scalars().all())
+    saved = [tx_data for tx_data in entries_to_check if tx_data['unique_hash'] in inserted_hashes]
     
-    for tx_data in entries_to_check:
-        if tx_data['unique_hash'] in existing_hashes:
-            # Skip duplicate
-            continue
-            
-        # Auto-Reconciliation Logic
-        # Check for matching MANUAL transaction
-        target_amount = tx_data['amount']
-        target_date = tx_data['date']
-        
-        # Define tolerance window
-        start_date = target_date - timedelta(days=2)
-        end_date = target_date + timedelta(days=2)
-        
-        stmt = select(Transaction).where(
-            Transaction.source_type == 'MANUAL',
-            Transaction.amount == target_amount,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).limit(1)
-        
-        result = await session.execute(stmt)
-        match = result.scalars().first()
-        
-        if match:
-             candidates.append({
-                 "id": str(match.id),
-                 "date": match.date,
-                 "description": match.description,
-                 "amount": match.amount,
-                 "type": match.type,
-                 "category_legacy": match.category_legacy
-             })
-             # Do NOT delete automatically in this version
-        
-        new_tx = Transaction(**tx_data)
-        session.add(new_tx)
-        saved.append(tx_data)
+    # 3. Auto-Reconciliation: one set-based lookup of matching MANUAL transactions
+    # Do NOT delete automatically in this version
+    candidates = await find_reconciliation_candidates(session, saved)
     
-    await session.commit()
+    if commit:
+        await session.commit()
     return saved, candidates
@@ -0,0 +1,91 @@
+import time
+import hashlib
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.imports import Import, ImportStatus
+
+def hash_bytes(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+@contextmanager
+def stage_timer(stats: Dict[str, float], stage: str):
+    """
+    Adds the wall time of the block, in ms, to stats['<stage>_ms'].
+    Repeated stages (e.g. one per chunk) accumulate.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        key = f"{stage}_ms"
+        stats[key] = round(stats.get(key, 0.0) + (time.perf_counter() - start) * 1000, 2)
+
+async def find_import(session: AsyncSession, file_hash: str) -> Optional[Import]:
+    """
+    The ledger record of a file's content, if it was ever imported or queued.
+    """
+    result = await session.execute(select(Import).where(Import.file_hash == file_hash))
+    return result.scalar_one_or_none()
+
+async def start_import(session: AsyncSession, file_hash: str, filename: str, status: ImportStatus = ImportStatus.PROCESSING, storage_path: Optional[str] = None, chunk_size: Optional[int] = None, override_reference_date: Optional[date] = None) -> Import:
+    """
+    Registers a file in the import ledger before any parsing starts.
+    Raises if the same content (under any filename) was already imported or is queued as a
+    background job; a previously failed or interrupted attempt is reset and reused.
+    """
+    record = await find_import(session, file_hash)
+
+    if record and record.status == ImportStatus.COMPLETED.value:
+        raise Exception(f"File '{filename}' has already been imported (as '{record.filename}').")
+    if record and record.storage_path and record.status in (ImportStatus.QUEUED.value, ImportStatus.PROCESSING.value):
+        raise Exception(f"File '{filename}' is already being imported (job {record.id}).")
+
+    if record is None:
+        record = Import(file_hash=file_hash, filename=filename)
+        session.add(record)
+
+    record.filename = filename
+    record.status = status.value
+    record.row_count = 0
+    record.rows_parsed = 0
+    record.rows_categorized = 0
+    record.chunks_committed = 0
+    record.error = None
+    record.stats = None
+    record.reconciliation_candidates = None
+    record.storage_path = storage_path
+    record.chunk_size = chunk_size
+    record.override_reference_date = override_reference_date
+    record.started_at = datetime.now(timezone.utc) if status == ImportStatus.PROCESSING else None
+    record.finished_at = None
+
+    await session.commit()
+    return record
+
+async def finish_import(session: AsyncSession, record: Import, source_type: Optional[str], row_count: int, stats: Dict[str, Any], candidates: Optional[List[Dict[str, Any]]] = None) -> None:
+    record.source_type = source_type
+    record.row_count = row_count
+    record.stats = stats
+    record.reconciliation_candidates = jsonable_encoder(candidates) if candidates else None
+    record.status = ImportStatus.COMPLETED.value
+    record.storage_path = None
+    record.finished_at = datetime.now(timezone.utc)
+    await session.commit()
+
+async def fail_import(session: AsyncSession, record: Import, error: Exception, row_count: int = 0, stats: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Marks an import as failed after rolling back whatever was pending.
+    Rows of chunks already committed keep their link to the import.
+    """
+    await session.rollback()
+    record.status = ImportStatus.FAILED.value
+    record.storage_path = None
+    record.error = str(error)
+    record.row_count = row_count
+    record.stats = stats
+    record.finished_at = datetime.now(timezone.utc)
+    await session.commit()
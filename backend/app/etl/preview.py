@@ -0,0 +1,148 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.encoders import jsonable_encoder
+from app.models.transaction import Transaction
+from app.models.imports import Import, ImportStatus
+from app.services.categorizer import AICategorizer
+from app.etl.importer import read_upload, parse_upload, categorize_frame, load_categorization_context, persist_transactions
+from app.etl.reconciliation import find_reconciliation_candidates
+from app.etl.ledger import stage_timer, start_import, finish_import, fail_import
+
+# Parsed previews kept in memory, waiting for a commit
+PREVIEW_CACHE_SIZE = int(os.getenv("PREVIEW_CACHE_SIZE", "16"))
+PREVIEW_TTL_SECONDS = int(os.getenv("PREVIEW_TTL_SECONDS", "1800"))
+
+# unique_hash values per existence query
+HASH_LOOKUP_CHUNK_SIZE = 5000
+
+class PreviewCache:
+    """
+    LRU of categorized import batches keyed by file hash, with a time-to-live.
+    """
+
+    def __init__(self, max_entries: int = PREVIEW_CACHE_SIZE, ttl_seconds: int = PREVIEW_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        item = self.entries.get(file_hash)
+        if item is None:
+            return None
+        created_at, entry = item
+        if time.monotonic() - created_at > self.ttl_seconds:
+            del self.entries[file_hash]
+            return None
+        self.entries.move_to_end(file_hash)
+        return entry
+
+    def put(self, file_hash: str, entry: Dict[str, Any]) -> None:
+        self.entries[file_hash] = (time.monotonic(), entry)
+        self.entries.move_to_end(file_hash)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def pop(self, file_hash: str) -> None:
+        self.entries.pop(file_hash, None)
+
+preview_cache = PreviewCache()
+
+async def find_existing_hashes(session: AsyncSession, hashes: List[str]) -> Set[str]:
+    """
+    Returns which of the given unique_hash values are already stored.
+    """
+    existing = set()
+    for i in range(0, len(hashes), HASH_LOOKUP_CHUNK_SIZE):
+        stmt = select(Transaction.unique_hash).where(Transaction.unique_hash.in_(hashes[i:i + HASH_LOOKUP_CHUNK_SIZE]))
+        result = await session.execute(stmt)
+        existing.update(result.scalars().all())
+    return existing
+
+async def preview_transactions_from_file(file_obj: Any, filename: str, session: AsyncSession, override_reference_date: Optional[date] = None, context: Optional[Tuple[AICategorizer, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Dry run of an import: parses, categorizes, deduplicates and matches the file against
+    MANUAL entries without writing anything.
+    The categorized batch is cached under the file hash so commit_preview can persist it
+    without parsing or categorizing again.
+    Returns the would-be rows, the number of rows already stored and the reconciliation candidates.
+    """
+    stats: Dict[str, float] = {}
+    content, file_hash = await asyncio.to_thread(read_upload, file_obj)
+
+    result = await session.execute(select(Import).where(Import.file_hash == file_hash))
+    record = result.scalar_one_or_none()
+    if record and record.status == ImportStatus.COMPLETED.value:
+        raise Exception(f"File '{filename}' has already been imported (as '{record.filename}').")
+
+    source_format, frame = await asyncio.to_thread(parse_upload, content, override_reference_date, stats)
+
+    with stage_timer(stats, "categorize"):
+        extracted = await categorize_frame(frame, filename, session, context, stats=stats)
+
+    existing = await find_existing_hashes(session, [tx['unique_hash'] for tx in extracted])
+    new_rows = [tx for tx in extracted if tx['unique_hash'] not in existing]
+    candidates = await find_reconciliation_candidates(session, new_rows)
+
+    preview_cache.put(file_hash, {
+        "filename": filename,
+        "source_format": source_format,
+        "rows": extracted,
+        "rows_parsed": frame.height,
+        "stats": stats,
+    })
+
+    return {
+        "file_hash": file_hash,
+        "source_type": source_format,
+        "rows": jsonable_encoder(new_rows),
+        "count": len(new_rows),
+        "duplicates": len(extracted) - len(new_rows),
+        "reconciliation_candidates": candidates
+    }
+
+async def preview_transactions_from_files(files: List[Tuple[Any, str]], session: AsyncSession, override_reference_date: Optional[date] = None) -> List[Any]:
+    """
+    Previews several (file_obj, filename) uploads with one shared categorization context.
+    Returns, per file and in order, the preview or the Exception that failed it.
+    """
+    context = await load_categorization_context(session)
+    results: List[Any] = []
+    for file_obj, filename in files:
+        try:
+            results.append(await preview_transactions_from_file(file_obj, filename, session, override_reference_date, context))
+        except Exception as e:
+            results.append(e)
+    return results
+
+async def commit_preview(file_hash: str, session: AsyncSession) -> Optional[Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """
+    Persists a previewed batch from the cache through the import ledger.
+    Returns (filename, saved_transactions, reconciliation_candidates), or None when the
+    preview expired or was never made.
+    """
+    entry = preview_cache.get(file_hash)
+    if entry is None:
+        return None
+
+    record = await start_import(session, file_hash, entry["filename"])
+    stats = dict(entry["stats"])
+    # Copies so a failed commit leaves the cached batch reusable
+    rows = [{**tx, "import_id": record.id} for tx in entry["rows"]]
+    try:
+        with stage_timer(stats, "persist"):
+            saved, candidates = await persist_transactions(session, rows)
+    except Exception as e:
+        await fail_import(session, record, e, stats=stats)
+        raise
+
+    record.rows_parsed = entry["rows_parsed"]
+    record.rows_categorized = len(rows)
+    await finish_import(session, record, entry["source_format"], len(saved), stats, candidates)
+    preview_cache.pop(file_hash)
+    return entry["filename"], saved, candidates
@@ -0,0 +1,82 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.transaction import Transaction
+
+# Imported rows match MANUAL entries with the same amount up to this many days apart
+RECONCILIATION_TOLERANCE_DAYS = 2
+
+def match_manual_transactions(imported: List[Tuple[date, Decimal]], manual: List[Transaction], tolerance_days: int = RECONCILIATION_TOLERANCE_DAYS) -> List[Optional[Transaction]]:
+    """
+    Matches each imported (date, amount) against the MANUAL transactions one-to-one.
+    A manual entry is claimed by the first imported row that matches it; each row picks
+    the closest unclaimed entry by date with the same amount.
+    Returns the matched Transaction (or None) for each imported row, in input order.
+    """
+    # Sorted interval index: amount -> manual rows ordered by date
+    by_amount: Dict[Decimal, List[Transaction]] = defaultdict(list)
+    for tx in manual:
+        by_amount[tx.amount].append(tx)
+    for rows in by_amount.values():
+        rows.sort(key=lambda tx: tx.date)
+    dates_by_amount = {amount: [tx.date for tx in rows] for amount, rows in by_amount.items()}
+
+    tolerance = timedelta(days=tolerance_days)
+    claimed = set()
+    matches: List[Optional[Transaction]] = []
+
+    for target_date, target_amount in imported:
+        rows = by_amount.get(target_amount)
+        best = None
+        if rows:
+            i = bisect_left(dates_by_amount[target_amount], target_date - tolerance)
+            while i < len(rows) and rows[i].date <= target_date + tolerance:
+                tx = rows[i]
+                if tx.id not in claimed and (best is None or abs(tx.date - target_date) < abs(best.date - target_date)):
+                    best = tx
+                i += 1
+        if best is not None:
+            claimed.add(best.id)
+        matches.append(best)
+
+    return matches
+
+async def find_reconciliation_candidates(session: AsyncSession, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Finds MANUAL transactions that likely duplicate newly imported ones.
+    Loads every MANUAL row in the batch's overall date window with one query and
+    matches them in memory (see match_manual_transactions).
+    """
+    if not transactions:
+        return []
+
+    tolerance = timedelta(days=RECONCILIATION_TOLERANCE_DAYS)
+    dates = [tx['date'] for tx in transactions]
+
+    stmt = select(Transaction).where(
+        Transaction.source_type == 'MANUAL',
+        Transaction.date >= min(dates) - tolerance,
+        Transaction.date <= max(dates) + tolerance
+    )
+    result = await session.execute(stmt)
+    manual = result.scalars().all()
+    if not manual:
+        return []
+
+    matches = match_manual_transactions([(tx['date'], tx['amount']) for tx in transactions], manual)
+
+    return [
+        {
+            "id": str(match.id),
+            "date": match.date,
+            "description": match.description,
+            "amount": match.amount,
+            "type": match.type,
+            "category_legacy": match.category_legacy
+        }
+        for match in matches if match is not None
+    ]
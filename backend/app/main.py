@@ -4,11 +4,20 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 from app.core.database import engine
+from app.core.response_cache import response_cache, track_writes, ResponseCacheMiddleware
 from app.models.transaction import Base
-from app.api import transactions, dashboard, recurring, simulation, scenarios, analytics
+from app.services.import_jobs import import_jobs
+from app.services.categorizer_service import categorizer_service
+from app.services.categorization_jobs import categorization_jobs
+from app.api import transactions, dashboard, recurring, simulation, scenarios, analytics, imports, categorization
 
 app = FastAPI(title="Personal Finance API")
 
+# Dashboard and analytics responses are served from memory until a commit changes the data.
+# Added before CORS so cached responses and 304s still get the CORS headers.
+track_writes(response_cache)
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -35,12 +44,38 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 #     async with engine.begin() as conn:
 #         await conn.run_sync(Base.metadata.create_all)
 
+@app.on_event("startup")
+async def start_import_jobs():
+    # Background import workers; resumes jobs interrupted by a restart
+    await import_jobs.start()
+
+@app.on_event("startup")
+async def start_categorizer():
+    # One categorizer per process, its history loaded before the first request
+    await categorizer_service.start()
+    # Background auto-categorization; resumes jobs from their last committed chunk
+    await categorization_jobs.start()
+
+@app.on_event("shutdown")
+async def stop_categorization_jobs():
+    await categorization_jobs.stop()
+
+@app.on_event("shutdown")
+async def stop_import_jobs():
+    await import_jobs.stop()
+
 app.include_router(transactions.router, prefix="/transactions", tags=["Transactions"])
 app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
 app.include_router(recurring.router, prefix="/recurring", tags=["Recurring"])
 app.include_router(simulation.router, prefix="/simulation", tags=["Simulation"])
 app.include_router(scenarios.router, prefix="/scenarios", tags=["Scenarios"])
 app.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+app.include_router(imports.router, prefix="/imports", tags=["Imports"])
+app.include_router(categorization.router, prefix="/categorization", tags=["Categorization"])
+
+@app.get("/response-cache")
+async def get_response_cache_status():
+    return response_cache.snapshot()
 
 @app.get("/")
 def read_root():
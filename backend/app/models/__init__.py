@@ -1,3 +1,6 @@
 from app.models.transaction import Base, Transaction, Category, TransactionType
 from app.models.recurring import RecurringTransaction
 from app.models.scenario import Scenario, ScenarioItem
+from app.models.imports import Import, ImportStatus
+from app.models.categorization import CategorizationCacheEntry, CategorizationRule, CategorizationJob, CategorizationJobStatus
+from app.models.rollup import MonthlyRollup, SourceBalance
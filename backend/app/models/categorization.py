@@ -0,0 +1,80 @@
+import uuid
+import enum
+from sqlalchemy import Column, String, Integer, Numeric, Boolean, DateTime, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.models.transaction import Base
+
+class CategorizationCacheEntry(Base):
+    """
+    Verified category of a merchant, keyed by normalized description and amount bucket
+    (see app.services.categorization_cache). Fed by manual edits, read before the LLM.
+    """
+    __tablename__ = "categorization_cache"
+
+    description_key = Column(String, primary_key=True)
+    amount_bucket = Column(Integer, primary_key=True)
+    category_name = Column(String, nullable=False)
+    # Number of verified edits that confirmed this entry
+    verified_count = Column(Integer, default=1, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<CategorizationCacheEntry(key={self.description_key}, bucket={self.amount_bucket}, category={self.category_name})>"
+
+class CategorizationRule(Base):
+    """
+    Deterministic categorization rule (see app.services.rule_engine): the description
+    contains `pattern` as whole words and the signed amount is within [min_amount, max_amount].
+    When several rules match, the highest priority wins.
+    """
+    __tablename__ = "categorization_rules"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    pattern = Column(String, nullable=False)
+    category_name = Column(String, nullable=False)
+    min_amount = Column(Numeric(10, 2), nullable=True)
+    max_amount = Column(Numeric(10, 2), nullable=True)
+    priority = Column(Integer, default=0, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+
+    def __repr__(self):
+        return f"<CategorizationRule(pattern={self.pattern}, category={self.category_name})>"
+
+class CategorizationJobStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    PROCESSING = "PROCESSING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+class CategorizationJob(Base):
+    """
+    Background auto-categorization over the whole backlog (see app.services.categorization_jobs).
+    Rows are walked in transaction id order; `last_transaction_id` is committed with each
+    chunk, so an interrupted job resumes after the last finished chunk.
+    """
+    __tablename__ = "categorization_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status = Column(String, default=CategorizationJobStatus.QUEUED.value, nullable=False)
+    error = Column(String, nullable=True)
+
+    # Scope: one reference month or everything; force re-evaluates every unverified row
+    month = Column(Integer, nullable=True)
+    year = Column(Integer, nullable=True)
+    force = Column(Boolean, default=False, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+
+    # Checkpoint and progress
+    last_transaction_id = Column(UUID(as_uuid=True), nullable=True)
+    rows_total = Column(Integer, nullable=True)
+    rows_processed = Column(Integer, default=0, nullable=False)
+    rows_updated = Column(Integer, default=0, nullable=False)
+    chunks_committed = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<CategorizationJob(status={self.status}, processed={self.rows_processed}/{self.rows_total})>"
@@ -0,0 +1,50 @@
+import uuid
+import enum
+from sqlalchemy import Column, String, Integer, DateTime, Date, JSON, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from app.models.transaction import Base
+
+class ImportStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    PROCESSING = "PROCESSING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class Import(Base):
+    """
+    Ledger of imported statement files, keyed by the SHA-256 of the file content.
+    Also serves as the job record of background imports (see app.services.import_jobs).
+    """
+    __tablename__ = "imports"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    file_hash = Column(String(64), unique=True, index=True, nullable=False)
+    filename = Column(String, nullable=False)
+    source_type = Column(String, nullable=True) # XP_CARD, XP_ACCOUNT (detected format)
+    row_count = Column(Integer, default=0, nullable=False)
+    status = Column(String, default=ImportStatus.PROCESSING.value, nullable=False)
+    error = Column(String, nullable=True)
+
+    # Stage timings in ms (read, parse, categorize, persist, total)
+    stats = Column(JSON, nullable=True)
+    reconciliation_candidates = Column(JSON, nullable=True)
+
+    # Progress; row_count above is the number of rows persisted
+    rows_parsed = Column(Integer, default=0, nullable=False)
+    rows_categorized = Column(Integer, default=0, nullable=False)
+    chunks_committed = Column(Integer, default=0, nullable=False)
+
+    # Background job parameters, kept so an interrupted job can resume after a restart
+    storage_path = Column(String, nullable=True) # Spooled upload, removed once the job ends
+    chunk_size = Column(Integer, nullable=True)
+    override_reference_date = Column(Date, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    transactions = relationship("Transaction", back_populates="import_rel")
+
+    def __repr__(self):
+        return f"<Import(filename={self.filename}, status={self.status}, rows={self.row_count})>"
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, String, Integer, Numeric, Date, Enum
+from app.models.transaction import Base, TransactionType
+
+class MonthlyRollup(Base):
+    """
+    Sum and count of transactions per reference month, source, category and type.
+    Kept up to date by statement-level triggers on `transactions` (migration a7c5e3d9f102),
+    so every write path updates it in its own DB transaction; rebuilt from scratch by
+    app.services.rollups.
+    """
+    __tablename__ = "monthly_rollups"
+
+    month = Column(Date, primary_key=True) # First day of the reference month
+    source_type = Column(String, primary_key=True)
+    # Category name, else the legacy category, else 'Uncategorized' (as the dashboard breakdown shows it)
+    category_name = Column(String, primary_key=True)
+    type = Column(Enum(TransactionType), primary_key=True)
+    total = Column(Numeric(14, 2), default=0, nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<MonthlyRollup(month={self.month}, source={self.source_type}, category={self.category_name}, total={self.total})>"
+
+class SourceBalance(Base):
+    """
+    Net change and closing balance of a source per reference month (months without
+    transactions have no row; their closing balance is the previous row's). Kept up to date
+    by statement-level triggers on `transactions` (migration c2e7a9b4d516); rebuilt by
+    app.services.rollups.
+    """
+    __tablename__ = "source_balances"
+
+    source_type = Column(String, primary_key=True)
+    month = Column(Date, primary_key=True) # First day of the reference month
+    net = Column(Numeric(14, 2), default=0, nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+    # Running sum of `net` up to and including this month
+    closing = Column(Numeric(14, 2), default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<SourceBalance(source={self.source_type}, month={self.month}, closing={self.closing})>"
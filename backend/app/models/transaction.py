@@ -1,6 +1,6 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, Numeric, Date, Enum, JSON, ForeignKey, Boolean, Integer
+from sqlalchemy import Column, String, Numeric, Date, DateTime, Enum, JSON, ForeignKey, Boolean, Integer, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base, relationship
 
@@ -44,6 +44,14 @@ class Category(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Access paths of the hot queries: reference_date ranges (see app.core.queries.period_filter)
+        # narrowed by source and type, and category drill-downs over a period
+        Index("ix_transactions_reference_date_source_type_type", "reference_date", "source_type", "type"),
+        Index("ix_transactions_category_id_reference_date", "category_id", "reference_date"),
+        # Auto-categorization backlog: unverified rows walked in id order
+        Index("ix_transactions_unverified", "id", postgresql_where=text("is_verified = false")),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     date = Column(Date, nullable=False)
@@ -64,6 +72,8 @@ class Transaction(Base):
     unique_hash = Column(String, unique=True, index=True, nullable=True)
     is_recurring = Column(Boolean, default=False, nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
+    # When the user last verified the row; the categorizer refreshes its history from it
+    verified_at = Column(DateTime(timezone=True), index=True, nullable=True)
     
     raw_data = Column("metadata", JSON, nullable=True) 
 
@@ -74,7 +84,11 @@ class Transaction(Base):
     source_type = Column(String, default="MANUAL", nullable=False) # XP_CARD, XP_ACCOUNT, MANUAL 
     reference_date = Column(Date, nullable=False) 
 
+    # Import ledger entry this row came from (NULL for manual/legacy rows)
+    import_id = Column(UUID(as_uuid=True), ForeignKey("imports.id"), index=True, nullable=True)
+
     category_rel = relationship("Category", back_populates="transactions")
+    import_rel = relationship("Import", back_populates="transactions")
 
     def __repr__(self):
         return f"<Transaction(date={self.date}, desc={self.description}, amount={self.amount})>"
@@ -0,0 +1,50 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional
+from decimal import Decimal
+from uuid import UUID
+from datetime import datetime
+
+class CategorizationRuleBase(BaseModel):
+    pattern: str
+    category_name: str
+    min_amount: Optional[Decimal] = None
+    max_amount: Optional[Decimal] = None
+    priority: int = 0
+    is_active: bool = True
+
+class CategorizationRuleCreate(CategorizationRuleBase):
+    pass
+
+class CategorizationRuleResponse(CategorizationRuleBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+
+class CategorizationJobCreate(BaseModel):
+    # A reference month (both month and year) or, when omitted, the whole backlog
+    month: Optional[int] = Field(None, ge=1, le=12)
+    year: Optional[int] = Field(None, ge=2000)
+    # Re-evaluate every unverified row, not only the uncategorized ones (e.g. after a taxonomy change)
+    force: bool = False
+    chunk_size: Optional[int] = Field(None, ge=1, le=10000)
+
+class CategorizationJobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    status: str
+    error: Optional[str] = None
+    month: Optional[int] = None
+    year: Optional[int] = None
+    force: bool
+    chunk_size: int
+    rows_total: Optional[int] = None
+    rows_processed: int = 0
+    rows_updated: int = 0
+    chunks_committed: int = 0
+    # Rows processed per second since the job started
+    rows_per_second: Optional[float] = None
+
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
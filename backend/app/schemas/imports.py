@@ -0,0 +1,29 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, Dict, Any, List
+from uuid import UUID
+from datetime import date, datetime
+
+class ImportResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    file_hash: str
+    filename: str
+    source_type: Optional[str] = None
+    row_count: int
+    status: str
+    error: Optional[str] = None
+    stats: Optional[Dict[str, Any]] = None
+    reconciliation_candidates: Optional[List[Dict[str, Any]]] = None
+
+    rows_parsed: int = 0
+    rows_categorized: int = 0
+    chunks_committed: int = 0
+    chunk_size: Optional[int] = None
+    override_reference_date: Optional[date] = None
+    # Rows persisted per second since the job started
+    rows_per_second: Optional[float] = None
+
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
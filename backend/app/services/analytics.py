@@ -4,7 +4,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
 from statistics import mean, median
 
-from app.models.transaction import Transaction, TransactionType
+from app.models.transaction import TransactionType
+from app.models.rollup import MonthlyRollup
 
 class AnalyticsService:
     @staticmethod
@@ -44,21 +45,21 @@ class AnalyticsService:
         start_date = subtract_months(current_month_start, months)
         
         # 2. Query
-        # We group by Year-Month
+        # We group by Year-Month, reading the monthly rollup instead of the transactions
         query = select(
-            func.extract('year', Transaction.reference_date).label('year'),
-            func.extract('month', Transaction.reference_date).label('month'),
-            func.sum(Transaction.amount).label('total')
+            MonthlyRollup.month,
+            func.sum(MonthlyRollup.total).label('total')
         ).where(
             and_(
-                Transaction.source_type == source_type,
-                Transaction.type == TransactionType.EXPENSE,
-                Transaction.reference_date >= start_date,
-                Transaction.reference_date < current_month_start
+                MonthlyRollup.source_type == source_type,
+                MonthlyRollup.type == TransactionType.EXPENSE,
+                MonthlyRollup.month >= start_date,
+                MonthlyRollup.month < current_month_start
             )
         ).group_by(
-            func.extract('year', Transaction.reference_date),
-            func.extract('month', Transaction.reference_date)
+            MonthlyRollup.month
+        ).order_by(
+            MonthlyRollup.month
         )
         
         result = await db.execute(query)
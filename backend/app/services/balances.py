@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, func, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.queries import month_range
+from app.models.rollup import SourceBalance
+from app.models.transaction import Transaction
+
+# Sources counted as liquidity and as liability by the health ratio
+LIQUID_SOURCES = ['XP_ACCOUNT', 'MANUAL']
+LIABILITY_SOURCE = 'XP_CARD'
+
+def latest_closing(before: Optional[date] = None):
+    """
+    Each source's closing balance of its last ledger month before `before` (DISTINCT ON over the primary key).
+    """
+    query = select(SourceBalance.source_type, SourceBalance.closing.label('amount'))
+    if before is not None:
+        query = query.where(SourceBalance.month < before)
+    return query.distinct(SourceBalance.source_type).order_by(SourceBalance.source_type, SourceBalance.month.desc())
+
+def balances_at_query(on: Optional[date] = None):
+    """
+    (source_type, amount) rows adding up to each source's balance at the end of `on`
+    (None: after every transaction). The ledger gives the balance up to `on`'s month and
+    that month's transactions up to `on` are added; on a month's last day it is a lookup only.
+    """
+    if on is None:
+        return latest_closing()
+    start, end = month_range(on.year, on.month)
+    if on + timedelta(days=1) == end:
+        return latest_closing(end)
+    ledger = latest_closing(start).subquery()
+    partial_month = select(
+        Transaction.source_type, func.sum(Transaction.amount).label('amount')
+    ).where(
+        Transaction.reference_date >= start, Transaction.reference_date <= on
+    ).group_by(Transaction.source_type)
+    return union_all(select(ledger.c.source_type, ledger.c.amount), partial_month)
+
+async def balances_at(session: AsyncSession, on: Optional[date] = None) -> Dict[str, float]:
+    result = await session.execute(balances_at_query(on))
+    balances: Dict[str, float] = {}
+    for source_type, amount in result.all():
+        balances[source_type] = balances.get(source_type, 0.0) + float(amount or 0)
+    return balances
+
+def health_totals(balances: Dict[str, float]) -> Tuple[float, float]:
+    """
+    (liquidity, liability) of per-source balances.
+    """
+    liquidity = sum(balances.get(source, 0.0) for source in LIQUID_SOURCES)
+    return liquidity, balances.get(LIABILITY_SOURCE, 0.0)
+
+def month_starts(start: date, end: date) -> List[date]:
+    months = []
+    current = date(start.year, start.month, 1)
+    while current <= end:
+        months.append(current)
+        current = month_range(current.year, current.month)[1]
+    return months
+
+def closing_series(rows: Iterable[Tuple[str, date, float]], months: List[date]) -> List[Dict[str, float]]:
+    """
+    Per-source closing balances for each of `months`, from ledger rows ordered by month.
+    A month without a row for a source carries the source's previous closing balance forward.
+    """
+    rows = list(rows)
+    series = []
+    current: Dict[str, float] = {}
+    i = 0
+    for month in months:
+        while i < len(rows) and rows[i][1] <= month:
+            current[rows[i][0]] = float(rows[i][2])
+            i += 1
+        series.append(dict(current))
+    return series
+
+async def balance_series(session: AsyncSession, start: Optional[date] = None, end: Optional[date] = None) -> List[Tuple[date, Dict[str, float]]]:
+    """
+    Month-end balances of the health ratio's sources for every month from `start` (default:
+    the first ledger month) to `end` (default: the current month), from one ledger read.
+    """
+    end = end or date.today()
+    result = await session.execute(
+        select(SourceBalance.source_type, SourceBalance.month, SourceBalance.closing).where(
+            SourceBalance.source_type.in_(LIQUID_SOURCES + [LIABILITY_SOURCE]),
+            SourceBalance.month <= end
+        ).order_by(SourceBalance.month)
+    )
+    rows = result.all()
+    if start is None:
+        if not rows:
+            return []
+        start = rows[0][1]
+    months = month_starts(start, end)
+    return list(zip(months, closing_series(rows, months)))
@@ -0,0 +1,167 @@
+import os
+import time
+import asyncio
+import re
+import math
+import logging
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event, select, tuple_, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.categorization import CategorizationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Entries kept in the in-process LRU in front of the categorization_cache table
+CATEGORIZATION_CACHE_SIZE = int(os.getenv("CATEGORIZATION_CACHE_SIZE", "20000"))
+# Seconds a key found missing from the table is not looked up again (another worker may verify it)
+CACHE_MISS_TTL_SECONDS = float(os.getenv("CACHE_MISS_TTL_SECONDS", "300"))
+
+# Keys per table lookup
+CACHE_LOOKUP_CHUNK_SIZE = 1000
+
+CacheKey = Tuple[str, int]
+
+def normalize_description(description: str) -> str:
+    """
+    Folds a description to its merchant key: no accents, case, digits or punctuation,
+    so 'IFOOD *Restaurante 123' and 'ifood restaurante' share an entry.
+    """
+    text = unicodedata.normalize("NFKD", description or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^a-z]+", " ", text.lower())
+    return text.strip()
+
+def amount_bucket(amount: float) -> int:
+    """
+    Power-of-two magnitude bucket, negative for outflows, so a R$ 200 transfer and an
+    R$ 8000 salary with the same description do not share an entry.
+    """
+    bucket = int(math.floor(math.log2(abs(amount) + 1)))
+    return -bucket - 1 if amount < 0 else bucket
+
+def cache_key(description: str, amount: float) -> CacheKey:
+    return normalize_description(description), amount_bucket(amount)
+
+class CategorizationCache:
+    """
+    LRU of verified merchant categories backed by the categorization_cache table.
+    Lookups only read memory; warm() loads a batch of keys from the table in one query
+    before categorizing.
+    """
+
+    def __init__(self, max_entries: int = CATEGORIZATION_CACHE_SIZE, miss_ttl_seconds: float = CACHE_MISS_TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.miss_ttl_seconds = miss_ttl_seconds
+        self.clock = clock
+        self.entries: "OrderedDict[CacheKey, str]" = OrderedDict()
+        # Keys looked up in the table and not found (with when), so warm() does not query them again until the TTL
+        self.known_missing: Dict[CacheKey, float] = {}
+        # Serializes table lookups, so files categorized concurrently on one session never overlap queries
+        self.lock = asyncio.Lock()
+
+    def get(self, description: str, amount: float) -> Optional[str]:
+        key = cache_key(description, amount)
+        category = self.entries.get(key)
+        if category is not None:
+            self.entries.move_to_end(key)
+        return category
+
+    def put(self, key: CacheKey, category_name: str) -> None:
+        self.known_missing.pop(key, None)
+        self.entries[key] = category_name
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def discard(self, key: CacheKey) -> None:
+        self.entries.pop(key, None)
+
+    async def warm(self, session: AsyncSession, items: Iterable[Tuple[str, float]]) -> None:
+        """
+        Loads the entries of the given (description, amount) pairs missing from memory.
+        """
+        keys = {cache_key(d, a) for d, a in items if d}
+        now = self.clock()
+        async with self.lock:
+            await self._load(session, [key for key in keys - self.entries.keys() if now - self.known_missing.get(key, -math.inf) > self.miss_ttl_seconds])
+
+    async def _load(self, session: AsyncSession, missing: List[CacheKey]) -> None:
+        if not missing:
+            return
+        if len(self.known_missing) > self.max_entries:
+            self.known_missing.clear()
+
+        try:
+            # Savepoint: a failed lookup must not abort the caller's transaction (e.g. an import about to merge its rows)
+            async with session.begin_nested():
+                for i in range(0, len(missing), CACHE_LOOKUP_CHUNK_SIZE):
+                    stmt = select(CategorizationCacheEntry).where(
+                        tuple_(CategorizationCacheEntry.description_key, CategorizationCacheEntry.amount_bucket).in_(missing[i:i + CACHE_LOOKUP_CHUNK_SIZE])
+                    )
+                    result = await session.execute(stmt)
+                    for entry in result.scalars().all():
+                        self.put((entry.description_key, entry.amount_bucket), entry.category_name)
+            now = self.clock()
+            self.known_missing.update((key, now) for key in missing if key not in self.entries)
+        except Exception as e:
+            logger.error(f"Failed to load categorization cache entries: {e}")
+
+    async def record_verified(self, session: AsyncSession, description: str, amount: float, category_name: Optional[str]) -> None:
+        """
+        Stores a user-verified category for the description (no commit).
+        Clearing the category removes the entry instead. Memory only takes the new category
+        once the session commits (see _apply_verified); until then the key is read from the table.
+        """
+        key = cache_key(description, amount)
+        if not key[0]:
+            return
+
+        table = CategorizationCacheEntry.__table__
+        if not category_name:
+            await session.execute(table.delete().where(table.c.description_key == key[0], table.c.amount_bucket == key[1]))
+            self.discard(key)
+            return
+
+        stmt = insert(table).values(description_key=key[0], amount_bucket=key[1], category_name=category_name, verified_count=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.description_key, table.c.amount_bucket],
+            set_={
+                "category_name": stmt.excluded.category_name,
+                "verified_count": table.c.verified_count + 1,
+                "updated_at": func.now(),
+            }
+        )
+        await session.execute(stmt)
+        self.discard(key)
+        self.known_missing.pop(key, None)
+        session.info.setdefault("verified_categories", []).append((self, key, category_name))
+
+categorization_cache = CategorizationCache()
+
+@event.listens_for(Session, "after_commit")
+def _apply_verified(session):
+    for cache, key, category_name in session.info.pop("verified_categories", []):
+        cache.put(key, category_name)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_verified(session):
+    session.info.pop("verified_categories", None)
+
+def categorization_stats(cache_hits: int, rule_hits: int, llm_rows: int, llm_timeouts: int = 0, local_hits: int = 0) -> Dict[str, float]:
+    """
+    Rows classified by each path, hit rate and LLM calls saved for an import's stats.
+    """
+    total = cache_hits + rule_hits + local_hits + llm_rows + llm_timeouts
+    return {
+        "cache_hits": cache_hits,
+        "rule_hits": rule_hits,
+        "local_hits": local_hits,
+        "llm_rows": llm_rows,
+        "llm_timeouts": llm_timeouts,
+        "llm_calls_saved": cache_hits + rule_hits + local_hits,
+        "cache_hit_rate": round(cache_hits / total, 4) if total else 0.0,
+    }
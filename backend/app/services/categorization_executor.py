@@ -0,0 +1,69 @@
+import os
+import asyncio
+import logging
+import weakref
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Model requests in flight per process; match OLLAMA_NUM_PARALLEL on the server
+CATEGORIZER_CONCURRENCY = int(os.getenv("CATEGORIZER_CONCURRENCY", "4"))
+# Wall time one run() may take; rows still waiting after it stay uncategorized
+CATEGORIZER_DEADLINE_SECONDS = float(os.getenv("CATEGORIZER_DEADLINE_SECONDS", "300"))
+
+# One semaphore per event loop (a semaphore binds to the loop it is first awaited on)
+_llm_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def llm_slots() -> asyncio.Semaphore:
+    """
+    The running loop's model request slots, shared by every executor on it so concurrent
+    imports never exceed the server's parallelism.
+    """
+    loop = asyncio.get_running_loop()
+    slots = _llm_slots.get(loop)
+    if slots is None:
+        slots = _llm_slots[loop] = asyncio.Semaphore(CATEGORIZER_CONCURRENCY)
+    return slots
+
+class CategorizationExecutor:
+    """
+    Fans batches of rows out to the model concurrently, at most CATEGORIZER_CONCURRENCY
+    requests in flight, and returns the categories in input order.
+    """
+
+    def __init__(self, categorizer, batch_size: int, deadline_seconds: float = CATEGORIZER_DEADLINE_SECONDS, slots: Optional[asyncio.Semaphore] = None):
+        self.categorizer = categorizer
+        self.batch_size = batch_size
+        self.deadline_seconds = deadline_seconds
+        self.slots = slots
+
+    async def run(self, items: List[Tuple[str, float]], on_batch_done: Optional[Callable[[int], None]] = None) -> List[Optional[str]]:
+        """
+        Categorizes (description, amount) pairs with categorizer.predict_batch.
+        Rows whose batch failed or had not finished by the deadline come back as None.
+        `on_batch_done(rows)` is called as each batch completes.
+        """
+        results: List[Optional[str]] = [None] * len(items)
+        slots = self.slots or llm_slots()
+
+        async def classify(start: int) -> None:
+            async with slots:
+                names = await self.categorizer.predict_batch(items[start:start + self.batch_size])
+            results[start:start + len(names)] = names
+            if on_batch_done is not None:
+                on_batch_done(len(names))
+
+        batches = [classify(start) for start in range(0, len(items), self.batch_size)]
+        if not batches:
+            return results
+
+        try:
+            outcomes = await asyncio.wait_for(asyncio.gather(*batches, return_exceptions=True), self.deadline_seconds)
+            for outcome in outcomes:
+                if isinstance(outcome, Exception):
+                    logger.error(f"Categorization batch failed: {outcome}")
+        except asyncio.TimeoutError:
+            missing = sum(1 for r in results if r is None)
+            logger.warning(f"Categorization deadline of {self.deadline_seconds}s reached; {missing} rows left uncategorized.")
+
+        return results
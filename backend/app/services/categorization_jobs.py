@@ -0,0 +1,184 @@
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Set
+from uuid import UUID
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.queries import period_filter
+from app.models.categorization import CategorizationJob, CategorizationJobStatus
+from app.models.transaction import Transaction, Category, CategoryEnum
+from app.services.categorizer_service import categorizer_service
+
+logger = logging.getLogger(__name__)
+
+# Transactions categorized and committed together by a background job
+CATEGORIZATION_JOB_CHUNK_SIZE = int(os.getenv("CATEGORIZATION_JOB_CHUNK_SIZE", "500"))
+
+def backlog_filter(stmt, uncategorized_id: UUID, month: Optional[int] = None, year: Optional[int] = None, force: bool = False):
+    """
+    Restricts a Transaction query to the rows auto-categorization should look at, as
+    /transactions/auto-categorize always has:
+    - one reference month: its uncategorized rows, or with force all its unverified rows;
+    - otherwise: uncategorized unverified rows, or with force (jobs only) all unverified rows.
+    """
+    uncategorized = (Transaction.category_id == None) | (Transaction.category_id == uncategorized_id)
+    if month and year:
+        stmt = stmt.where(*period_filter(Transaction.reference_date, year, month))
+        # Force re-evaluates the whole month, but never overwrites verified rows
+        return stmt.where(Transaction.is_verified == False) if force else stmt.where(uncategorized)
+    stmt = stmt.where(Transaction.is_verified == False)
+    return stmt if force else stmt.where(uncategorized)
+
+def apply_predictions(transactions: Sequence[Transaction], predictions: Sequence[str], all_categories: Dict[str, UUID], uncategorized_id: UUID) -> int:
+    """
+    Stores predicted categories on the transactions (as unverified AI guesses).
+    Returns how many actually changed.
+    """
+    updated = 0
+    for tx, predicted_name in zip(transactions, predictions):
+        # Fallback to UNCAT if the name is not in DB
+        new_cat_id = all_categories.get(predicted_name) or uncategorized_id
+        if tx.category_id != new_cat_id:
+            tx.category_id = new_cat_id
+            tx.category_legacy = predicted_name
+            tx.manual_tag = predicted_name # Store AI guess
+            tx.is_verified = False # Automatic classification is not verified
+            updated += 1
+    return updated
+
+class CategorizationJobRunner:
+    """
+    In-process worker that categorizes the backlog one chunk at a time.
+    Each chunk's updates and the job's checkpoint are committed together; jobs left QUEUED
+    or PROCESSING by a previous process resume on startup. One job runs at a time, its
+    model calls already being concurrent (see CategorizationExecutor).
+    """
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+        self.cancelled: Set[UUID] = set()
+
+    async def start(self) -> None:
+        try:
+            await self.resume_pending()
+        except Exception as e:
+            logger.error(f"Could not resume pending categorization jobs: {e}")
+        self.task = asyncio.create_task(self._worker())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def enqueue(self, session: AsyncSession, month: Optional[int] = None, year: Optional[int] = None, force: bool = False, chunk_size: int = CATEGORIZATION_JOB_CHUNK_SIZE) -> CategorizationJob:
+        record = CategorizationJob(
+            status=CategorizationJobStatus.QUEUED.value,
+            month=month, year=year, force=force, chunk_size=chunk_size
+        )
+        session.add(record)
+        await session.commit()
+        await session.refresh(record)
+        await self.queue.put(record.id)
+        return record
+
+    async def cancel(self, session: AsyncSession, record: CategorizationJob) -> CategorizationJob:
+        """
+        Stops a job after its current chunk; a job still queued is cancelled right away.
+        """
+        if record.status == CategorizationJobStatus.QUEUED.value:
+            record.status = CategorizationJobStatus.CANCELLED.value
+            record.finished_at = datetime.now(timezone.utc)
+            await session.commit()
+        elif record.status == CategorizationJobStatus.PROCESSING.value:
+            self.cancelled.add(record.id)
+        return record
+
+    async def resume_pending(self) -> None:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(CategorizationJob.id).where(
+                    CategorizationJob.status.in_([CategorizationJobStatus.QUEUED.value, CategorizationJobStatus.PROCESSING.value])
+                ).order_by(CategorizationJob.created_at)
+            )
+            job_ids = result.scalars().all()
+
+        for job_id in job_ids:
+            await self.queue.put(job_id)
+        if job_ids:
+            logger.info(f"Resuming {len(job_ids)} categorization job(s).")
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self.run(job_id)
+            except Exception as e:
+                logger.error(f"Categorization job {job_id} failed: {e}")
+            finally:
+                self.cancelled.discard(job_id)
+                self.queue.task_done()
+
+    async def run(self, job_id: UUID) -> None:
+        async with AsyncSessionLocal() as session:
+            record = await session.get(CategorizationJob, job_id)
+            if record is None or record.status not in (CategorizationJobStatus.QUEUED.value, CategorizationJobStatus.PROCESSING.value):
+                return
+            try:
+                await self.process(session, record)
+            except asyncio.CancelledError:
+                # Shutdown: the job resumes from its checkpoint on startup
+                raise
+            except Exception as e:
+                await session.rollback()
+                record.status = CategorizationJobStatus.FAILED.value
+                record.error = str(e)
+                record.finished_at = datetime.now(timezone.utc)
+                await session.commit()
+                raise
+
+    async def process(self, session: AsyncSession, record: CategorizationJob) -> None:
+        uncat = (await session.execute(select(Category).where(Category.name == CategoryEnum.UNCATEGORIZED.value))).scalar_one_or_none()
+        if uncat is None:
+            raise ValueError("Category 'Não Categorizado' not found.")
+        all_categories = {c.name: c.id for c in (await session.execute(select(Category))).scalars().all()}
+
+        record.status = CategorizationJobStatus.PROCESSING.value
+        record.started_at = record.started_at or datetime.now(timezone.utc)
+        if record.rows_total is None:
+            record.rows_total = (await session.execute(
+                backlog_filter(select(func.count(Transaction.id)), uncat.id, record.month, record.year, record.force)
+            )).scalar()
+        await session.commit()
+
+        categorizer = await categorizer_service.get(session)
+        while record.id not in self.cancelled:
+            # Keyset pagination: rows left uncategorized by a chunk are not read again
+            stmt = backlog_filter(select(Transaction), uncat.id, record.month, record.year, record.force)
+            if record.last_transaction_id is not None:
+                stmt = stmt.where(Transaction.id > record.last_transaction_id)
+            transactions: List[Transaction] = (await session.execute(stmt.order_by(Transaction.id).limit(record.chunk_size))).scalars().all()
+            if not transactions:
+                break
+
+            described = [tx for tx in transactions if tx.description]
+            await categorizer.cache.warm(session, [(tx.description, float(tx.amount)) for tx in described])
+            predictions = await categorizer.predict_categories([(tx.description, float(tx.amount)) for tx in described])
+
+            record.rows_updated += apply_predictions(described, predictions, all_categories, uncat.id)
+            record.rows_processed += len(transactions)
+            record.chunks_committed += 1
+            record.last_transaction_id = transactions[-1].id
+            await session.commit()
+
+        record.status = CategorizationJobStatus.CANCELLED.value if record.id in self.cancelled else CategorizationJobStatus.COMPLETED.value
+        record.finished_at = datetime.now(timezone.utc)
+        await session.commit()
+        logger.info(f"Categorization job {record.id} {record.status.lower()}: {record.rows_updated} of {record.rows_processed} rows updated.")
+
+categorization_jobs = CategorizationJobRunner()
@@ -1,43 +1,91 @@
 
+import os
+import json
+import time
+import asyncio
 import logging
-from typing import Optional, List, Dict, Tuple
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Set, Tuple
 from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from app.models.transaction import CategoryEnum, Transaction, Category
 from sqlalchemy.future import select
-from sqlalchemy import distinct
-from rapidfuzz import process, fuzz
+from sqlalchemy import distinct, func
+from app.services.categorization_cache import CategorizationCache, categorization_cache
+from app.services.rule_engine import RuleEngine, load_rule_engine
+from app.services.categorization_executor import CategorizationExecutor
+from app.services.history_index import HistoryIndex
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, AdaptiveTimeout, llm_breaker, llm_timeouts, LLM_TIMEOUT_SECONDS
+from app.services.local_classifier import LocalClassifier, local_classifier, LOCAL_CONFIDENCE_THRESHOLD
 
 # Get a logger
 logger = logging.getLogger(__name__)
 
+# Transactions per batched prompt (predict_categories)
+CATEGORIZER_BATCH_SIZE = int(os.getenv("CATEGORIZER_BATCH_SIZE", "20"))
+# Descriptions whose retrieved examples are kept between prefetches
+EXAMPLES_MEMO_SIZE = 50000
+# Fragments of the errors a model server returns for a prompt longer than its context
+CONTEXT_LENGTH_ERRORS = ("context length", "context window", "maximum context", "too many tokens", "input length")
+# Seconds before the watermark re-read by refresh_history: verified_at is stamped before the
+# commit, so a row can become visible after a later-stamped one was already read
+HISTORY_LOOKBACK_SECONDS = float(os.getenv("HISTORY_LOOKBACK_SECONDS", "300"))
+
+# Tally of the predict_categories call in progress; its batch tasks inherit it
+call_stats: ContextVar[Optional[Dict[str, int]]] = ContextVar("call_stats", default=None)
+
 class AICategorizer:
-    def __init__(self, model_name: str = "qwen2.5:7b", base_url: str = "http://host.docker.internal:11434"):
+    def __init__(self, model_name: str = "qwen2.5:7b", base_url: str = "http://host.docker.internal:11434", cache: Optional[CategorizationCache] = None, local: Optional[LocalClassifier] = None, breaker: Optional[CircuitBreaker] = None, timeouts: Optional[Dict[str, AdaptiveTimeout]] = None):
         """
         Initializes the AI Categorizer with LangChain and ChatOllama.
         """
         self.model_name = model_name
         self.base_url = base_url
+
+        # Verified merchant categories, checked before any prompt is built
+        self.cache = cache if cache is not None else categorization_cache
+        # Deterministic keyword/amount rules, see load_rules
+        self.rules = RuleEngine([])
+        # Offline n-gram classifier trained on the verified history: answers confident rows, and
+        # is the fallback when the model fails
+        self.local = local if local is not None else local_classifier
+        self.local_threshold = LOCAL_CONFIDENCE_THRESHOLD
+        self.cache_hits = 0
+        self.rule_hits = 0
+        self.local_hits = 0
+        self.llm_calls = 0
         
         # Valid categories for the prompt
         self.valid_categories = ", ".join([f'"{e.value}"' for e in CategoryEnum])
         
         # Caching user history for few-shot prompting
         self.history_cache: List[Tuple[str, float, str]] = [] # List of (description, amount, category_name)
+        # Fuzzy retrieval over history_cache, rebuilt by load_history and extended by refresh_history
+        self.history_index = HistoryIndex([])
+        self.history_seen: Set[Tuple[str, float, str]] = set()
+        # Latest verified_at already read; None until a verified row carries one
+        self.history_watermark: Optional[datetime] = None
+        self.history_loaded = False
+        # description -> formatted examples, filled in bulk by prefetch_examples
+        self.examples_memo: Dict[str, List[str]] = {}
         
         # Initialize the LLM
-        # request_timeout is helpful to avoid hanging indefinitely
+        # request_timeout is helpful to avoid hanging indefinitely; invoke_model tightens it to the observed p95
         self.llm = ChatOllama(
             model=model_name,
             base_url=base_url,
             temperature=0.0, # Deterministic output
-            request_timeout=10.0 # 10 seconds timeout
+            request_timeout=LLM_TIMEOUT_SECONDS
         )
+        # Model calls are refused while the server keeps failing (see invoke_model)
+        self.breaker = breaker if breaker is not None else llm_breaker
+        self.timeouts = timeouts if timeouts is not None else llm_timeouts
 
         # Define the prompt template
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", 
+        # The classification rules are shared by the single and the batched prompts
+        classification_rules = (
              "You are a financial classifier. Given the transaction description and amount, classify it into exactly ONE of these categories: "
              "[{valid_categories}]. "
              "\n\nContext from similar past transactions:\n{context}\n\n"
@@ -54,21 +102,42 @@ class AICategorizer:
              "- Use 'Alimentação' ONLY if it is clearly food-related but ambiguous between the three above.\n"
              "\n"
              "Prioritize the patterns found in the 'Similar past examples' above general knowledge.\n"
+        )
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", 
+             classification_rules +
              "Return ONLY the category name as a string, nothing else. "
              "If you are unsure or the description is too vague, pick the best fit or 'Não Categorizado'."
             ),
             ("user", "Transaction: {description} | Amount: {amount}")
         ])
 
+        # Batched variant: numbered transactions in, JSON array of categories out
+        self.batch_prompt = ChatPromptTemplate.from_messages([
+            ("system",
+             classification_rules +
+             "You will receive a numbered list of transactions. Classify each one independently. "
+             "Return ONLY a JSON array of category names with exactly one entry per transaction, in the same order, "
+             "e.g. [\"Mercado\", \"Delivery\"]. Nothing else. "
+             "If you are unsure or a description is too vague, pick the best fit or 'Não Categorizado'."
+            ),
+            ("user", "Transactions:\n{transactions}")
+        ])
+
         # Create the chain
         self.chain = self.prompt | self.llm | StrOutputParser()
+        self.batch_chain = self.batch_prompt | self.llm | StrOutputParser()
 
     async def load_history(self, db_session):
         """
         Loads distinct transaction descriptions and their assigned categories into memory.
         This serves as the knowledge base for 'Few-Shot' prompting.
+        Also records the verification watermark that refresh_history continues from.
         """
         try:
+            # Read before the history so rows verified meanwhile are picked up by the next refresh
+            watermark = (await db_session.execute(select(func.max(Transaction.verified_at)))).scalar()
+
             # Join Transaction with Category to get the name, filter only categorized ones
             stmt = select(distinct(Transaction.description), Transaction.amount, Category.name)\
                 .join(Category, Transaction.category_id == Category.id)\
@@ -81,80 +150,314 @@ class AICategorizer:
             
             # Update cache: List of tuples (description, amount, category_name)
             self.history_cache = [(row[0], float(row[1]), row[2]) for row in rows if row[0]]
+            self.history_index = HistoryIndex(self.history_cache)
+            self.history_seen = set(self.history_cache)
+            self.history_watermark = watermark
+            self.history_loaded = True
+            self.examples_memo = {}
             logger.info(f"Categorizer memory updated with {len(self.history_cache)} examples.")
             
         except Exception as e:
             logger.error(f"Failed to load transaction history for AI memory: {e}")
+            return
+
+        await self.train_local(self.local.sync, self.history_cache)
+
+    async def refresh_history(self, db_session):
+        """
+        Adds the rows verified since the last load or refresh (verified_at at or after the
+        watermark, less HISTORY_LOOKBACK_SECONDS for rows committed late) to the history,
+        without reloading it. Runs load_history the first time.
+        Examples of recategorized rows are only dropped by the next full load_history.
+        """
+        if not self.history_loaded:
+            await self.load_history(db_session)
+            return
+
+        try:
+            stmt = select(Transaction.description, Transaction.amount, Category.name, Transaction.verified_at)\
+                .join(Category, Transaction.category_id == Category.id)\
+                .where(Transaction.description.is_not(None))\
+                .where(Transaction.is_verified == True)
+            # Rows of the lookback window are read again and skipped through history_seen
+            if self.history_watermark is not None:
+                stmt = stmt.where(Transaction.verified_at >= self.history_watermark - timedelta(seconds=HISTORY_LOOKBACK_SECONDS))
+            else:
+                stmt = stmt.where(Transaction.verified_at.is_not(None))
+
+            rows = (await db_session.execute(stmt)).all()
+        except Exception as e:
+            logger.error(f"Failed to refresh transaction history for AI memory: {e}")
+            return
+
+        added = []
+        for description, amount, category, verified_at in rows:
+            if self.history_watermark is None or verified_at > self.history_watermark:
+                self.history_watermark = verified_at
+            entry = (description, float(amount), category)
+            if description and entry not in self.history_seen:
+                self.history_seen.add(entry)
+                added.append(entry)
+
+        if added:
+            self.history_cache.extend(added)
+            self.history_index.extend(added)
+            # Memoized examples may now miss a closer match
+            self.examples_memo = {}
+            logger.info(f"Categorizer memory refreshed with {len(added)} new examples.")
+            await self.train_local(self.local.partial_fit, added)
+
+    async def train_local(self, train, entries) -> None:
+        """
+        Runs `train` (local.sync or local.partial_fit) over entries in a worker thread and saves the model if it changed.
+        """
+        try:
+            if await asyncio.to_thread(train, entries):
+                await asyncio.to_thread(self.local.save)
+        except Exception as e:
+            logger.error(f"Failed to train the local classifier: {e}")
+
+    async def load_rules(self, db_session):
+        """
+        Compiles the active categorization rules from the database.
+        """
+        self.rules = await load_rule_engine(db_session)
+
+    def classify_fast(self, description: str, amount: float) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Classifies without the model: a verified merchant from the cache, the rules, then the
+        local classifier when it is at least `local_threshold` confident.
+        Returns (category, path) with path 'cache', 'rule' or 'local', or (None, None).
+        """
+        category = self.cache.get(description, amount)
+        if category:
+            self.cache_hits += 1
+            return category, "cache"
+        category = self.rules.classify(description, amount)
+        if category:
+            self.rule_hits += 1
+            return category, "rule"
+        category, confidence = self.local.predict(description)
+        if category and confidence >= self.local_threshold:
+            self.local_hits += 1
+            return category, "local"
+        return None, None
+
+    def fallback_category(self, description: str) -> str:
+        """
+        The local classifier's best guess, whatever its confidence, for rows the model could not answer.
+        """
+        category, _ = self.local.predict(description)
+        return category or CategoryEnum.UNCATEGORIZED.value
 
     async def predict_category(self, description: str, amount: float, db=None) -> str:
         """
         Predicts the category for a given transaction asynchronously.
-        Uses rapidfuzz to find similar past transactions and boosts the prompt with them.
-        Returns 'Não Categorizado' if the model fails or times out.
+        Returns the category of a verified merchant or matching rule when there is one
+        (see classify_fast); otherwise uses rapidfuzz to find similar past transactions and boosts the prompt with them.
+        If the model fails or times out, returns the local classifier's guess (see fallback_category).
         """
         try:
             # Lazy load history if provided DB session and cache is empty
-            if db and not self.history_cache:
+            if db and not self.history_loaded:
                 await self.load_history(db)
 
+            # 0. Verified merchants and rule matches skip the model entirely
+            if db:
+                await self.cache.warm(db, [(description, amount)])
+            category, _ = self.classify_fast(description, amount)
+            if category:
+                return category
+
             # 1. Find relevant context from history
-            context_str = "No similar past examples found."
-            if self.history_cache and description:
-                # Extract only descriptions for matching
-                choices = [item[0] for item in self.history_cache]
-                
-                # Get top 3 similar descriptions
-                matches = process.extract(description, choices, limit=3, scorer=fuzz.WRatio)
-                
-                # Filter matches with score > 60
-                good_matches = []
-                for match in matches:
-                    # match is (string, score, index)
-                    matched_desc = match[0]
-                    score = match[1]
-                    index = match[2]
-                    
-                    if score > 60:
-                         # Retrieve the category from cache using index
-                         cached_item = self.history_cache[index]
-                         # cached_item is (desc, amount, category_name)
-                         matched_desc_db = cached_item[0]
-                         matched_amount = cached_item[1]
-                         category = cached_item[2]
-                         
-                         good_matches.append(f"- '{matched_desc_db}' (Value: {matched_amount:.2f}) was classified as '{category}'")
-
-                if good_matches:
-                    context_str = "Similar past examples: " + "; ".join(good_matches)
+            good_matches = self.find_similar_examples(description)
+            context_str = "Similar past examples: " + "; ".join(good_matches) if good_matches else "No similar past examples found."
 
             # 2. Invoke the chain with context
-            result = await self.chain.ainvoke({
+            result = await self.invoke_model(self.chain, "single", {
                 "valid_categories": self.valid_categories,
                 "description": description,
                 "amount": amount,
                 "context": context_str
             })
             
-            cleaned_result = result.strip().replace('"', '').replace("'", "")
-            
-            # Validate if the result is actually in our enum values
-            # (Ollama is usually good, but being safe is better)
-            allowed_values = {e.value for e in CategoryEnum}
-            
-            if cleaned_result in allowed_values:
-                return cleaned_result
-            
-            # Basic fuzzy matching or fallback if LLM hallucinated
-            # For now, just log and fallback if strict match fails, or maybe try to find a substring
-            # But "stack" request instruction implies we trust the output mostly.
-            # Let's try to see if any valid category is IN the result (e.g. if it output "Category: Moradia")
-            for val in allowed_values:
-                if val in cleaned_result:
-                    return val
-                    
-            logger.warning(f"Categorizer returned invalid category '{cleaned_result}' for '{description}'. Fallback to Uncategorized.")
-            return CategoryEnum.UNCATEGORIZED.value
+            return self.clean_category(result, description)
 
+        except CircuitOpenError:
+            return self.fallback_category(description)
         except Exception as e:
             logger.error(f"AI Categorization failed using {self.base_url}: {e}")
-            return CategoryEnum.UNCATEGORIZED.value
+            return self.fallback_category(description)
+
+    async def invoke_model(self, chain, kind: str, inputs: Dict) -> str:
+        """
+        Runs a model chain through the circuit breaker, with the adaptive timeout of its
+        kind ('single' or 'batch'). Raises CircuitOpenError without calling the model while
+        the breaker is open; failures and timeouts are reported to it, except a prompt too big
+        for the context (predict_batch splits it, the model itself is fine).
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError()
+
+        timeout = self.timeouts[kind].current()
+        start = time.perf_counter()
+        self.llm_calls += 1
+        stats = call_stats.get()
+        if stats is not None:
+            stats["llm_calls"] = stats.get("llm_calls", 0) + 1
+        try:
+            result = await asyncio.wait_for(chain.ainvoke(inputs), timeout)
+        except asyncio.TimeoutError:
+            self.breaker.record_failure(timed_out=True)
+            raise TimeoutError(f"model call exceeded {timeout:.1f}s")
+        except Exception as e:
+            if not is_context_length_error(e):
+                self.breaker.record_failure()
+            raise
+
+        self.breaker.record_success()
+        self.timeouts[kind].observe(time.perf_counter() - start)
+        return result
+
+    def find_similar_examples(self, description: str, limit: int = 3) -> List[str]:
+        """
+        Formats the verified history entries most similar to the description (WRatio > 60).
+        """
+        if description in self.examples_memo:
+            return self.examples_memo[description]
+        return [format_example(entry) for entry in self.history_index.search(description, limit)]
+
+    async def prefetch_examples(self, descriptions: List[str]) -> None:
+        """
+        Retrieves the similar examples of many descriptions in one vectorized pass (in a
+        worker thread) so the prompts built afterwards skip the per-row search.
+        """
+        if not len(self.history_index) or not descriptions:
+            return
+        if len(self.examples_memo) > EXAMPLES_MEMO_SIZE:
+            self.examples_memo = {}
+        found = await asyncio.to_thread(self.history_index.search_many, descriptions)
+        for description, entries in found.items():
+            self.examples_memo[description] = [format_example(entry) for entry in entries]
+
+    def clean_category(self, result: str, description: str) -> str:
+        """
+        Maps the model's answer to a valid category name, falling back to 'Não Categorizado'.
+        """
+        cleaned_result = str(result).strip().replace('"', '').replace("'", "")
+        
+        # Validate if the result is actually in our enum values
+        # (Ollama is usually good, but being safe is better)
+        allowed_values = {e.value for e in CategoryEnum}
+        
+        if cleaned_result in allowed_values:
+            return cleaned_result
+        
+        # Let's try to see if any valid category is IN the result (e.g. if it output "Category: Moradia")
+        for val in allowed_values:
+            if val in cleaned_result:
+                return val
+                
+        logger.warning(f"Categorizer returned invalid category '{cleaned_result}' for '{description}'. Fallback to Uncategorized.")
+        return CategoryEnum.UNCATEGORIZED.value
+
+    async def predict_categories(self, items: List[Tuple[str, float]], batch_size: int = CATEGORIZER_BATCH_SIZE, stats: Optional[Dict[str, int]] = None) -> List[str]:
+        """
+        Categorizes many (description, amount) pairs, in order.
+        Rows resolved by classify_fast skip the model; the rest are sent `batch_size` at a
+        time in one prompt each (see predict_batch), several prompts in flight at once.
+        Rows the model does not answer in time get the local classifier's guess.
+        The rows per path (cache, rule, local, llm, timeout) and the model requests of this
+        call alone ('llm_calls') are added to `stats`.
+        """
+        fast = [self.classify_fast(description, amount) for description, amount in items]
+        categories: List[Optional[str]] = [category for category, _ in fast]
+        paths = [path or "llm" for _, path in fast]
+        pending = [i for i, category in enumerate(categories) if not category]
+        await self.prefetch_examples([items[i][0] for i in pending])
+
+        calls: Dict[str, int] = {}
+        token = call_stats.set(calls)
+        try:
+            predicted = await CategorizationExecutor(self, batch_size).run([items[i] for i in pending])
+        finally:
+            call_stats.reset(token)
+        for i, category in zip(pending, predicted):
+            if category is None:
+                paths[i] = "timeout"
+            categories[i] = category or self.fallback_category(items[i][0])
+
+        if stats is not None:
+            for path in paths:
+                stats[path] = stats.get(path, 0) + 1
+            stats["llm_calls"] = stats.get("llm_calls", 0) + calls.get("llm_calls", 0)
+        return categories
+
+    async def predict_batch(self, items: List[Tuple[str, float]]) -> List[str]:
+        """
+        Classifies several transactions with a single model call that returns a JSON array.
+        A malformed or incomplete answer, or a prompt too big for the model's context, splits
+        the batch in half and retries each part; single items use predict_category.
+        Any other failure (timeout, unreachable model) and an open circuit breaker give every
+        row the local classifier's guess: retrying smaller batches would only wait again.
+        """
+        if not items:
+            return []
+        if len(items) == 1:
+            return [await self.predict_category(*items[0])]
+
+        examples: List[str] = []
+        for description, _ in items:
+            for example in self.find_similar_examples(description):
+                if example not in examples:
+                    examples.append(example)
+        context_str = "Similar past examples: " + "; ".join(examples) if examples else "No similar past examples found."
+        transactions = "\n".join(f"{n}. {description} | Amount: {amount}" for n, (description, amount) in enumerate(items, start=1))
+
+        try:
+            result = await self.invoke_model(self.batch_chain, "batch", {
+                "valid_categories": self.valid_categories,
+                "transactions": transactions,
+                "context": context_str
+            })
+            answers = parse_category_array(result, len(items))
+            if answers is not None:
+                return [self.clean_category(answer, description) for answer, (description, _) in zip(answers, items)]
+            logger.warning(f"Categorizer returned a malformed batch answer for {len(items)} transactions. Splitting.")
+        except CircuitOpenError:
+            return [self.fallback_category(description) for description, _ in items]
+        except Exception as e:
+            if not is_context_length_error(e):
+                logger.error(f"Batched AI Categorization failed using {self.base_url} for {len(items)} transactions: {e}")
+                return [self.fallback_category(description) for description, _ in items]
+            logger.warning(f"Batch prompt of {len(items)} transactions exceeds the model's context. Splitting.")
+
+        middle = len(items) // 2
+        return await self.predict_batch(items[:middle]) + await self.predict_batch(items[middle:])
+
+def is_context_length_error(error: Exception) -> bool:
+    """
+    Whether a failed model call was refused for its prompt size (the only failure a smaller batch fixes).
+    """
+    message = str(error).lower()
+    return any(marker in message for marker in CONTEXT_LENGTH_ERRORS)
+
+def format_example(entry: Tuple[str, float, str]) -> str:
+    description, amount, category = entry
+    return f"- '{description}' (Value: {amount:.2f}) was classified as '{category}'"
+
+def parse_category_array(result: str, expected: int) -> Optional[List[str]]:
+    """
+    Extracts the JSON array of a batched answer (ignoring any text around it).
+    Returns None unless it holds exactly `expected` strings.
+    """
+    start, end = result.find("["), result.rfind("]")
+    if start == -1 or end < start:
+        return None
+    try:
+        answers = json.loads(result[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(answers, list) or len(answers) != expected or not all(isinstance(a, str) for a in answers):
+        return None
+    return answers
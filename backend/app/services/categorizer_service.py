@@ -0,0 +1,74 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Callable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.services.categorizer import AICategorizer
+
+logger = logging.getLogger(__name__)
+
+# Seconds between full history reloads; refreshes in between only read newly verified rows
+HISTORY_FULL_RELOAD_SECONDS = float(os.getenv("HISTORY_FULL_RELOAD_SECONDS", "3600"))
+
+class CategorizerService:
+    """
+    Holds the process-wide AICategorizer: one model client (and its HTTP connection pool),
+    one prompt and one history index shared by every import and auto-categorize call.
+    get() brings the history up to date incrementally (see AICategorizer.refresh_history)
+    and recompiles the rules only after they changed.
+    """
+
+    def __init__(self, factory: Callable[[], AICategorizer] = AICategorizer, full_reload_seconds: float = HISTORY_FULL_RELOAD_SECONDS):
+        self.factory = factory
+        self.full_reload_seconds = full_reload_seconds
+        self.categorizer: Optional[AICategorizer] = None
+        self.loaded_at: Optional[float] = None
+        self.rules_stale = True
+        self.lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        try:
+            async with AsyncSessionLocal() as session:
+                await self.get(session)
+        except Exception as e:
+            logger.error(f"Could not warm up the categorizer: {e}")
+
+    async def get(self, session: AsyncSession) -> AICategorizer:
+        """
+        The shared categorizer with its history and rules current as of this call.
+        """
+        async with self.lock:
+            if self.categorizer is None:
+                self.categorizer = self.factory()
+
+            now = time.monotonic()
+            if self.loaded_at is None or now - self.loaded_at > self.full_reload_seconds:
+                await self.categorizer.load_history(session)
+                self.loaded_at = now
+            else:
+                await self.categorizer.refresh_history(session)
+
+            if self.rules_stale:
+                await self.categorizer.load_rules(session)
+                self.rules_stale = False
+
+            return self.categorizer
+
+    def invalidate_rules(self) -> None:
+        """
+        Recompiles the rules on the next get(); call after creating or deleting one.
+        """
+        self.rules_stale = True
+
+    def reset(self) -> None:
+        """
+        Drops the categorizer; the next get() builds a new one from `factory`.
+        """
+        self.categorizer = None
+        self.loaded_at = None
+        self.rules_stale = True
+
+categorizer_service = CategorizerService()
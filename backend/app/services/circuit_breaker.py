@@ -0,0 +1,132 @@
+import os
+import math
+import time
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failed or timed out model calls that open the breaker
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+# Seconds the breaker stays open before letting one probe call through
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+# Timeout used until enough latencies are observed; also the upper bound of the adaptive timeout
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "10"))
+LLM_TIMEOUT_MIN_SECONDS = float(os.getenv("LLM_TIMEOUT_MIN_SECONDS", "1"))
+# Adaptive timeout = p95 of recent successful calls times this factor
+LLM_TIMEOUT_P95_MULTIPLIER = float(os.getenv("LLM_TIMEOUT_P95_MULTIPLIER", "2"))
+# Recent latencies kept per call kind, and how many are needed before adapting
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling the model while the breaker is open.
+    """
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `failure_threshold` consecutive failures it opens and
+    calls are refused for `cooldown_seconds`; then it is half-open and lets one probe
+    through (another one per cooldown if the probe never reports back). A successful
+    probe closes it again, a failed one reopens it.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, cooldown_seconds: float = LLM_BREAKER_COOLDOWN_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None
+        self.counters = {"successes": 0, "failures": 0, "timeouts": 0, "short_circuits": 0, "trips": 0}
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go to the model now; refused calls are counted as short circuits.
+        """
+        now = self.clock()
+        if self.state == self.OPEN and now - self.opened_at >= self.cooldown_seconds:
+            self.state = self.HALF_OPEN
+            self.probe_started_at = None
+        if self.state == self.HALF_OPEN and (self.probe_started_at is None or now - self.probe_started_at >= self.cooldown_seconds):
+            self.probe_started_at = now
+            return True
+        if self.state == self.CLOSED:
+            return True
+        self.counters["short_circuits"] += 1
+        return False
+
+    def record_success(self) -> None:
+        self.counters["successes"] += 1
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            logger.info("LLM circuit breaker closed.")
+        self.state = self.CLOSED
+
+    def record_failure(self, timed_out: bool = False) -> None:
+        self.counters["timeouts" if timed_out else "failures"] += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+            self.counters["trips"] += 1
+            logger.warning(f"LLM circuit breaker opened after {self.consecutive_failures} consecutive failures; retrying in {self.cooldown_seconds}s.")
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = round(max(0.0, self.cooldown_seconds - (self.clock() - self.opened_at)), 2)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "cooldown_seconds": self.cooldown_seconds,
+            "retry_in_seconds": retry_in,
+            **self.counters,
+        }
+
+class AdaptiveTimeout:
+    """
+    Timeout derived from the p95 latency of recent successful calls, clamped to
+    [minimum, maximum]. Uses `default` until LATENCY_MIN_SAMPLES latencies are observed.
+    """
+
+    def __init__(self, default: float = LLM_TIMEOUT_SECONDS, minimum: float = LLM_TIMEOUT_MIN_SECONDS, maximum: float = LLM_TIMEOUT_SECONDS, multiplier: float = LLM_TIMEOUT_P95_MULTIPLIER):
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def observe(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+    def current(self) -> float:
+        if len(self.latencies) < LATENCY_MIN_SAMPLES:
+            return self.default
+        return min(self.maximum, max(self.minimum, self.p95() * self.multiplier))
+
+    def snapshot(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "timeout_seconds": round(self.current(), 3),
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+            "samples": len(self.latencies),
+        }
+
+# Shared by every categorizer: they all talk to the same Ollama server
+llm_breaker = CircuitBreaker()
+# Single-row and batched prompts take very different times, so each adapts on its own
+llm_timeouts = {"single": AdaptiveTimeout(), "batch": AdaptiveTimeout()}
@@ -0,0 +1,100 @@
+import os
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from rapidfuzz import process, fuzz, utils
+
+# Threads used by batch retrieval (-1 = every core)
+FUZZY_WORKERS = int(os.getenv("FUZZY_WORKERS", "-1"))
+# Query rows per cdist call, bounding the score matrix to rows x history
+CDIST_CHUNK_SIZE = 2048
+# Minimum WRatio for a past transaction to count as similar
+SIMILARITY_THRESHOLD = 60
+
+HistoryEntry = Tuple[str, float, str] # (description, amount, category_name)
+
+def normalize(description: str) -> str:
+    """
+    rapidfuzz's default_process (lowercase, no punctuation) with whitespace collapsed.
+    """
+    return " ".join(utils.default_process(description).split())
+
+class HistoryIndex:
+    """
+    Fuzzy retrieval over verified history, built once per history load and
+    grown with extend as new rows are verified.
+    Descriptions are pre-normalized (see normalize) and deduplicated; each
+    distinct description keeps every (amount, category) seen with it.
+    """
+
+    def __init__(self, entries: Sequence[HistoryEntry]):
+        self.entries: List[HistoryEntry] = []
+        self.choices: List[str] = []
+        self.groups: List[List[int]] = []
+        # normalized description -> position in choices/groups
+        self.positions: Dict[str, int] = {}
+        self.extend(entries)
+
+    def extend(self, entries: Sequence[HistoryEntry]) -> None:
+        """
+        Appends entries without rebuilding the index. Lists only grow, and entries are
+        stored before any choice points at them, so a search running in another thread
+        sees either the old or the new state.
+        """
+        for entry in entries:
+            self.entries.append(entry)
+            key = normalize(entry[0])
+            position = self.positions.get(key)
+            if position is None:
+                self.groups.append([len(self.entries) - 1])
+                self.positions[key] = len(self.choices)
+                self.choices.append(key)
+            else:
+                self.groups[position].append(len(self.entries) - 1)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _expand(self, ranked: List[Tuple[int, float]], limit: int) -> List[HistoryEntry]:
+        found = []
+        for choice, _ in ranked:
+            for i in self.groups[choice]:
+                found.append(self.entries[i])
+                if len(found) == limit:
+                    return found
+        return found
+
+    def search(self, description: str, limit: int = 3) -> List[HistoryEntry]:
+        """
+        The `limit` most similar past entries for one description.
+        """
+        if not self.choices or not description:
+            return []
+        matches = process.extract(normalize(description), self.choices, scorer=fuzz.WRatio, processor=None, limit=limit)
+        return self._expand([(index, score) for _, score, index in matches if score > SIMILARITY_THRESHOLD], limit)
+
+    def search_many(self, descriptions: Sequence[str], limit: int = 3, workers: int = FUZZY_WORKERS) -> Dict[str, List[HistoryEntry]]:
+        """
+        Top matches for many descriptions with vectorized rapidfuzz.process.cdist calls
+        (one per CDIST_CHUNK_SIZE distinct descriptions) spread over `workers` threads.
+        Returns description -> entries.
+        """
+        unique = list(dict.fromkeys(d for d in descriptions if d))
+        results: Dict[str, List[HistoryEntry]] = {d: [] for d in unique}
+        if not self.choices or not unique:
+            return results
+
+        k = min(limit, len(self.choices))
+        for start in range(0, len(unique), CDIST_CHUNK_SIZE):
+            chunk = unique[start:start + CDIST_CHUNK_SIZE]
+            scores = process.cdist(
+                [normalize(d) for d in chunk], self.choices,
+                scorer=fuzz.WRatio, processor=None, score_cutoff=SIMILARITY_THRESHOLD,
+                dtype=np.float32, workers=workers
+            )
+            # Top k columns per row, then ordered by score (ties by position, as process.extract)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < len(self.choices) else np.tile(np.arange(k), (len(chunk), 1))
+            for description, row, columns in zip(chunk, scores, top):
+                ranked = sorted(((int(c), float(row[c])) for c in columns if row[c] > SIMILARITY_THRESHOLD), key=lambda m: (-m[1], m[0]))
+                results[description] = self._expand(ranked, limit)
+
+        return results
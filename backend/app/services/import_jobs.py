@@ -0,0 +1,132 @@
+import os
+import asyncio
+import logging
+import tempfile
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.etl.importer import spool_to_disk, import_chunks, IMPORT_CHUNK_SIZE
+from app.etl.ledger import start_import, fail_import
+from app.models.imports import Import, ImportStatus
+
+logger = logging.getLogger(__name__)
+
+# Concurrent background imports per process
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+# Uploads are kept here until their job ends; mount a volume to resume jobs after a restart
+IMPORT_STORAGE_DIR = os.getenv("IMPORT_STORAGE_DIR", os.path.join(tempfile.gettempdir(), "finances-imports"))
+
+class ImportJobRunner:
+    """
+    In-process asyncio worker pool for background imports.
+    Jobs are rows of the imports ledger; the uploaded file is stored on disk until the job
+    ends so queued or interrupted jobs are picked up again on startup.
+    """
+
+    def __init__(self, workers: int = IMPORT_WORKERS, storage_dir: str = IMPORT_STORAGE_DIR):
+        self.workers = workers
+        self.storage_dir = storage_dir
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.tasks: List[asyncio.Task] = []
+        # Live, not yet committed progress of running jobs (job id -> counters)
+        self.progress: Dict[UUID, Dict[str, int]] = {}
+
+    async def start(self) -> None:
+        os.makedirs(self.storage_dir, exist_ok=True)
+        try:
+            await self.resume_pending()
+        except Exception as e:
+            logger.error(f"Could not resume pending import jobs: {e}")
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def enqueue(self, file_obj: Any, filename: str, session: AsyncSession, override_reference_date: Optional[date] = None, chunk_size: int = IMPORT_CHUNK_SIZE) -> Import:
+        """
+        Stores the upload and registers a QUEUED job for it. Returns the ledger record.
+        """
+        os.makedirs(self.storage_dir, exist_ok=True)
+        path, file_hash = await asyncio.to_thread(spool_to_disk, file_obj, self.storage_dir)
+        try:
+            record = await start_import(
+                session, file_hash, filename,
+                status=ImportStatus.QUEUED,
+                storage_path=path,
+                chunk_size=chunk_size,
+                override_reference_date=override_reference_date
+            )
+        except Exception:
+            os.remove(path)
+            raise
+
+        await self.queue.put(record.id)
+        return record
+
+    async def resume_pending(self) -> None:
+        """
+        Re-queues jobs left QUEUED or PROCESSING by a previous process.
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Import.id).where(
+                    Import.storage_path.is_not(None),
+                    Import.status.in_([ImportStatus.QUEUED.value, ImportStatus.PROCESSING.value])
+                ).order_by(Import.created_at)
+            )
+            job_ids = result.scalars().all()
+
+        for job_id in job_ids:
+            await self.queue.put(job_id)
+        if job_ids:
+            logger.info(f"Resuming {len(job_ids)} import job(s).")
+
+    def live_progress(self, job_id: UUID) -> Optional[Dict[str, int]]:
+        return self.progress.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self.run(job_id)
+            except Exception as e:
+                logger.error(f"Import job {job_id} failed: {e}")
+            finally:
+                self.progress.pop(job_id, None)
+                self.queue.task_done()
+
+    async def run(self, job_id: UUID) -> None:
+        async with AsyncSessionLocal() as session:
+            record = await session.get(Import, job_id)
+            if record is None or record.storage_path is None:
+                return
+            path = record.storage_path
+
+            if not os.path.exists(path):
+                await fail_import(session, record, Exception("Uploaded file is no longer available."), record.row_count, record.stats)
+                return
+
+            record.status = ImportStatus.PROCESSING.value
+            record.started_at = record.started_at or datetime.now(timezone.utc)
+            await session.commit()
+
+            # Live counter starts from what is already committed
+            progress = self.progress.setdefault(job_id, {"rows_categorized": record.rows_categorized})
+            try:
+                await import_chunks(session, record, path, record.override_reference_date, record.chunk_size or IMPORT_CHUNK_SIZE, progress)
+            except asyncio.CancelledError:
+                # Shutdown: keep the stored upload, the job resumes from its last chunk on startup
+                raise
+            except Exception:
+                os.remove(path)
+                raise
+            os.remove(path)
+
+import_jobs = ImportJobRunner()
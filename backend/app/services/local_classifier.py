@@ -0,0 +1,209 @@
+import os
+import zlib
+import logging
+import tempfile
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+import numpy as np
+from app.services.categorization_cache import normalize_description
+
+logger = logging.getLogger(__name__)
+
+# Where the trained classifier is kept between restarts
+LOCAL_CLASSIFIER_PATH = os.getenv("LOCAL_CLASSIFIER_PATH", os.path.join(tempfile.gettempdir(), "finances-local-classifier.npz"))
+# Predictions at least this confident skip the model; below it they are only a fallback
+LOCAL_CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_CONFIDENCE_THRESHOLD", "0.8"))
+# Hashed feature space of the character n-grams
+NGRAM_FEATURES = 2 ** 20
+NGRAM_SIZES = (2, 3, 4)
+# Nearest verified descriptions voting on a category
+NEIGHBORS = 5
+# Descriptions whose prediction is memoized until the next training
+PREDICTION_MEMO_SIZE = 50000
+
+def char_ngrams(description: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hashed character n-grams of the normalized description: (sorted feature ids, counts).
+    crc32 rather than hash() so ids are stable across processes and the saved model stays valid.
+    """
+    text = f" {normalize_description(description)} "
+    counts = Counter(
+        zlib.crc32(text[i:i + n].encode()) % NGRAM_FEATURES
+        for n in NGRAM_SIZES for i in range(len(text) - n + 1)
+    )
+    features = np.array(sorted(counts), dtype=np.int32)
+    return features, np.array([counts[f] for f in features], dtype=np.float32)
+
+class LocalClassifier:
+    """
+    Offline categorizer over verified history: TF-IDF weighted character n-grams and a
+    cosine kNN vote, in NumPy. Only the raw term counts are stored (CSR arrays), so adding
+    examples never re-tokenizes the history; IDF weights and the inverted index are
+    recomputed from them in a few vectorized passes.
+    """
+
+    def __init__(self, path: Optional[str] = None, neighbors: int = NEIGHBORS):
+        self.path = path
+        self.neighbors = neighbors
+        self.loaded = False
+        # Replaced as a whole, so predictions running in other threads see a consistent model
+        self.model: Optional[Dict[str, Any]] = None
+        self.memo: Dict[str, Tuple[Optional[str], float]] = {}
+
+    def __len__(self) -> int:
+        return 0 if self.model is None else len(self.model["labels"])
+
+    def fit(self, entries: Iterable[Tuple[str, float, str]]) -> None:
+        """
+        Trains from scratch on (description, amount, category) entries.
+        """
+        self._build(None, entries)
+
+    def partial_fit(self, entries: Iterable[Tuple[str, float, str]]) -> int:
+        """
+        Adds entries not seen yet to the current model. Returns how many were added.
+        """
+        before = len(self)
+        self._build(self.model, entries)
+        return len(self) - before
+
+    def sync(self, entries: Iterable[Tuple[str, float, str]]) -> bool:
+        """
+        Brings the model in line with the full verified history: loads the saved model first,
+        retrains from scratch if it holds examples the history no longer has (recategorized
+        rows), otherwise only adds the new ones. Returns whether the model changed.
+        """
+        if not self.loaded:
+            self.load()
+        entries = list(entries)
+        if self.model is not None:
+            wanted = {(normalize_description(d), c) for d, _, c in entries if d}
+            names = self.model["label_names"]
+            stored = set(zip(self.model["descriptions"].tolist(), names[self.model["labels"]].tolist()))
+            if stored <= wanted:
+                return self.partial_fit(entries) > 0
+        self.fit(entries)
+        return True
+
+    def _build(self, base: Optional[Dict[str, Any]], entries: Iterable[Tuple[str, float, str]]) -> None:
+        if base is None:
+            descriptions, label_names, labels = np.array([], dtype=str), [], []
+            indptr, indices, tf = np.zeros(1, dtype=np.int64), np.array([], dtype=np.int32), np.array([], dtype=np.float32)
+        else:
+            descriptions, label_names, labels = base["descriptions"], base["label_names"].tolist(), base["labels"].tolist()
+            indptr, indices, tf = base["indptr"], base["indices"], base["tf"]
+        seen = set(zip(descriptions.tolist(), [label_names[l] for l in labels]))
+        label_ids = {name: i for i, name in enumerate(label_names)}
+
+        new_descriptions, new_indices, new_tf, lengths = [], [], [], []
+        for description, _, category in entries:
+            key = (normalize_description(description or ""), category)
+            if not key[0] or key in seen:
+                continue
+            seen.add(key)
+            features, counts = char_ngrams(description)
+            new_descriptions.append(key[0])
+            labels.append(label_ids.setdefault(category, len(label_ids)))
+            new_indices.append(features)
+            new_tf.append(counts)
+            lengths.append(len(features))
+
+        if not new_descriptions and base is not None:
+            return
+        if new_descriptions:
+            descriptions = np.concatenate([descriptions, np.array(new_descriptions)])
+            indptr = np.concatenate([indptr, indptr[-1] + np.cumsum(lengths)])
+            indices = np.concatenate([indices] + new_indices)
+            tf = np.concatenate([tf] + new_tf)
+
+        self._index(descriptions, np.array(labels, dtype=np.int32), np.array(list(label_ids), dtype=str), indptr, indices, tf)
+
+    def _index(self, descriptions: np.ndarray, labels: np.ndarray, label_names: np.ndarray, indptr: np.ndarray, indices: np.ndarray, tf: np.ndarray) -> None:
+        n = len(labels)
+        rows = np.repeat(np.arange(n), np.diff(indptr))
+        # Each feature appears once per row, so bincount is the document frequency
+        df = np.bincount(indices, minlength=NGRAM_FEATURES)
+        idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        weights = tf * idf[indices]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n))
+        weights = (weights / norms[rows]).astype(np.float32)
+
+        # Inverted index: postings sorted by feature
+        order = np.argsort(indices, kind="stable")
+        self.model = {
+            "descriptions": descriptions, "labels": labels, "label_names": label_names,
+            "indptr": indptr, "indices": indices, "tf": tf,
+            "idf": idf, "post_features": indices[order], "post_docs": rows[order], "post_weights": weights[order],
+        }
+        self.memo = {}
+
+    def predict(self, description: str) -> Tuple[Optional[str], float]:
+        """
+        (category, confidence) by a similarity-weighted vote of the nearest verified descriptions.
+        Confidence is the winner's share of the vote times its best similarity, so an exact
+        merchant match scores near 1 and a vague resemblance stays low. (None, 0.0) without a match.
+        """
+        model = self.model
+        if model is None or not len(model["labels"]) or not description:
+            return None, 0.0
+        if description in self.memo:
+            return self.memo[description]
+
+        features, counts = char_ngrams(description)
+        weights = counts * model["idf"][features]
+        weights /= np.linalg.norm(weights) or 1.0
+
+        left = np.searchsorted(model["post_features"], features, side="left")
+        lengths = np.searchsorted(model["post_features"], features, side="right") - left
+        total = int(lengths.sum())
+        result: Tuple[Optional[str], float] = (None, 0.0)
+        if total:
+            # Positions of every posting of the query's features, without a Python loop
+            starts = np.repeat(left - (np.cumsum(lengths) - lengths), lengths)
+            positions = np.arange(total) + starts
+            scores = np.bincount(
+                model["post_docs"][positions],
+                weights=model["post_weights"][positions] * np.repeat(weights, lengths),
+                minlength=len(model["labels"])
+            )
+            k = min(self.neighbors, len(scores))
+            nearest = np.argpartition(-scores, k - 1)[:k]
+            nearest = nearest[scores[nearest] > 0]
+            if len(nearest):
+                votes = np.bincount(model["labels"][nearest], weights=scores[nearest])
+                winner = int(np.argmax(votes))
+                best = float(scores[nearest][model["labels"][nearest] == winner].max())
+                result = (str(model["label_names"][winner]), round(min(1.0, float(votes[winner] / votes.sum()) * best), 4))
+
+        if len(self.memo) > PREDICTION_MEMO_SIZE:
+            self.memo = {}
+        self.memo[description] = result
+        return result
+
+    def save(self) -> None:
+        if self.path is None or self.model is None:
+            return
+        m = self.model
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f, descriptions=m["descriptions"], labels=m["labels"], label_names=m["label_names"],
+                indptr=m["indptr"], indices=m["indices"], tf=m["tf"]
+            )
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> None:
+        """
+        Restores the saved model, if any (a missing or unreadable file leaves it untrained).
+        """
+        self.loaded = True
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                self._index(data["descriptions"], data["labels"], data["label_names"], data["indptr"], data["indices"], data["tf"])
+            logger.info(f"Local classifier loaded with {len(self)} examples.")
+        except Exception as e:
+            logger.error(f"Could not load the local classifier from {self.path}: {e}")
+
+local_classifier = LocalClassifier(LOCAL_CLASSIFIER_PATH)
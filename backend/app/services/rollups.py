@@ -0,0 +1,76 @@
+"""
+Monthly rollup maintenance.
+
+    python -m app.services.rollups rebuild
+
+The rollup and the per-source balances ledger are kept current by triggers on `transactions`;
+rebuilding is only needed for repair, e.g. after a category was renamed or the triggers were
+disabled for a bulk load.
+"""
+import asyncio
+import argparse
+from typing import List, Optional
+from sqlalchemy import select, delete, insert, func, literal_column, text, Date, cast
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.rollup import MonthlyRollup, SourceBalance
+from app.models.transaction import Transaction, Category
+
+def rollup_aggregate():
+    """
+    The rollup computed straight from `transactions`, in MonthlyRollup's column order.
+    """
+    month = cast(func.date_trunc(literal_column("'month'"), Transaction.reference_date), Date)
+    category_name = func.coalesce(Category.name, Transaction.category_legacy, literal_column("'Uncategorized'"))
+    return select(
+        month, Transaction.source_type, category_name, Transaction.type,
+        func.sum(Transaction.amount), func.count(Transaction.id)
+    ).outerjoin(
+        Category, Transaction.category_id == Category.id
+    ).group_by(month, Transaction.source_type, category_name, Transaction.type)
+
+def ledger_aggregate():
+    """
+    The balances ledger computed straight from `transactions`: monthly net per source and
+    its running sum, in SourceBalance's column order.
+    """
+    month = cast(func.date_trunc(literal_column("'month'"), Transaction.reference_date), Date)
+    net = func.sum(Transaction.amount)
+    return select(
+        Transaction.source_type, month, net, func.count(Transaction.id),
+        func.sum(net).over(partition_by=Transaction.source_type, order_by=month)
+    ).group_by(Transaction.source_type, month)
+
+async def rebuild_monthly_rollups(session: AsyncSession) -> int:
+    """
+    Recomputes the whole rollup and the balances ledger in one transaction. Writes to `transactions` wait for it
+    (SHARE lock), so no change can slip between the aggregate and the swap.
+    Returns the number of rollup rows.
+    """
+    await session.execute(text("LOCK TABLE transactions IN SHARE MODE"))
+    await session.execute(delete(MonthlyRollup))
+    await session.execute(insert(MonthlyRollup).from_select(
+        ["month", "source_type", "category_name", "type", "total", "count"], rollup_aggregate()
+    ))
+    await session.execute(delete(SourceBalance))
+    await session.execute(insert(SourceBalance).from_select(
+        ["source_type", "month", "net", "count", "closing"], ledger_aggregate()
+    ))
+    count = (await session.execute(select(func.count()).select_from(MonthlyRollup))).scalar()
+    await session.commit()
+    return count
+
+async def _rebuild() -> None:
+    from app.core.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as session:
+        count = await rebuild_monthly_rollups(session)
+    print(f"Monthly rollup rebuilt: {count} rows.")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Maintain the monthly transaction rollup.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+    asyncio.run(_rebuild())
+
+if __name__ == "__main__":
+    main()
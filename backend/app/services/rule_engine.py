@@ -0,0 +1,110 @@
+import logging
+from collections import deque
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.categorization import CategorizationRule
+from app.services.categorization_cache import normalize_description
+
+logger = logging.getLogger(__name__)
+
+class TokenMatcher:
+    """
+    Aho-Corasick automaton over word tokens: finds every pattern (a token sequence)
+    occurring in a tokenized description in one pass, whatever the number of patterns.
+    """
+
+    def __init__(self, patterns: Sequence[Tuple[str, ...]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[int]] = [[]]
+
+        for index, tokens in enumerate(patterns):
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                if token not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                    self.goto[state][token] = len(self.goto) - 1
+                state = self.goto[state][token]
+            self.outputs[state].append(index)
+
+        # Breadth-first failure links; depth-one states fail to the root
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def find(self, tokens: Sequence[str]) -> List[int]:
+        """
+        Returns the indexes of the patterns found in `tokens`.
+        """
+        found = []
+        state = 0
+        for token in tokens:
+            while state and token not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(token, 0)
+            found.extend(self.outputs[state])
+        return found
+
+class RuleEngine:
+    """
+    Compiled categorization rules: a token matcher over the rule patterns plus
+    per-rule amount bounds. Rows no rule matches are left to the model.
+    """
+
+    def __init__(self, rules: Sequence[CategorizationRule]):
+        self.rules = [
+            (
+                rule.category_name,
+                Decimal(rule.min_amount) if rule.min_amount is not None else None,
+                Decimal(rule.max_amount) if rule.max_amount is not None else None,
+                rule.priority or 0,
+                len(normalize_description(rule.pattern).split()),
+            )
+            for rule in rules
+        ]
+        self.matcher = TokenMatcher([tuple(normalize_description(rule.pattern).split()) for rule in rules])
+
+    def classify(self, description: str, amount: float) -> Optional[str]:
+        """
+        Category of the best matching rule (highest priority, then longest pattern), or None.
+        """
+        if not self.rules or not description:
+            return None
+
+        value = Decimal(str(amount))
+        best = None
+        for index in self.matcher.find(normalize_description(description).split()):
+            category, min_amount, max_amount, priority, length = self.rules[index]
+            if min_amount is not None and value < min_amount:
+                continue
+            if max_amount is not None and value > max_amount:
+                continue
+            if best is None or (priority, length) > best[0]:
+                best = ((priority, length), category)
+
+        return best[1] if best else None
+
+async def load_rule_engine(session: AsyncSession) -> RuleEngine:
+    """
+    Compiles the active rules from the database (an empty engine if they cannot be loaded).
+    """
+    try:
+        result = await session.execute(select(CategorizationRule).where(CategorizationRule.is_active == True))
+        rules = result.scalars().all()
+    except Exception as e:
+        logger.error(f"Failed to load categorization rules: {e}")
+        rules = []
+    return RuleEngine(rules)
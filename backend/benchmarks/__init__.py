@@ -0,0 +1,4 @@
+"""
+Reproducible benchmarks for the import pipeline.
+Run from the backend directory, e.g. `python -m benchmarks.etl_benchmark --rows 1000`.
+"""
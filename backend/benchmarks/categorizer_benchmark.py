@@ -0,0 +1,288 @@
+"""
+Measures categorization throughput, latency and accuracy over a labeled set of verified
+transactions and writes a JSON report.
+
+    python -m benchmarks.categorizer_benchmark --rows 5000 --mode batch --llm-latency-ms 200
+
+The labeled set is synthetic (benchmarks.generator.labeled_transactions) unless --dataset
+(CSV with description,amount,category) or --database-url (verified rows of a Postgres) is
+given. Part of it becomes the categorizer's history (few-shot retrieval and the local
+classifier), the rest is categorized and compared with its label.
+
+The model is a deterministic fake (--model fake: keyword answers, --llm-error-rate wrong
+answers, --llm-latency-ms per call) or replays answers recorded from a real Ollama
+(--model ollama --record answers.json, then --model replay --replay answers.json).
+"""
+import os
+import sys
+import csv
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import platform
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+
+sys.path.append(os.getcwd())
+
+from app.models.transaction import CategoryEnum
+from app.services.categorizer import AICategorizer, CATEGORIZER_BATCH_SIZE
+from app.services.categorization_cache import CategorizationCache, cache_key
+from app.services.categorization_executor import CategorizationExecutor, CATEGORIZER_CONCURRENCY
+from app.services.circuit_breaker import CircuitBreaker, AdaptiveTimeout
+from app.services.history_index import HistoryIndex
+from app.services.local_classifier import LocalClassifier
+from benchmarks.generator import labeled_transactions
+from benchmarks.standins import answer_prompt, fake_chat_model, stub_answer
+
+Labeled = Tuple[str, float, str] # (description, amount, category)
+
+def prompt_key(prompt_value: Any) -> str:
+    """
+    Identifies a rendered prompt (every message) for recording and replay.
+    """
+    text = "\n".join(f"{m.type}: {m.content}" for m in prompt_value.to_messages())
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def noisy_answer(error_rate: float):
+    """
+    Keyword answers, deliberately wrong for a deterministic `error_rate` share of descriptions.
+    """
+    categories = [c.value for c in CategoryEnum if c != CategoryEnum.UNCATEGORIZED]
+
+    def answer(description: str) -> str:
+        digest = int(hashlib.md5(description.encode()).hexdigest(), 16)
+        if (digest % 10000) / 10000 < error_rate:
+            return categories[digest % len(categories)]
+        return stub_answer(description)
+    return answer
+
+def replay_model(responses: Dict[str, str], counters: Dict[str, int], latency_ms: float) -> RunnableLambda:
+    def respond(prompt_value: Any) -> str:
+        key = prompt_key(prompt_value)
+        if key in responses:
+            return responses[key]
+        counters["replay_misses"] += 1
+        return CategoryEnum.UNCATEGORIZED.value
+    return fake_chat_model(respond, latency_ms)
+
+def recording_model(llm: Any, responses: Dict[str, str]) -> RunnableLambda:
+    model = llm | StrOutputParser()
+
+    async def respond(prompt_value: Any) -> str:
+        result = await model.ainvoke(prompt_value)
+        responses[prompt_key(prompt_value)] = result
+        return result
+    return RunnableLambda(lambda _: "", afunc=respond)
+
+class TimedBatches:
+    """
+    Categorizer proxy for CategorizationExecutor that records how long each batch took.
+    Items carry their row index as a third element, so each latency is recorded against
+    the rows of its own batch whatever order the batches complete in.
+    """
+
+    def __init__(self, categorizer: AICategorizer):
+        self.categorizer = categorizer
+        self.latencies: List[Tuple[List[int], float]] = []
+
+    async def predict_batch(self, items: List[Tuple[str, float, int]]) -> List[str]:
+        start = time.perf_counter()
+        names = await self.categorizer.predict_batch([(description, amount) for description, amount, _ in items])
+        self.latencies.append(([i for _, _, i in items], time.perf_counter() - start))
+        return names
+
+def load_csv(path: str) -> List[Labeled]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["description"], float(row["amount"]), row["category"]) for row in csv.DictReader(f)]
+
+async def load_verified(database_url: str) -> List[Labeled]:
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.models.transaction import Transaction, Category
+
+    engine = create_async_engine(database_url)
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            select(Transaction.description, Transaction.amount, Category.name)
+            .join(Category, Transaction.category_id == Category.id)
+            .where(Transaction.is_verified == True, Transaction.description.is_not(None))
+        )
+        rows = [(d, float(a), c) for d, a, c in result.all()]
+    await engine.dispose()
+    return rows
+
+def build_categorizer(history: List[Labeled], model: Any, use_local: bool, use_cache: bool) -> AICategorizer:
+    categorizer = AICategorizer(
+        cache=CategorizationCache(), local=LocalClassifier(),
+        breaker=CircuitBreaker(), timeouts={"single": AdaptiveTimeout(), "batch": AdaptiveTimeout()}
+    )
+    categorizer.chain = categorizer.prompt | model
+    categorizer.batch_chain = categorizer.batch_prompt | model
+
+    categorizer.history_cache = list(history)
+    categorizer.history_index = HistoryIndex(history)
+    categorizer.history_loaded = True
+    if use_local:
+        categorizer.local.fit(history)
+    if use_cache:
+        # As if every history row had been verified through the API
+        for description, amount, category in history:
+            categorizer.cache.put(cache_key(description, amount), category)
+    return categorizer
+
+async def evaluate(categorizer: AICategorizer, rows: List[Labeled], mode: str, batch_size: int, concurrency: int) -> Dict[str, Any]:
+    """
+    Categorizes `rows` the way imports do (mode 'batch': classify_fast, one retrieval pass,
+    concurrent batched prompts) or one row at a time (mode 'single': predict_category).
+    """
+    predicted: List[Optional[str]] = [None] * len(rows)
+    paths = ["llm"] * len(rows)
+    latencies = [0.0] * len(rows)
+
+    start = time.perf_counter()
+    for i, (description, amount, _) in enumerate(rows):
+        t = time.perf_counter()
+        category, path = categorizer.classify_fast(description, amount)
+        latencies[i] = time.perf_counter() - t
+        if category:
+            predicted[i], paths[i] = category, path
+
+    pending = [i for i, category in enumerate(predicted) if not category]
+    if mode == "single":
+        for i in pending:
+            t = time.perf_counter()
+            predicted[i] = await categorizer.predict_category(rows[i][0], rows[i][1])
+            latencies[i] += time.perf_counter() - t
+    else:
+        await categorizer.prefetch_examples([rows[i][0] for i in pending])
+        timed = TimedBatches(categorizer)
+        executor = CategorizationExecutor(timed, batch_size, slots=asyncio.Semaphore(concurrency))
+        names = await executor.run([(rows[i][0], rows[i][1], i) for i in pending])
+        for indices, elapsed in timed.latencies:
+            for i in indices:
+                latencies[i] += elapsed
+        for i, name in zip(pending, names):
+            if name is None:
+                paths[i] = "timeout"
+                name = categorizer.fallback_category(rows[i][0])
+            predicted[i] = name
+    elapsed = time.perf_counter() - start
+
+    correct = [p == label for p, (_, _, label) in zip(predicted, rows)]
+    by_path: Dict[str, Dict[str, Any]] = {}
+    for path, ok in zip(paths, correct):
+        entry = by_path.setdefault(path, {"rows": 0, "correct": 0})
+        entry["rows"] += 1
+        entry["correct"] += ok
+    for entry in by_path.values():
+        entry["accuracy"] = round(entry.pop("correct") / entry["rows"], 4)
+
+    latency_ms = np.array(latencies) * 1000
+    return {
+        "rows": len(rows),
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "rows_per_second": round(len(rows) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": round(float(np.percentile(latency_ms, 50)), 3) if len(rows) else None,
+            "p99": round(float(np.percentile(latency_ms, 99)), 3) if len(rows) else None,
+        },
+        "llm_calls": categorizer.llm_calls,
+        "accuracy": round(sum(correct) / len(rows), 4) if rows else None,
+        "by_path": by_path,
+    }
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.dataset:
+        labeled, source = load_csv(args.dataset), args.dataset
+    elif args.database_url:
+        labeled, source = await load_verified(args.database_url), "database"
+    else:
+        labeled, source = labeled_transactions(args.rows, args.seed), "synthetic"
+
+    rng = random.Random(args.seed)
+    labeled = list(labeled)
+    rng.shuffle(labeled)
+    split = int(len(labeled) * args.history_ratio)
+    history, test = labeled[:split], labeled[split:]
+
+    counters = {"replay_misses": 0}
+    responses: Dict[str, str] = {}
+    if args.model == "replay":
+        with open(args.replay) as f:
+            responses = json.load(f)
+        model = replay_model(responses, counters, args.llm_latency_ms)
+    elif args.model == "ollama":
+        model = recording_model(AICategorizer(local=LocalClassifier()).llm, responses)
+    else:
+        model = fake_chat_model(lambda prompt_value: answer_prompt(prompt_value, noisy_answer(args.llm_error_rate)), args.llm_latency_ms)
+
+    categorizer = build_categorizer(history, model, not args.no_local, args.cache)
+    result = await evaluate(categorizer, test, args.mode, args.batch_size, args.concurrency)
+
+    if args.model == "ollama" and args.record:
+        with open(args.record, "w") as f:
+            json.dump(responses, f, indent=2, ensure_ascii=False)
+    if args.model == "replay":
+        result["replay_misses"] = counters["replay_misses"]
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            "dataset": source,
+            "history_rows": len(history),
+            "mode": args.mode,
+            "batch_size": args.batch_size,
+            "concurrency": args.concurrency,
+            "model": args.model,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_error_rate": args.llm_error_rate,
+            "local_classifier": not args.no_local,
+            "cache": args.cache,
+            "seed": args.seed,
+        },
+        "result": result,
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark and evaluate the transaction categorizer.")
+    parser.add_argument("--rows", type=int, default=2000, help="Size of the synthetic labeled set")
+    parser.add_argument("--dataset", help="CSV with description,amount,category columns")
+    parser.add_argument("--database-url", help="Postgres (postgresql+asyncpg://...) whose verified transactions are the labeled set")
+    parser.add_argument("--history-ratio", type=float, default=0.5, help="Share of the labeled set used as the categorizer's history")
+    parser.add_argument("--mode", choices=["batch", "single"], default="batch")
+    parser.add_argument("--batch-size", type=int, default=CATEGORIZER_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=CATEGORIZER_CONCURRENCY)
+    parser.add_argument("--model", choices=["fake", "replay", "ollama"], default="fake")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated model latency per call (fake and replay)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of descriptions the fake model gets wrong")
+    parser.add_argument("--replay", help="Recorded answers for --model replay")
+    parser.add_argument("--record", help="Where --model ollama saves its answers for later replay")
+    parser.add_argument("--no-local", action="store_true", help="Leave the local classifier untrained")
+    parser.add_argument("--cache", action="store_true", help="Seed the merchant cache with the history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="categorizer-benchmark.json")
+    args = parser.parse_args(argv)
+    if args.model == "replay" and not args.replay:
+        parser.error("--model replay needs --replay")
+
+    report = asyncio.run(run_benchmark(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(json.dumps(report["result"], indent=2, ensure_ascii=False))
+    print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
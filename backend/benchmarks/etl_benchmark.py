@@ -0,0 +1,142 @@
+"""
+Times each stage of the import pipeline over synthetic XP statements and writes a JSON report.
+
+    python -m benchmarks.etl_benchmark --rows 1000 100000 1000000 --output etl-report.json
+
+By default the database is an in-process stand-in (benchmarks.standins.MemorySession) and
+the model is stubbed, so neither Postgres nor Ollama is needed. Pass --database-url with a
+disposable Postgres to include real COPY/ON CONFLICT costs; its tables are dropped and
+recreated.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+import polars as pl
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.getcwd())
+
+from app.models import Base, Import
+from app.etl import importer
+from app.etl.ledger import hash_bytes
+from app.services.categorizer_service import categorizer_service
+from benchmarks.generator import generate_statement, FORMATS
+from benchmarks.standins import StubCategorizer, MemorySession, memory_bulk_insert
+
+DEFAULT_ROWS = [1000, 100000, 1000000]
+STAGES = ["read", "parse", "hash", "categorize", "persist", "total"]
+
+async def run_once(session: Any, path: str, source_format: str, rows: int, duplicates: int, chunk_size: Optional[int]) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        file_hash = hash_bytes(f.read())
+
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        if chunk_size:
+            saved, _ = await importer.stream_transactions_from_file(f, os.path.basename(path), session, chunk_size=chunk_size)
+        else:
+            transactions, _ = await importer.import_transactions_from_file(f, os.path.basename(path), session)
+            saved = len(transactions)
+    elapsed = time.perf_counter() - start
+
+    if isinstance(session, MemorySession):
+        record = next(r for r in reversed(session.added) if isinstance(r, Import) and r.file_hash == file_hash)
+    else:
+        record = (await session.execute(select(Import).where(Import.file_hash == file_hash))).scalar_one()
+    stats = record.stats or {}
+
+    return {
+        "format": source_format,
+        "rows": rows,
+        "duplicate_lines": duplicates,
+        "file_bytes": os.path.getsize(path),
+        "rows_saved": saved,
+        "chunk_size": chunk_size,
+        "stages_ms": {stage: stats.get(f"{stage}_ms") for stage in STAGES},
+        "categorization": {key: stats.get(key) for key in ("cache_hits", "rule_hits", "local_hits", "llm_rows", "llm_timeouts", "cache_hit_rate")},
+        "wall_ms": round(elapsed * 1000, 2),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+    }
+
+async def run_benchmark(rows_list: List[int], formats: List[str], database_url: Optional[str], chunk_size: Optional[int], llm_latency_ms: float, seed: int, workdir: str) -> Dict[str, Any]:
+    runs = []
+    engine = None
+    if database_url:
+        engine = create_async_engine(database_url)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    StubCategorizer.latency_ms = llm_latency_ms
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(categorizer_service, "factory", StubCategorizer))
+        categorizer_service.reset()
+        if not database_url:
+            stack.enter_context(patch.object(importer, "bulk_insert_transactions", memory_bulk_insert))
+
+        for source_format in formats:
+            for rows in rows_list:
+                path = os.path.join(workdir, f"{source_format.lower()}_{rows}.csv")
+                duplicates = generate_statement(path, source_format, rows, seed)
+                print(f"{source_format} {rows} rows...")
+
+                if database_url:
+                    async with session_factory() as session:
+                        runs.append(await run_once(session, path, source_format, rows, duplicates, chunk_size))
+                else:
+                    runs.append(await run_once(MemorySession(), path, source_format, rows, duplicates, chunk_size))
+                os.remove(path)
+
+    if engine is not None:
+        await engine.dispose()
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "polars": pl.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            "database": "postgres" if database_url else "memory",
+            "chunk_size": chunk_size,
+            "llm_latency_ms": llm_latency_ms,
+            "seed": seed,
+        },
+        "runs": runs,
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the statement import pipeline.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=list(FORMATS))
+    parser.add_argument("--database-url", help="Disposable Postgres (postgresql+asyncpg://...); its tables are recreated")
+    parser.add_argument("--chunk-size", type=int, help="Use the streaming importer with this chunk size")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated model latency per call")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="etl-benchmark.json")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = asyncio.run(run_benchmark(args.rows, args.formats, args.database_url, args.chunk_size, args.llm_latency_ms, args.seed, workdir))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
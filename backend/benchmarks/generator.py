@@ -0,0 +1,120 @@
+import random
+from datetime import date, timedelta
+from typing import List, Tuple
+
+# Merchant names roughly following what the XP statements show
+CARD_MERCHANTS = [
+    "IFOOD *RESTAURANTE", "UBER *TRIP", "PADARIA SAO JORGE", "CARREFOUR HIPER", "PAO DE ACUCAR",
+    "NETFLIX.COM", "SPOTIFY", "POSTO SHELL", "DROGASIL", "AMAZON MARKETPLACE", "MERCADOLIVRE*LOJA",
+    "OUTBACK STEAKHOUSE", "ZE DELIVERY", "SMART FIT", "LOJAS RENNER", "ATACADAO", "RAPPI*RAPPI",
+]
+ACCOUNT_DESCRIPTIONS = [
+    "PIX ENVIADO FULANO DE TAL", "PIX RECEBIDO CICLANO", "TED RECEBIDA FOLHA PAGAMENTO",
+    "PAGAMENTO DE FATURA", "BOLETO CONDOMINIO", "TARIFA BANCARIA", "RENDIMENTO CDB",
+    "DEBITO AUTOMATICO ENEL", "COMPRA CARTAO DEBITO MERCADO",
+]
+CARDHOLDERS = ["JOAO SILVA", "MARIA SILVA"]
+
+# Ground truth of the categorizer benchmark: the category a user would verify for each description
+MERCHANT_CATEGORIES = {
+    "IFOOD *RESTAURANTE": "Delivery", "UBER *TRIP": "Transporte", "PADARIA SAO JORGE": "Restaurante",
+    "CARREFOUR HIPER": "Mercado", "PAO DE ACUCAR": "Mercado", "NETFLIX.COM": "Streaming", "SPOTIFY": "Streaming",
+    "POSTO SHELL": "Transporte", "DROGASIL": "Saúde", "AMAZON MARKETPLACE": "Compras", "MERCADOLIVRE*LOJA": "Compras",
+    "OUTBACK STEAKHOUSE": "Restaurante", "ZE DELIVERY": "Delivery", "SMART FIT": "Saúde", "LOJAS RENNER": "Compras",
+    "ATACADAO": "Mercado", "RAPPI*RAPPI": "Delivery",
+    "PIX ENVIADO FULANO DE TAL": "Serviços Diversos", "PIX RECEBIDO CICLANO": "Receita",
+    "TED RECEBIDA FOLHA PAGAMENTO": "Salário", "BOLETO CONDOMINIO": "Moradia", "TARIFA BANCARIA": "Serviços Financeiros",
+    "RENDIMENTO CDB": "Investimentos", "DEBITO AUTOMATICO ENEL": "Moradia", "COMPRA CARTAO DEBITO MERCADO": "Mercado",
+}
+# Suffixes statements append to the same merchant (branch, city, order code)
+MERCHANT_SUFFIXES = ["", "", " SP", " RJ", " BH", " 0{n}", " LJ {n}", " *{n}"]
+
+# Share of lines that repeat an earlier line verbatim (legitimate same-day repeats)
+DUPLICATE_RATIO = 0.02
+
+def format_brl(value: float) -> str:
+    """
+    Formats a value the way the XP exports do: 'R$ 1.234,56' / '-R$ 1.234,56'.
+    """
+    sign = "-" if value < 0 else ""
+    integer, cents = f"{abs(value):.2f}".split(".")
+    integer = f"{int(integer):,}".replace(",", ".")
+    return f"{sign}R$ {integer},{cents}"
+
+def format_timestamp(rng: random.Random, day: date) -> str:
+    """
+    Mixes the date layouts found in real exports: with ' às ' time, 2-digit years and plain dates.
+    """
+    choice = rng.random()
+    if choice < 0.5:
+        return f"{day:%d/%m/%y} às {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+    if choice < 0.8:
+        return f"{day:%d/%m/%Y}"
+    return f"{day.day}/{day.month}/{day:%Y} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+
+def card_line(rng: random.Random, day: date) -> str:
+    if rng.random() < 0.01:
+        return f"{format_timestamp(rng, day)};Pagamento de Fatura;{rng.choice(CARDHOLDERS)};{format_brl(-rng.uniform(1000, 8000))};-"
+
+    amount = round(rng.lognormvariate(4, 1), 2)
+    if rng.random() < 0.15:
+        total = rng.choice([2, 3, 6, 10, 12])
+        installment = f"{rng.randint(1, total)} de {total}"
+    else:
+        installment = "-"
+    return f"{format_timestamp(rng, day)};{rng.choice(CARD_MERCHANTS)} ;{rng.choice(CARDHOLDERS)};{format_brl(amount)};{installment}"
+
+def account_line(rng: random.Random, day: date) -> str:
+    description = rng.choice(ACCOUNT_DESCRIPTIONS)
+    amount = round(rng.lognormvariate(5, 1.2), 2)
+    if "RECEBID" in description or "RENDIMENTO" in description:
+        value = amount
+    else:
+        value = -amount
+    return f"{format_timestamp(rng, day)};{description};{format_brl(value)};{format_brl(rng.uniform(0, 50000))}"
+
+FORMATS = {
+    "XP_CARD": ("Data;Estabelecimento;Portador;Valor;Parcela", card_line),
+    "XP_ACCOUNT": ("Data;Descrição;Valor;Saldo", account_line),
+}
+
+def generate_statement(path: str, source_format: str, rows: int, seed: int = 42, start: date = date(2024, 1, 1), duplicate_ratio: float = DUPLICATE_RATIO) -> int:
+    """
+    Writes a synthetic XP statement CSV with `rows` data lines to `path`.
+    Output is deterministic for a given seed so reports are comparable between versions.
+    Returns the number of duplicated lines written.
+    """
+    header, make_line = FORMATS[source_format]
+    rng = random.Random(seed)
+    recent: List[str] = []
+    duplicates = 0
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header + "\n")
+        for i in range(rows):
+            if recent and rng.random() < duplicate_ratio:
+                line = rng.choice(recent)
+                duplicates += 1
+            else:
+                # Roughly 40 lines per day
+                line = make_line(rng, start + timedelta(days=i // 40))
+                recent = (recent + [line])[-50:]
+            f.write(line + "\n")
+
+    return duplicates
+
+def labeled_transactions(rows: int, seed: int = 42) -> List[Tuple[str, float, str]]:
+    """
+    Synthetic verified history for the categorizer benchmark: (description, amount, category)
+    with the merchant names above, varied by suffixes so exact-match caching is not enough.
+    """
+    rng = random.Random(seed)
+    merchants = list(MERCHANT_CATEGORIES)
+    entries = []
+    for _ in range(rows):
+        merchant = rng.choice(merchants)
+        suffix = rng.choice(MERCHANT_SUFFIXES).format(n=rng.randint(1, 999))
+        category = MERCHANT_CATEGORIES[merchant]
+        amount = round(rng.lognormvariate(4, 1), 2)
+        entries.append((merchant + suffix, amount if category in ("Receita", "Salário", "Investimentos") else -amount, category))
+    return entries
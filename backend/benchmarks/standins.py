@@ -0,0 +1,123 @@
+import json
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Set
+from langchain_core.runnables import RunnableLambda
+from app.models.transaction import CategoryEnum
+from app.services.categorizer import AICategorizer
+from app.services.local_classifier import LocalClassifier
+
+# Keyword -> category answers of the stub model, checked in order
+STUB_ANSWERS = [
+    ("IFOOD", CategoryEnum.DELIVERY), ("RAPPI", CategoryEnum.DELIVERY), ("ZE DELIVERY", CategoryEnum.DELIVERY),
+    ("CARREFOUR", CategoryEnum.GROCERIES), ("PAO DE ACUCAR", CategoryEnum.GROCERIES), ("ATACADAO", CategoryEnum.GROCERIES),
+    ("PADARIA", CategoryEnum.RESTAURANT), ("OUTBACK", CategoryEnum.RESTAURANT),
+    ("UBER", CategoryEnum.TRANSPORT), ("POSTO", CategoryEnum.TRANSPORT),
+    ("NETFLIX", CategoryEnum.STREAMING), ("SPOTIFY", CategoryEnum.STREAMING),
+    ("DROGASIL", CategoryEnum.HEALTH), ("SMART FIT", CategoryEnum.HEALTH),
+    ("FOLHA", CategoryEnum.SALARY), ("RENDIMENTO", CategoryEnum.INVESTMENTS),
+]
+
+def stub_answer(description: str) -> str:
+    for keyword, category in STUB_ANSWERS:
+        if keyword in description.upper():
+            return category.value
+    return CategoryEnum.UNCATEGORIZED.value
+
+def answer_prompt(prompt_value: Any, answer: Callable[[str], str] = stub_answer) -> str:
+    """
+    Answers a rendered single or batched categorizer prompt with `answer(description)` per transaction.
+    """
+    user_message = prompt_value.to_messages()[-1].content
+    if user_message.startswith("Transactions:"):
+        # Batched prompt: one numbered line per transaction
+        return json.dumps([answer(line.split("|")[0]) for line in user_message.splitlines()[1:]])
+    return answer(user_message.split("|")[0])
+
+def fake_chat_model(respond: Callable[[Any], str] = answer_prompt, latency_ms: float = 0.0) -> RunnableLambda:
+    """
+    Runnable standing in for ChatOllama (plus its output parser): returns respond(prompt_value)
+    after sleeping `latency_ms`.
+    """
+    latency = latency_ms / 1000
+
+    async def invoke(prompt_value: Any) -> str:
+        if latency:
+            await asyncio.sleep(latency)
+        return respond(prompt_value)
+
+    return RunnableLambda(lambda _: "", afunc=invoke)
+
+class StubCategorizer(AICategorizer):
+    """
+    AICategorizer whose model is replaced by a keyword lookup (answering single and
+    batched prompts), optionally sleeping `latency_ms` per call to mimic the model's
+    response time. Prompt building and history matching still run, so their cost shows
+    up in the categorize stage.
+    """
+    latency_ms: float = 0.0
+
+    def __init__(self, *args, **kwargs):
+        # Never touches the classifier saved by the app
+        kwargs.setdefault("local", LocalClassifier())
+        super().__init__(*args, **kwargs)
+        model = fake_chat_model(latency_ms=self.latency_ms)
+        self.chain = self.prompt | model
+        self.batch_chain = self.batch_prompt | model
+
+class MemoryResult:
+    def scalar(self) -> Any:
+        return None
+
+    def scalar_one_or_none(self) -> Any:
+        return None
+
+    def scalars(self) -> "MemoryResult":
+        return self
+
+    def all(self) -> List[Any]:
+        return []
+
+class MemorySession:
+    """
+    In-process stand-in for an AsyncSession over an empty database.
+    Queries return no rows; inserts go through memory_bulk_insert, which keeps the
+    unique_hash constraint. Objects added to the session are kept in `added`.
+    """
+
+    def __init__(self):
+        self.bind = SimpleNamespace(dialect=SimpleNamespace(driver="memory"))
+        self.added: List[Any] = []
+        self.hashes: Set[str] = set()
+
+    async def execute(self, stmt: Any, *args, **kwargs) -> MemoryResult:
+        return MemoryResult()
+
+    def add(self, instance: Any) -> None:
+        self.added.append(instance)
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+    def begin_nested(self) -> "MemorySession":
+        return self
+
+    async def __aenter__(self) -> "MemorySession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    async def refresh(self, instance: Any) -> None:
+        pass
+
+async def memory_bulk_insert(session: MemorySession, transactions: List[Dict[str, Any]]) -> Set[str]:
+    """
+    bulk_insert_transactions for a MemorySession: skips hashes already stored.
+    """
+    inserted = {tx['unique_hash'] for tx in transactions} - session.hashes
+    session.hashes.update(inserted)
+    return inserted
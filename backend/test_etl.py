@@ -1,28 +1,21 @@
 import sys
 import os
-import asyncio
 # Add current directory to path so we can import app
 sys.path.append(os.getcwd())
 
-from app.etl.importer import process_csv
-import json
-from decimal import Decimal
-from datetime import date
-import uuid
+from app.etl.importer import parse_upload
 
-# Helper to serialize for printing
-def default_serializer(obj):
-    if isinstance(obj, (Decimal, date)):
-        return str(obj)
-    if isinstance(obj, uuid.UUID):
-        return str(obj)
-    raise TypeError(f"Type {type(obj)} not serializable")
+def main(path: str = "test_data.csv"):
+    """
+    Parses a statement CSV without touching the database or the model and prints its rows.
+    For timings use `python -m benchmarks.etl_benchmark`.
+    """
+    with open(path, "rb") as f:
+        source_format, frame = parse_upload(f.read())
 
-async def main():
-    transactions = await process_csv("test_data.csv")
-    print(f"Found {len(transactions)} detailed records.")
-    for t in transactions:
-        print(f"{t['date']} | {t['type']} | {t['amount']} | {t['category_legacy']}")
+    print(f"Found {frame.height} detailed records ({source_format}).")
+    for t in frame.iter_rows(named=True):
+        print(f"{t['date']} | {t['type']} | {t['amount']} | {t['description']}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main(*sys.argv[1:])
@@ -0,0 +1,77 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import select, func
+
+from app.models.rollup import SourceBalance
+from app.models.transaction import Transaction, TransactionType
+from app.services.balances import balances_at
+from app.services.rollups import ledger_aggregate
+
+async def ledger_rows(session):
+    await session.flush()
+    return set(map(tuple, (await session.execute(select(
+        SourceBalance.source_type, SourceBalance.month, SourceBalance.net, SourceBalance.count, SourceBalance.closing
+    ))).all()))
+
+async def assert_ledger_matches(session) -> None:
+    """
+    The trigger-maintained source_balances equals the ledger computed from transactions.
+    """
+    stored = await ledger_rows(session)
+    expected = set(map(tuple, (await session.execute(ledger_aggregate())).all()))
+    assert stored == expected
+
+def make_transaction(reference_date: date, amount: str, source_type: str) -> Transaction:
+    return Transaction(
+        date=reference_date, reference_date=reference_date, description="LEDGER TEST",
+        amount=Decimal(amount), type=TransactionType.EXPENSE if Decimal(amount) < 0 else TransactionType.INCOME,
+        source_type=source_type
+    )
+
+@pytest.mark.asyncio
+async def test_ledger_follows_writes(db_session):
+    # INSERT across months and sources
+    salary = make_transaction(date(2031, 1, 5), "8000.00", "XP_ACCOUNT")
+    rent = make_transaction(date(2031, 2, 8), "-2500.00", "XP_ACCOUNT")
+    card = make_transaction(date(2031, 2, 20), "-300.00", "XP_CARD")
+    lonely = make_transaction(date(2040, 6, 1), "-1.00", "MANUAL")
+    db_session.add_all([salary, rent, card, lonely])
+    await assert_ledger_matches(db_session)
+
+    # UPDATE that moves a row to another month and changes its amount: later closings move too
+    rent.reference_date = date(2031, 3, 8)
+    rent.amount = Decimal("-2600.00")
+    await assert_ledger_matches(db_session)
+
+    # UPDATE that leaves amount, date and source alone: the trigger returns early
+    before = await ledger_rows(db_session)
+    card.category_legacy = "Delivery"
+    card.is_verified = True
+    assert await ledger_rows(db_session) == before
+
+    # DELETE: the month's only row goes, and so does its ledger row
+    await db_session.delete(lonely)
+    await assert_ledger_matches(db_session)
+    assert (await db_session.execute(
+        select(SourceBalance).where(SourceBalance.source_type == "MANUAL", SourceBalance.month == date(2040, 6, 1))
+    )).scalars().all() == []
+
+@pytest.mark.asyncio
+async def test_balance_mid_month_matches_a_direct_sum(db_session):
+    db_session.add_all([
+        make_transaction(date(2031, 1, 5), "8000.00", "XP_ACCOUNT"),
+        make_transaction(date(2031, 2, 8), "-2500.00", "XP_ACCOUNT"),
+        make_transaction(date(2031, 2, 12), "-100.00", "XP_ACCOUNT"),
+        make_transaction(date(2031, 2, 9), "-300.00", "XP_CARD"),
+    ])
+    await db_session.flush()
+
+    on = date(2031, 2, 10)
+    direct = dict((await db_session.execute(
+        select(Transaction.source_type, func.sum(Transaction.amount)).where(Transaction.reference_date <= on).group_by(Transaction.source_type)
+    )).all())
+
+    balances = await balances_at(db_session, on)
+
+    assert balances == pytest.approx({source: float(total) for source, total in direct.items()})
@@ -0,0 +1,72 @@
+import uuid
+import pytest
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import select, delete
+
+from app.etl.bulk_writer import bulk_insert_transactions
+from app.models.rollup import MonthlyRollup
+from app.models.transaction import Transaction, Category, TransactionType
+from app.services.rollups import rollup_aggregate
+
+async def assert_rollup_matches(session) -> None:
+    """
+    The trigger-maintained monthly_rollups equals the rollup computed from transactions.
+    """
+    await session.flush()
+    stored = (await session.execute(select(
+        MonthlyRollup.month, MonthlyRollup.source_type, MonthlyRollup.category_name,
+        MonthlyRollup.type, MonthlyRollup.total, MonthlyRollup.count
+    ))).all()
+    expected = (await session.execute(rollup_aggregate())).all()
+    assert set(map(tuple, stored)) == set(map(tuple, expected))
+    assert len(stored) == len(expected)
+
+def make_transaction(reference_date: date, amount: str, source_type: str = "XP_ACCOUNT", **fields) -> Transaction:
+    return Transaction(
+        date=reference_date, reference_date=reference_date, description=fields.pop("description", "ROLLUP TEST"),
+        amount=Decimal(amount), type=TransactionType.EXPENSE if Decimal(amount) < 0 else TransactionType.INCOME,
+        source_type=source_type, **fields
+    )
+
+@pytest.mark.asyncio
+async def test_rollup_follows_every_write_path(db_session):
+    category = Category(name=f"Rollup Test {uuid.uuid4().hex[:8]}", type=TransactionType.EXPENSE)
+    db_session.add(category)
+
+    # INSERT
+    groceries = make_transaction(date(2031, 1, 10), "-120.50", category_legacy="Mercado")
+    salary = make_transaction(date(2031, 1, 5), "8000.00", category_legacy="Salário")
+    card = make_transaction(date(2031, 2, 3), "-45.90", source_type="XP_CARD")
+    db_session.add_all([groceries, salary, card])
+    await assert_rollup_matches(db_session)
+
+    # COPY merge of an import (a second run inserts nothing)
+    hashes = [f"rollup-test-{uuid.uuid4().hex}" for _ in range(3)]
+    rows = [
+        {"date": date(2031, 2, day), "reference_date": date(2031, 2, day), "description": f"IMPORT {day}",
+         "amount": Decimal("-10.00") * day, "type": TransactionType.EXPENSE, "source_type": "XP_CARD", "unique_hash": h}
+        for day, h in zip((1, 2, 3), hashes)
+    ]
+    assert len(await bulk_insert_transactions(db_session, rows)) == 3
+    assert await bulk_insert_transactions(db_session, rows) == set()
+    await assert_rollup_matches(db_session)
+
+    # PATCH category: the row moves from its legacy name to the category's
+    groceries.category_id = category.id
+    groceries.is_verified = True
+    await assert_rollup_matches(db_session)
+
+    # UPDATE that moves the reference month (and the amount)
+    card.reference_date = date(2031, 3, 1)
+    card.amount = Decimal("-50.00")
+    await assert_rollup_matches(db_session)
+
+    # DELETE, through the ORM and as a bulk statement; emptied groups disappear
+    await db_session.delete(salary)
+    await db_session.execute(delete(Transaction).where(Transaction.unique_hash.in_(hashes)))
+    await assert_rollup_matches(db_session)
+    remaining = (await db_session.execute(
+        select(MonthlyRollup).where(MonthlyRollup.month == date(2031, 1, 1), MonthlyRollup.category_name == "Salário")
+    )).scalars().all()
+    assert remaining == []
@@ -0,0 +1,77 @@
+import uuid
+import pytest
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Set
+from unittest.mock import patch
+from app.etl import importer, ledger
+from app.models.imports import Import
+
+class MemoryResult:
+    def scalar(self) -> Any:
+        return None
+
+    def scalar_one_or_none(self) -> Any:
+        return None
+
+    def scalars(self) -> "MemoryResult":
+        return self
+
+    def all(self) -> List[Any]:
+        return []
+
+class MemorySession:
+    """
+    In-process stand-in for an AsyncSession over an empty database.
+    Queries return no rows; transaction inserts go through bulk_insert, which keeps the
+    unique_hash constraint, and added Import records are kept in the ledger (`imports`).
+    """
+
+    def __init__(self):
+        self.bind = SimpleNamespace(dialect=SimpleNamespace(driver="memory"))
+        self.added: List[Any] = []
+        self.hashes: Set[str] = set()
+        self.imports: Dict[str, Import] = {}
+
+    async def execute(self, stmt: Any, *args, **kwargs) -> MemoryResult:
+        return MemoryResult()
+
+    def add(self, instance: Any) -> None:
+        if isinstance(instance, Import):
+            instance.id = instance.id or uuid.uuid4()
+            self.imports[instance.file_hash] = instance
+        self.added.append(instance)
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+    def begin_nested(self) -> "MemorySession":
+        return self
+
+    async def __aenter__(self) -> "MemorySession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    async def refresh(self, instance: Any) -> None:
+        pass
+
+    async def find_import(self, session: "MemorySession", file_hash: str) -> Optional[Import]:
+        return self.imports.get(file_hash)
+
+    async def bulk_insert(self, session: "MemorySession", transactions: List[Dict[str, Any]]) -> Set[str]:
+        inserted = {tx["unique_hash"] for tx in transactions} - self.hashes
+        self.hashes.update(inserted)
+        return inserted
+
+@pytest.fixture
+def memory_session():
+    """
+    A MemorySession standing in for the database of the import ledger and the transaction writes.
+    """
+    session = MemorySession()
+    with patch.object(ledger, "find_import", session.find_import), patch.object(importer, "bulk_insert_transactions", session.bulk_insert):
+        yield session
@@ -0,0 +1,35 @@
+from datetime import date
+from sqlalchemy.dialects import postgresql
+from app.services.balances import balances_at_query, closing_series, health_totals, month_starts
+
+def compile_sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+def test_balance_at_month_end_is_a_ledger_lookup():
+    sql = compile_sql(balances_at_query(date(2026, 2, 28)))
+
+    assert "DISTINCT ON (source_balances.source_type)" in sql
+    assert "source_balances.month < '2026-03-01'" in sql
+    assert "transactions" not in sql
+
+def test_balance_mid_month_adds_the_partial_month():
+    sql = compile_sql(balances_at_query(date(2026, 2, 10)))
+
+    assert "source_balances.month < '2026-02-01'" in sql
+    assert "transactions.reference_date >= '2026-02-01' AND transactions.reference_date <= '2026-02-10'" in sql
+
+def test_closing_series_carries_balances_forward():
+    months = month_starts(date(2025, 11, 20), date(2026, 2, 1))
+    rows = [
+        ("XP_ACCOUNT", date(2025, 10, 1), 1000),
+        ("XP_CARD", date(2025, 12, 1), -300),
+        ("XP_ACCOUNT", date(2026, 1, 1), 1500),
+    ]
+
+    series = closing_series(rows, months)
+
+    assert months == [date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1)]
+    assert series[0] == {"XP_ACCOUNT": 1000.0}
+    assert series[1] == {"XP_ACCOUNT": 1000.0, "XP_CARD": -300.0}
+    assert series[3] == {"XP_ACCOUNT": 1500.0, "XP_CARD": -300.0}
+    assert health_totals(series[3]) == (1500.0, -300.0)
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import pytest
+from langchain_core.runnables import RunnableLambda
+from app.services.categorizer import AICategorizer, parse_category_array
+from app.services.categorization_cache import CategorizationCache, cache_key
+from app.services.local_classifier import LocalClassifier
+from app.services.circuit_breaker import CircuitBreaker
+
+def test_parse_category_array():
+    assert parse_category_array('Sure: ["Mercado", "Delivery"]', 2) == ["Mercado", "Delivery"]
+    assert parse_category_array('["Mercado"]', 2) is None
+    assert parse_category_array('["Mercado", ', 2) is None
+    assert parse_category_array('Mercado', 1) is None
+
+@pytest.mark.asyncio
+async def test_predict_batch_splits_malformed_answers():
+    categorizer = AICategorizer(cache=CategorizationCache(), local=LocalClassifier())
+    batch_sizes = []
+
+    async def model(prompt_value):
+        lines = prompt_value.to_messages()[-1].content.splitlines()
+        if lines[0] == "Transactions:":
+            batch_sizes.append(len(lines) - 1)
+            # Answers batches of up to two, garbles bigger ones
+            return json.dumps(["Mercado"] * (len(lines) - 1)) if len(lines) <= 3 else "Mercado, Mercado"
+        return "Delivery"
+
+    stub = RunnableLambda(lambda _: "", afunc=model)
+    categorizer.chain = categorizer.prompt | stub
+    categorizer.batch_chain = categorizer.batch_prompt | stub
+
+    result = await categorizer.predict_categories([(f"LOJA {i}", -10.0) for i in range(5)], batch_size=5)
+
+    # 5 -> 2 + 3 -> 2 + (1 + 2); the single item goes through the one-row prompt
+    assert result == ["Mercado", "Mercado", "Delivery", "Mercado", "Mercado"]
+    assert batch_sizes == [5, 2, 3, 2]
+    assert categorizer.llm_calls == 5
+
+@pytest.mark.asyncio
+async def test_predict_batch_falls_back_without_splitting_on_timeouts():
+    categorizer = AICategorizer(cache=CategorizationCache(), local=LocalClassifier(), breaker=CircuitBreaker())
+    categorizer.local.fit([("LOJA 0", -10.0, "Mercado")])
+
+    async def model(prompt_value):
+        raise TimeoutError("model call exceeded 10.0s")
+
+    stub = RunnableLambda(lambda _: "", afunc=model)
+    categorizer.chain = categorizer.prompt | stub
+    categorizer.batch_chain = categorizer.batch_prompt | stub
+
+    result = await categorizer.predict_batch([(f"LOJA {i}", -10.0) for i in range(4)])
+
+    assert len(result) == 4
+    assert result == [categorizer.fallback_category(f"LOJA {i}") for i in range(4)]
+    assert categorizer.llm_calls == 1
+
+@pytest.mark.asyncio
+async def test_predict_batch_splits_prompts_too_long_for_the_context():
+    categorizer = AICategorizer(cache=CategorizationCache(), local=LocalClassifier(), breaker=CircuitBreaker())
+
+    async def model(prompt_value):
+        lines = prompt_value.to_messages()[-1].content.splitlines()
+        if lines[0] == "Transactions:":
+            if len(lines) > 3:
+                raise ValueError("input length exceeds the context length")
+            return json.dumps(["Mercado"] * (len(lines) - 1))
+        return "Delivery"
+
+    stub = RunnableLambda(lambda _: "", afunc=model)
+    categorizer.chain = categorizer.prompt | stub
+    categorizer.batch_chain = categorizer.batch_prompt | stub
+
+    result = await categorizer.predict_batch([(f"LOJA {i}", -10.0) for i in range(4)])
+
+    assert result == ["Mercado"] * 4
+    assert categorizer.llm_calls == 3
+
+@pytest.mark.asyncio
+async def test_predict_categories_counts_only_its_own_work():
+    categorizer = AICategorizer(cache=CategorizationCache(), local=LocalClassifier())
+    categorizer.cache.put(cache_key("NETFLIX.COM", -39.9), "Streaming")
+
+    async def model(prompt_value):
+        await asyncio.sleep(0)
+        lines = prompt_value.to_messages()[-1].content.splitlines()
+        return json.dumps(["Mercado"] * (len(lines) - 1))
+
+    stub = RunnableLambda(lambda _: "", afunc=model)
+    categorizer.chain = categorizer.prompt | stub
+    categorizer.batch_chain = categorizer.batch_prompt | stub
+
+    first, second = {}, {}
+    await asyncio.gather(
+        categorizer.predict_categories([("NETFLIX.COM", -39.9)] + [(f"LOJA {i}", -10.0) for i in range(4)], batch_size=2, stats=first),
+        categorizer.predict_categories([(f"MERCADO {i}", -10.0) for i in range(6)], batch_size=2, stats=second),
+    )
+
+    assert first == {"cache": 1, "llm": 4, "llm_calls": 2}
+    assert second == {"llm": 6, "llm_calls": 3}
+    assert categorizer.llm_calls == 5
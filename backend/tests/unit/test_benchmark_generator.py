@@ -0,0 +1,16 @@
+import pytest
+from benchmarks.generator import generate_statement
+from app.etl.importer import parse_upload
+
+@pytest.mark.parametrize("source_format", ["XP_CARD", "XP_ACCOUNT"])
+def test_generated_statements_parse_completely(tmp_path, source_format):
+    path = tmp_path / "statement.csv"
+    duplicates = generate_statement(str(path), source_format, 2000, duplicate_ratio=0.05)
+
+    detected, frame = parse_upload(path.read_bytes())
+
+    assert detected == source_format
+    # Every generated line has a valid date and amount
+    assert frame.height == 2000
+    assert duplicates > 0
+    assert frame["unique_hash"].n_unique() == 2000
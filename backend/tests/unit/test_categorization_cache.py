@@ -0,0 +1,120 @@
+import pytest
+from sqlalchemy.orm import Session
+from app.services.categorization_cache import CategorizationCache, normalize_description, amount_bucket, cache_key, categorization_stats
+
+def test_normalize_description_folds_case_accents_and_digits():
+    assert normalize_description("IFOOD *Restaurante 123") == "ifood restaurante"
+    assert normalize_description("Pão de Açúcar") == "pao de acucar"
+
+def test_amount_bucket_separates_magnitudes_and_sign():
+    assert amount_bucket(200.0) != amount_bucket(8000.0)
+    assert amount_bucket(7900.0) == amount_bucket(8000.0)
+    assert amount_bucket(-50.0) != amount_bucket(50.0)
+
+def test_cache_lookup_and_lru_eviction():
+    cache = CategorizationCache(max_entries=1)
+    cache.put(cache_key("NETFLIX.COM", -39.9), "Streaming")
+
+    assert cache.get("netflix com", -39.9) == "Streaming"
+    assert cache.get("netflix com", 39.9) is None
+
+    cache.put(cache_key("SPOTIFY", -21.9), "Streaming")
+    assert cache.get("NETFLIX.COM", -39.9) is None
+
+def test_categorization_stats():
+    assert categorization_stats(3, 4, 1) == {"cache_hits": 3, "rule_hits": 4, "local_hits": 0, "llm_rows": 1, "llm_timeouts": 0, "llm_calls_saved": 7, "cache_hit_rate": 0.375}
+
+class FailingSession:
+    """
+    A session whose cache lookup fails; records whether it ran inside a savepoint.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def begin_nested(self):
+        return self
+
+    async def __aenter__(self):
+        self.events.append("savepoint")
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.events.append("rollback to savepoint" if exc_type else "release savepoint")
+
+    async def execute(self, stmt):
+        raise RuntimeError("relation does not exist")
+
+@pytest.mark.asyncio
+async def test_failed_lookup_only_rolls_back_its_savepoint():
+    cache = CategorizationCache()
+    session = FailingSession()
+
+    await cache.warm(session, [("NETFLIX.COM", -39.9)])
+
+    assert session.events == ["savepoint", "rollback to savepoint"]
+    assert cache.get("NETFLIX.COM", -39.9) is None
+
+class RecordingSession:
+    """
+    Async session stand-in whose info is a real Session's, so its commit and rollback fire the cache's listeners.
+    """
+
+    def __init__(self):
+        self.sync_session = Session()
+        self.info = self.sync_session.info
+
+    async def execute(self, stmt):
+        return None
+
+@pytest.mark.asyncio
+async def test_verified_category_reaches_memory_only_after_commit():
+    cache = CategorizationCache()
+    session = RecordingSession()
+
+    await cache.record_verified(session, "NETFLIX.COM", -39.9, "Streaming")
+    assert cache.get("NETFLIX.COM", -39.9) is None
+    session.sync_session.begin()
+    session.sync_session.rollback()
+    session.sync_session.commit()
+    assert cache.get("NETFLIX.COM", -39.9) is None
+
+    await cache.record_verified(session, "NETFLIX.COM", -39.9, "Streaming")
+    session.sync_session.commit()
+    assert cache.get("NETFLIX.COM", -39.9) == "Streaming"
+
+class EmptyTableSession:
+    def __init__(self):
+        self.lookups = 0
+
+    def begin_nested(self):
+        return self
+
+    async def __aenter__(self):
+        pass
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    async def execute(self, stmt):
+        self.lookups += 1
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return []
+
+@pytest.mark.asyncio
+async def test_missing_keys_are_looked_up_again_after_the_ttl():
+    now = [0.0]
+    cache = CategorizationCache(miss_ttl_seconds=60, clock=lambda: now[0])
+    session = EmptyTableSession()
+
+    await cache.warm(session, [("NETFLIX.COM", -39.9)])
+    await cache.warm(session, [("NETFLIX.COM", -39.9)])
+    assert session.lookups == 1
+
+    now[0] = 61
+    await cache.warm(session, [("NETFLIX.COM", -39.9)])
+    assert session.lookups == 2
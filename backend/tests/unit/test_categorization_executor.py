@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from app.services.categorization_executor import CategorizationExecutor, CATEGORIZER_CONCURRENCY
+
+class SlowCategorizer:
+    """
+    Answers each description with itself, sleeping the amount in seconds.
+    """
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def predict_batch(self, items):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(max(amount for _, amount in items))
+            return [description for description, _ in items]
+        finally:
+            self.in_flight -= 1
+
+@pytest.mark.asyncio
+async def test_executor_keeps_input_order_and_bounds_concurrency():
+    categorizer = SlowCategorizer()
+    executor = CategorizationExecutor(categorizer, batch_size=2, slots=asyncio.Semaphore(2))
+    done = []
+
+    items = [("a", 0.03), ("b", 0.0), ("c", 0.0), ("d", 0.01), ("e", 0.0)]
+    result = await executor.run(items, done.append)
+
+    assert result == ["a", "b", "c", "d", "e"]
+    assert categorizer.max_in_flight == 2
+    assert sorted(done) == [1, 2, 2]
+
+@pytest.mark.asyncio
+async def test_executor_deadline_leaves_slow_batches_empty():
+    executor = CategorizationExecutor(SlowCategorizer(), batch_size=1, deadline_seconds=0.05, slots=asyncio.Semaphore(4))
+
+    result = await executor.run([("fast", 0.0), ("stuck", 10.0), ("also fast", 0.01)])
+
+    assert result == ["fast", None, "also fast"]
+
+def test_default_slots_work_on_every_event_loop():
+    items = [(str(i), 0.001) for i in range(CATEGORIZER_CONCURRENCY * 3)]
+
+    async def run():
+        return await CategorizationExecutor(SlowCategorizer(), batch_size=1).run(items)
+
+    # The shared slots used to bind to the first loop, failing every later one
+    for _ in range(2):
+        assert asyncio.run(run()) == [description for description, _ in items]
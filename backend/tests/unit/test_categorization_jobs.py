@@ -0,0 +1,102 @@
+import uuid
+import pytest
+from types import SimpleNamespace
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from app.models.categorization import CategorizationJob, CategorizationJobStatus
+from app.models.transaction import Transaction
+from app.services import categorization_jobs as jobs_module
+from app.services.categorization_jobs import CategorizationJobRunner
+
+UNCAT = SimpleNamespace(id=uuid.uuid4(), name="Não Categorizado")
+MERCADO = SimpleNamespace(id=uuid.uuid4(), name="Mercado")
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar_one_or_none(self):
+        return self.rows[0]
+
+    def scalar(self):
+        return self.rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+class FakeSession:
+    """
+    Serves the backlog in keyset order from the job's checkpoint, reading it off the statement.
+    """
+
+    def __init__(self, transactions, job):
+        self.transactions = sorted(transactions, key=lambda tx: tx.id)
+        self.job = job
+        self.commits = []
+
+    async def execute(self, stmt):
+        sql = str(stmt)
+        if "count(" in sql:
+            return FakeResult(len(self.transactions))
+        if "FROM categories" in sql:
+            return FakeResult([UNCAT] if "WHERE" in sql else [UNCAT, MERCADO])
+        after = [tx for tx in self.transactions if self.job.last_transaction_id is None or tx.id > self.job.last_transaction_id]
+        return FakeResult(after[:self.job.chunk_size])
+
+    async def commit(self):
+        self.commits.append((self.job.status, self.job.last_transaction_id))
+
+class FakeCategorizer:
+    def __init__(self, runner, job, cancel_after):
+        self.runner, self.job, self.cancel_after, self.calls = runner, job, cancel_after, 0
+
+        async def warm(session, items):
+            pass
+        self.cache = SimpleNamespace(warm=warm)
+
+    async def predict_categories(self, items):
+        self.calls += 1
+        if self.calls == self.cancel_after:
+            self.runner.cancelled.add(self.job.id)
+        return ["Mercado"] * len(items)
+
+@pytest.mark.asyncio
+async def test_job_commits_checkpoint_per_chunk_and_stops_on_cancel(monkeypatch):
+    transactions = [SimpleNamespace(id=uuid.uuid4(), description=f"LOJA {i}", amount=-10, category_id=None, is_verified=False) for i in range(5)]
+    job = CategorizationJob(id=uuid.uuid4(), status=CategorizationJobStatus.QUEUED.value, chunk_size=2, force=False, rows_processed=0, rows_updated=0, chunks_committed=0)
+    session = FakeSession(transactions, job)
+    runner = CategorizationJobRunner()
+    categorizer = FakeCategorizer(runner, job, cancel_after=2)
+
+    async def get(session):
+        return categorizer
+    monkeypatch.setattr(jobs_module.categorizer_service, "get", get)
+
+    await runner.process(session, job)
+
+    ordered = sorted(transactions, key=lambda tx: tx.id)
+    # Two chunks committed with their checkpoints, then cancelled before the third
+    assert [checkpoint for _, checkpoint in session.commits[1:3]] == [ordered[1].id, ordered[3].id]
+    assert (job.status, job.rows_total, job.rows_processed, job.rows_updated) == (CategorizationJobStatus.CANCELLED.value, 5, 4, 4)
+    assert ordered[4].category_id is None and ordered[0].category_id == MERCADO.id
+
+def backlog_sql(**kwargs) -> str:
+    stmt = jobs_module.backlog_filter(select(Transaction.id), UNCAT.id, **kwargs)
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})).split("WHERE", 1)[1]
+
+def test_backlog_filter_keeps_the_auto_categorize_semantics():
+    # Month mode: uncategorized rows of the month, verified or not
+    month = backlog_sql(month=3, year=2026)
+    assert "reference_date >= '2026-03-01'" in month and "category_id IS NULL" in month
+    assert "is_verified" not in month
+
+    # Month mode with force: every unverified row of the month
+    forced = backlog_sql(month=3, year=2026, force=True)
+    assert "is_verified = false" in forced and "category_id" not in forced
+
+    # Standard mode: uncategorized unverified rows
+    standard = backlog_sql()
+    assert "is_verified = false" in standard and "category_id IS NULL" in standard
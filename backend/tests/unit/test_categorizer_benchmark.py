@@ -0,0 +1,34 @@
+import json
+import asyncio
+import pytest
+from benchmarks.categorizer_benchmark import main, TimedBatches
+from app.services.categorization_executor import CategorizationExecutor
+
+def test_benchmark_reports_accuracy_and_llm_calls(tmp_path):
+    output = tmp_path / "report.json"
+    main(["--rows", "200", "--no-local", "--batch-size", "10", "--output", str(output)])
+
+    result = json.loads(output.read_text())["result"]
+    assert result["rows"] == 100
+    assert result["llm_calls"] >= 10
+    assert 0 < result["accuracy"] <= 1
+    assert set(result["by_path"]) == {"llm"}
+    assert result["latency_ms"]["p99"] >= result["latency_ms"]["p50"]
+
+class SlowFirstBatch:
+    """
+    Answers each description upper-cased; the batch starting with "a" takes 50ms, the others none.
+    """
+    async def predict_batch(self, items):
+        await asyncio.sleep(0.05 if items[0][0] == "a" else 0)
+        return [description.upper() for description, _ in items]
+
+@pytest.mark.asyncio
+async def test_batch_latencies_follow_their_rows_when_batches_finish_out_of_order():
+    timed = TimedBatches(SlowFirstBatch())
+    executor = CategorizationExecutor(timed, 2, slots=asyncio.Semaphore(2))
+    names = await executor.run([("a", 1.0, 0), ("b", 1.0, 1), ("c", 1.0, 2), ("d", 1.0, 3)])
+    latencies = {tuple(indices): elapsed for indices, elapsed in timed.latencies}
+
+    assert names == ["A", "B", "C", "D"]
+    assert latencies[(0, 1)] >= 0.05 > latencies[(2, 3)]
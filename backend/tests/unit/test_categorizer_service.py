@@ -0,0 +1,62 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.services.categorizer import AICategorizer, HISTORY_LOOKBACK_SECONDS
+from app.services.categorizer_service import CategorizerService
+from app.services.categorization_cache import CategorizationCache
+from app.services.local_classifier import LocalClassifier
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar(self):
+        return self.rows
+
+    def all(self):
+        return self.rows
+
+    def scalars(self):
+        return self
+
+class FakeSession:
+    """
+    Answers the categorizer's queries in order: watermark, full history, then refreshes.
+    """
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.statements = []
+        self.params = []
+
+    async def execute(self, stmt):
+        self.statements.append(str(stmt))
+        self.params.append(stmt.compile().params)
+        # Rule loads always find no rules
+        if "categorization_rules" in self.statements[-1]:
+            return FakeResult([])
+        return FakeResult(self.answers.pop(0))
+
+@pytest.mark.asyncio
+async def test_shared_categorizer_refreshes_from_watermark():
+    t1 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    t2 = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    session = FakeSession(
+        t1, [("IFOOD *RESTAURANTE", -45.0, "Delivery")],
+        # Refresh: the row at the watermark again, plus one verified later
+        [("IFOOD *RESTAURANTE", -45.0, "Delivery", t1), ("NETFLIX.COM", -39.9, "Streaming", t2)],
+    )
+    service = CategorizerService(factory=lambda: AICategorizer(cache=CategorizationCache(), local=LocalClassifier()))
+
+    first = await service.get(session)
+    second = await service.get(session)
+
+    assert first is second
+    assert first.history_cache == [("IFOOD *RESTAURANTE", -45.0, "Delivery"), ("NETFLIX.COM", -39.9, "Streaming")]
+    assert len(first.history_index) == 2
+    assert first.history_watermark == t2
+    assert len(first.local) == 2
+    assert "verified_at >=" in session.statements[-1]
+    # Rows committed after a later-stamped one was read are still in the window
+    assert t1 - timedelta(seconds=HISTORY_LOOKBACK_SECONDS) in session.params[-1].values()
+    # Rules compiled once until invalidated
+    assert sum("categorization_rules" in s for s in session.statements) == 1
@@ -0,0 +1,103 @@
+import json
+import pytest
+from langchain_core.runnables import RunnableLambda
+from app.services.categorizer import AICategorizer
+from app.services.categorization_cache import CategorizationCache
+from app.services.circuit_breaker import CircuitBreaker, AdaptiveTimeout, LATENCY_MIN_SAMPLES
+from app.services.local_classifier import LocalClassifier
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_breaker_opens_and_probes_after_cooldown():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=30, clock=clock)
+
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.now = 31
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # One probe at a time
+    assert not breaker.allow()
+    breaker.record_failure(timed_out=True)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 62
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    snapshot = breaker.snapshot()
+    assert (snapshot["trips"], snapshot["timeouts"], snapshot["short_circuits"]) == (2, 1, 2)
+
+def test_adaptive_timeout_follows_p95():
+    timeout = AdaptiveTimeout(default=10, minimum=1, maximum=10, multiplier=2)
+    assert timeout.current() == 10
+
+    for i in range(LATENCY_MIN_SAMPLES):
+        timeout.observe(0.5 if i else 3.0)
+    assert timeout.current() == 1.0
+    timeout.observe(4.0)
+    timeout.observe(4.0)
+    assert timeout.current() == 8.0
+
+@pytest.mark.asyncio
+async def test_open_breaker_skips_the_model():
+    calls = []
+
+    async def model(prompt_value):
+        calls.append(1)
+        raise ConnectionError("ollama down")
+
+    local = LocalClassifier()
+    local.fit([("NETFLIX.COM", -39.9, "Streaming")])
+    categorizer = AICategorizer(cache=CategorizationCache(), local=local, breaker=CircuitBreaker(failure_threshold=2), timeouts={"single": AdaptiveTimeout(), "batch": AdaptiveTimeout()})
+    categorizer.local_threshold = 1.1 # Never skip the model
+    stub = RunnableLambda(lambda _: "", afunc=model)
+    categorizer.chain = categorizer.prompt | stub
+    categorizer.batch_chain = categorizer.batch_prompt | stub
+
+    items = [("NETFLIX", -39.9)] + [(f"LOJA {i}", -10.0) for i in range(9)]
+    result = await categorizer.predict_categories(items, batch_size=5)
+
+    # Both batches fail (without splitting) and open the breaker; their rows get the local guess
+    assert len(calls) == 2
+    assert result[0] == "Streaming"
+    assert categorizer.breaker.state == CircuitBreaker.OPEN
+
+    await categorizer.predict_categories(items, batch_size=5)
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_context_overflow_does_not_open_the_breaker():
+    calls = []
+
+    async def model(prompt_value):
+        rows = prompt_value.to_string().count(" | Amount: ")
+        calls.append(rows)
+        if rows > 3:
+            raise ValueError("input length exceeds the context length")
+        return json.dumps(["Mercado"] * rows)
+
+    categorizer = AICategorizer(cache=CategorizationCache(), local=LocalClassifier(), breaker=CircuitBreaker(failure_threshold=2), timeouts={"single": AdaptiveTimeout(), "batch": AdaptiveTimeout()})
+    categorizer.local_threshold = 1.1 # Never skip the model
+    stub = RunnableLambda(lambda _: "", afunc=model)
+    categorizer.chain = categorizer.prompt | stub
+    categorizer.batch_chain = categorizer.batch_prompt | stub
+
+    items = [(f"LOJA {i}", -10.0) for i in range(40)]
+    result = await categorizer.predict_categories(items, batch_size=20)
+
+    # Oversized prompts are split until they fit, without counting as failures
+    assert max(calls) == 20 and min(calls) <= 3
+    assert categorizer.breaker.state == CircuitBreaker.CLOSED
+    assert categorizer.breaker.snapshot()["trips"] == 0
+    assert result == ["Mercado"] * 40
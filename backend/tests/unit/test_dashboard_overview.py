@@ -0,0 +1,56 @@
+import pytest
+from datetime import date
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from app.api.dashboard import overview_query, get_dashboard_overview
+from app.models.transaction import TransactionType
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return FakeResult(self.rows)
+
+def row(no_month=1, no_source=1, no_category=1, month=None, source_type=None, category_name=None, type=None,
+        income=None, expense=None, period_total=None, period_rows=0, liquidity=None, liability=None):
+    return SimpleNamespace(**locals())
+
+def test_overview_is_one_grouping_sets_statement():
+    sql = str(overview_query(2026, 3).compile(dialect=postgresql.dialect()))
+
+    assert sql.count("SELECT") == 1
+    assert "GROUP BY GROUPING SETS((monthly_rollups.month), (monthly_rollups.source_type), (monthly_rollups.category_name, monthly_rollups.type), ())" in sql
+    assert "FILTER (WHERE" in sql
+
+@pytest.mark.asyncio
+async def test_overview_splits_grouping_sets():
+    session = FakeSession([
+        row(no_month=0, month=date(2025, 12, 1), income=999, expense=-999),
+        row(no_month=0, month=date(2026, 3, 1), income=5000, expense=-1200, period_total=3800, period_rows=4),
+        row(no_source=0, source_type="XP_ACCOUNT", period_total=4500, period_rows=3),
+        row(no_source=0, source_type="XP_CARD", period_total=0, period_rows=0),
+        row(no_category=0, category_name="Salário", type=TransactionType.INCOME, period_total=5000, period_rows=1),
+        row(no_category=0, category_name="Alimentação", type=TransactionType.EXPENSE, period_total=-700, period_rows=2),
+        row(no_category=0, category_name="Transferência", type=TransactionType.TRANSFER, period_total=-300, period_rows=1),
+        row(liquidity=8000, liability=-2000),
+    ])
+
+    overview = await get_dashboard_overview(db=session, year=2026, month=3)
+
+    assert len(session.statements) == 1
+    assert overview["summary"]["total_income"] == 5000
+    assert overview["summary"]["monthly_data"][2] == {"month": 3, "income": 5000, "expense": -1200}
+    assert overview["summary"]["monthly_data"][11]["income"] == 0
+    assert overview["breakdown"]["by_source"] == {"XP_ACCOUNT": 4500}
+    assert [c["name"] for c in overview["breakdown"]["by_category"]] == ["Alimentação", "Salário"]
+    assert overview["health"] == {"liquidity": 8000, "liability": -2000, "ratio": 400.0, "status": "COMFORT"}
@@ -0,0 +1,34 @@
+from datetime import date
+import polars as pl
+from app.etl.hashing import compute_unique_hashes, records_frame
+from app.etl.importer import generate_transaction_hash
+
+ROWS = [
+    {"date": date(2025, 3, 1), "amount": "-10.50", "description": "PADARIA", "source_type": "XP_CARD"},
+    {"date": date(2025, 3, 1), "amount": "-10.50", "description": "PADARIA", "source_type": "XP_CARD"},
+    {"date": date(2025, 3, 2), "amount": "100.00", "description": "PIX RECEBIDO", "source_type": "XP_ACCOUNT"},
+    {"date": date(2025, 3, 1), "amount": "-10.50", "description": "PADARIA", "source_type": "XP_CARD"},
+]
+
+def legacy_hashes(rows, counter):
+    hashes = []
+    for row in rows:
+        base = generate_transaction_hash(row)
+        hashes.append(f"{base}_{counter.get(base, 0)}")
+        counter[base] = counter.get(base, 0) + 1
+    return hashes
+
+def test_vectorized_hashes_match_legacy_per_row_hash():
+    frame = compute_unique_hashes(pl.DataFrame(ROWS))
+
+    assert frame["unique_hash"].to_list() == legacy_hashes(ROWS, {})
+    assert frame["unique_hash"][3].endswith("_2")
+
+def test_counter_carries_occurrences_across_chunks():
+    counter = {}
+    first = compute_unique_hashes(pl.DataFrame(ROWS[:2]), counter)["unique_hash"].to_list()
+    second = compute_unique_hashes(pl.DataFrame(ROWS[2:]), counter)["unique_hash"].to_list()
+
+    assert first + second == legacy_hashes(ROWS, {})
+    # Dict rows hash the same way as parsed frames
+    assert compute_unique_hashes(records_frame(ROWS))["unique_hash"].to_list() == first + second
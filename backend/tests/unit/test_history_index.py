@@ -0,0 +1,35 @@
+from app.services.history_index import HistoryIndex
+
+HISTORY = [
+    ("IFOOD *RESTAURANTE", -45.0, "Delivery"),
+    ("ifood restaurante", -60.0, "Delivery"),
+    ("TED FOLHA PAGAMENTO", 8500.0, "Salário"),
+    ("PADARIA SAO JORGE", -12.0, "Restaurante"),
+    ("NETFLIX.COM", -39.9, "Streaming"),
+]
+
+def test_index_deduplicates_normalized_descriptions():
+    index = HistoryIndex(HISTORY)
+
+    assert len(index.choices) == 4
+    assert index.search("Ifood*Restaurante")[:2] == HISTORY[:2]
+
+def test_search_many_matches_single_searches():
+    index = HistoryIndex(HISTORY)
+    queries = ["IFOOD RESTAURANTE 2", "FOLHA PAGAMENTO", "PADARIA", "XYZ 123", "", "IFOOD RESTAURANTE 2"]
+
+    found = index.search_many(queries, workers=1)
+
+    assert set(found) == {q for q in queries if q}
+    for query in found:
+        assert found[query] == index.search(query)
+    assert found["XYZ 123"] == []
+
+def test_extend_matches_full_build():
+    index = HistoryIndex(HISTORY[:2])
+    index.extend(HISTORY[2:])
+    full = HistoryIndex(HISTORY)
+
+    assert index.choices == full.choices
+    assert index.groups == full.groups
+    assert index.search("PADARIA SAO JORGE") == full.search("PADARIA SAO JORGE")
@@ -0,0 +1,48 @@
+import io
+import polars as pl
+from datetime import date
+from app.etl.importer import parse_xp_card_frame, parse_xp_account_frame, get_account_description_column
+
+CARD_CSV = """Data;Estabelecimento;Portador;Valor;Parcela
+28/11/25 às 11:09:43;IFOOD *RESTAURANTE ;JOAO;R$ 1.200,50;1 de 10
+01/12/2025;Pagamento de Fatura;JOAO;-R$ 3.655,34;-
+2/1/2025 10:00;Padaria;JOAO;R$ 007,10;02/12
+xx;Data Invalida;JOAO;R$ 7,00;
+05/05/2025;Sem Valor;JOAO;-;
+"""
+
+def read(csv: str) -> pl.DataFrame:
+    return pl.read_csv(io.StringIO(csv), separator=';', infer_schema=False)
+
+def test_parse_xp_card_frame():
+    frame = parse_xp_card_frame(read(CARD_CSV))
+
+    # Rows without a valid date or amount are dropped
+    assert frame.height == 3
+
+    purchase, payment, padaria = frame.to_dicts()
+
+    assert purchase["date"] == date(2025, 11, 28)
+    assert purchase["description"] == "IFOOD *RESTAURANTE"
+    assert purchase["amount"] == "-1200.50"
+    assert purchase["type"] == "EXPENSE"
+    assert (purchase["installment_current"], purchase["installment_total"]) == (1, 10)
+    assert purchase["is_recurring"] is True
+    assert purchase["reference_date"] == date(2025, 11, 1)
+
+    assert payment["amount"] == "3655.34"
+    assert payment["type"] == "TRANSFER"
+    assert payment["installment_total"] is None
+
+    # Amount text matches str(Decimal(...)) so dedup hashes stay stable
+    assert padaria["amount"] == "-7.10"
+    assert padaria["date"] == date(2025, 1, 2)
+    assert (padaria["installment_current"], padaria["installment_total"]) == (2, 12)
+
+def test_parse_xp_account_frame_with_override():
+    df = read("Data;Lançamento;Valor;Saldo\n01/02/2025;PIX RECEBIDO;R$ 10,00;1\n03/02/2025;COMPRA;-R$ 5,5;1\n")
+    frame = parse_xp_account_frame(df, get_account_description_column(df.columns), date(2025, 3, 1))
+
+    assert frame["amount"].to_list() == ["10.00", "-5.5"]
+    assert frame["type"].to_list() == ["INCOME", "EXPENSE"]
+    assert frame["reference_date"].to_list() == [date(2025, 3, 1)] * 2
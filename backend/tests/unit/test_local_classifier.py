@@ -0,0 +1,34 @@
+from app.services.local_classifier import LocalClassifier
+
+HISTORY = [
+    ("IFOOD *RESTAURANTE", -45.0, "Delivery"),
+    ("NETFLIX.COM", -39.9, "Streaming"),
+    ("PADARIA SAO JORGE", -12.0, "Restaurante"),
+    ("CARREFOUR AV BRASIL", -200.0, "Mercado"),
+    ("PAO DE ACUCAR 123", -80.0, "Mercado"),
+]
+
+def test_predicts_with_confidence():
+    classifier = LocalClassifier()
+    classifier.fit(HISTORY)
+
+    category, confidence = classifier.predict("IFOOD*RESTAURANTE SP")
+    assert category == "Delivery" and confidence > 0.7
+    assert classifier.predict("XYZ") == (None, 0.0)
+
+def test_saved_model_syncs_incrementally(tmp_path):
+    path = str(tmp_path / "model.npz")
+    classifier = LocalClassifier(path)
+    classifier.fit(HISTORY)
+    classifier.save()
+
+    restored = LocalClassifier(path)
+    assert restored.sync(HISTORY) is False
+    assert restored.predict("NETFLIX") == classifier.predict("NETFLIX")
+
+    # A new verified merchant is added; a recategorized one forces a retrain without the old label
+    assert restored.sync(HISTORY + [("UBER TRIP", -20.0, "Transporte")]) is True
+    assert restored.predict("UBER *TRIP")[0] == "Transporte"
+    assert restored.sync(HISTORY[1:] + [("IFOOD *RESTAURANTE", -45.0, "Restaurante")]) is True
+    assert restored.predict("IFOOD RESTAURANTE")[0] == "Restaurante"
+    assert len(restored) == len(HISTORY)
@@ -0,0 +1,20 @@
+from unittest.mock import patch
+from app.etl.preview import PreviewCache
+
+def test_preview_cache_evicts_least_recently_used():
+    cache = PreviewCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", {"filename": "a.csv"})
+    cache.put("b", {"filename": "b.csv"})
+    cache.get("a")
+    cache.put("c", {"filename": "c.csv"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"filename": "a.csv"}
+    assert cache.get("c") == {"filename": "c.csv"}
+
+def test_preview_cache_expires_entries():
+    cache = PreviewCache(max_entries=2, ttl_seconds=60)
+    with patch("app.etl.preview.time.monotonic", return_value=1000.0):
+        cache.put("a", {"filename": "a.csv"})
+    with patch("app.etl.preview.time.monotonic", return_value=1061.0):
+        assert cache.get("a") is None
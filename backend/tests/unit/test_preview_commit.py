@@ -0,0 +1,56 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+from fastapi import HTTPException
+from app.api.transactions import commit_upload_preview
+from app.etl.preview import preview_cache
+from app.models.imports import ImportStatus
+from app.models.transaction import TransactionType
+
+def preview_entry():
+    rows = [
+        {"date": date(2026, 3, day), "reference_date": date(2026, 3, 1), "description": f"LOJA {day}",
+         "amount": Decimal("-10.00"), "type": TransactionType.EXPENSE, "source_type": "XP_CARD", "unique_hash": f"hash-{day}"}
+        for day in (1, 2)
+    ]
+    return {"filename": "fatura.csv", "source_format": "XP_CARD", "rows": rows, "rows_parsed": 2, "stats": {}}
+
+@pytest.fixture
+def session(memory_session):
+    yield memory_session
+    preview_cache.entries.clear()
+
+@pytest.mark.asyncio
+async def test_unknown_or_expired_preview_is_not_found(session):
+    with pytest.raises(HTTPException) as unknown:
+        await commit_upload_preview("never-previewed", db=session)
+
+    with patch("app.etl.preview.time.monotonic", return_value=1000.0):
+        preview_cache.put("expired", preview_entry())
+    with patch("app.etl.preview.time.monotonic", return_value=1000.0 + preview_cache.ttl_seconds + 1):
+        with pytest.raises(HTTPException) as expired:
+            await commit_upload_preview("expired", db=session)
+
+    assert unknown.value.status_code == expired.value.status_code == 404
+    assert session.hashes == set()
+
+@pytest.mark.asyncio
+async def test_commit_writes_the_previewed_rows_once(session):
+    preview_cache.put("file-hash", preview_entry())
+
+    response = await commit_upload_preview("file-hash", db=session)
+
+    assert response["total_imported"] == 2
+    assert session.hashes == {"hash-1", "hash-2"}
+    assert session.imports["file-hash"].status == ImportStatus.COMPLETED.value
+    assert preview_cache.get("file-hash") is None
+
+    # The same file previewed again is rejected by the ledger, and nothing is written twice
+    preview_cache.put("file-hash", preview_entry())
+    with pytest.raises(HTTPException) as again:
+        await commit_upload_preview("file-hash", db=session)
+
+    assert again.value.status_code == 400
+    assert "already been imported" in again.value.detail
+    assert session.hashes == {"hash-1", "hash-2"}
@@ -0,0 +1,25 @@
+from datetime import date
+from sqlalchemy import and_
+from sqlalchemy.dialects import postgresql
+from app.core.queries import month_range, period_filter
+from app.models.transaction import Transaction
+
+def compile_where(conditions) -> str:
+    return str(and_(*conditions).compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+def test_month_range_is_half_open():
+    assert month_range(2026, 2) == (date(2026, 2, 1), date(2026, 3, 1))
+    assert month_range(2026, 12) == (date(2026, 12, 1), date(2027, 1, 1))
+    assert month_range(2026) == (date(2026, 1, 1), date(2027, 1, 1))
+
+def test_period_filter_is_a_range_on_the_bare_column():
+    sql = compile_where(period_filter(Transaction.reference_date, 2026, 12))
+
+    assert sql == "transactions.reference_date >= '2026-12-01' AND transactions.reference_date < '2027-01-01'"
+    assert "extract" not in sql
+
+def test_period_filter_month_without_year_falls_back_to_extract():
+    sql = compile_where(period_filter(Transaction.reference_date, month=3))
+
+    assert "EXTRACT(month FROM transactions.reference_date) = 3" in sql
+    assert period_filter(Transaction.reference_date) == []
@@ -0,0 +1,29 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+from app.etl.reconciliation import match_manual_transactions
+from app.models.transaction import Transaction
+
+def manual(day: int, amount: str) -> Transaction:
+    return Transaction(id=uuid.uuid4(), date=date(2025, 3, day), amount=Decimal(amount), source_type="MANUAL")
+
+def test_match_is_one_to_one_and_prefers_closest_date():
+    far = manual(8, "-50.00")
+    close = manual(10, "-50.00")
+    other_amount = manual(10, "-20.00")
+
+    imported = [
+        (date(2025, 3, 10), Decimal("-50.00")),
+        (date(2025, 3, 10), Decimal("-50.0")),
+        (date(2025, 3, 10), Decimal("-50.00")),
+    ]
+    matches = match_manual_transactions(imported, [far, close, other_amount])
+
+    # The first row takes the exact date, the second falls back to the other entry, the third finds none left
+    assert matches == [close, far, None]
+
+def test_match_respects_tolerance_window():
+    entry = manual(1, "-10.00")
+
+    assert match_manual_transactions([(date(2025, 3, 4), Decimal("-10.00"))], [entry]) == [None]
+    assert match_manual_transactions([(date(2025, 3, 3), Decimal("-10.00"))], [entry]) == [entry]
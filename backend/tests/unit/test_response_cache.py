@@ -0,0 +1,96 @@
+import httpx
+import pytest
+from datetime import date
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.core.response_cache import ResponseCache, ResponseCacheMiddleware, track_writes
+from app.models.transaction import Category, TransactionType
+
+class TrackedSession(Session):
+    pass
+
+def test_entries_are_invalidated_by_version_and_evicted_by_size():
+    cache = ResponseCache(max_entries=10, max_bytes=10)
+    cache.put(("/a", ()), 0, b"12345", "application/json")
+    cache.put(("/b", ()), 0, b"12345", "application/json")
+    assert cache.get(("/a", ()))["body"] == b"12345"
+
+    cache.put(("/c", ()), 0, b"123", "application/json")
+    # /b was least recently used
+    assert cache.get(("/b", ())) is None
+    assert cache.size == 8
+
+    cache.bump()
+    assert cache.get(("/a", ())) is None
+    # Computed before the bump: not stored
+    cache.put(("/a", ()), 0, b"12345", "application/json")
+    assert cache.get(("/a", ())) is None
+    assert cache.snapshot()["evictions"] == 1
+
+def test_commits_that_write_bump_the_version():
+    cache = ResponseCache()
+    track_writes(cache, TrackedSession)
+    engine = create_engine("sqlite://")
+    Category.__table__.create(engine)
+
+    with TrackedSession(engine) as session:
+        session.execute(text("SELECT 1"))
+        session.commit()
+        assert cache.version == 0
+
+        session.add(Category(name="Mercado", type=TransactionType.EXPENSE))
+        session.commit()
+        assert cache.version == 1
+
+        session.execute(text("DELETE FROM categories"))
+        session.rollback()
+        session.commit()
+        assert cache.version == 1
+
+        session.execute(Category.__table__.delete())
+        session.commit()
+        assert cache.version == 2
+
+@pytest.mark.asyncio
+async def test_middleware_serves_hits_and_not_modified():
+    cache = ResponseCache()
+    calls = []
+    app = FastAPI()
+    app.add_middleware(ResponseCacheMiddleware, cache=cache)
+
+    @app.get("/dashboard/summary")
+    async def summary(year: int):
+        calls.append(year)
+        return {"year": year}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.get("/dashboard/summary", params={"year": 2026})
+        second = await client.get("/dashboard/summary", params={"year": 2026})
+        revalidated = await client.get("/dashboard/summary", params={"year": 2026}, headers={"If-None-Match": first.headers["etag"]})
+        cache.bump()
+        changed = await client.get("/dashboard/summary", params={"year": 2026})
+
+    assert (first.headers["x-cache"], second.headers["x-cache"], changed.headers["x-cache"]) == ("MISS", "HIT", "MISS")
+    assert second.json() == {"year": 2026}
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert calls == [2026, 2026]
+
+@pytest.mark.asyncio
+async def test_entries_do_not_outlive_the_day():
+    cache = ResponseCache()
+    today = [date(2026, 1, 31)]
+    app = FastAPI()
+    app.add_middleware(ResponseCacheMiddleware, cache=cache, today=lambda: today[0])
+
+    @app.get("/analytics/average-spending")
+    async def average_spending():
+        return {"until": today[0].isoformat()}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.get("/analytics/average-spending")
+        today[0] = date(2026, 2, 1)
+        second = await client.get("/analytics/average-spending")
+
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "MISS")
+    assert second.json() == {"until": "2026-02-01"}
@@ -0,0 +1,10 @@
+from sqlalchemy.dialects import postgresql
+from app.services.rollups import rollup_aggregate
+
+def test_rebuild_aggregate_matches_trigger_keys():
+    sql = str(rollup_aggregate().compile(dialect=postgresql.dialect()))
+
+    # Same key expressions as the monthly_rollups_apply trigger
+    assert "GROUP BY CAST(date_trunc('month', transactions.reference_date) AS DATE)" in sql
+    assert "coalesce(categories.name, transactions.category, 'Uncategorized')" in sql
+    assert "LEFT OUTER JOIN categories" in sql
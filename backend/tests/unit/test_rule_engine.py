@@ -0,0 +1,32 @@
+from app.models.categorization import CategorizationRule
+from app.services.rule_engine import RuleEngine, TokenMatcher
+
+def rule(pattern: str, category: str, priority: int = 0, min_amount=None) -> CategorizationRule:
+    return CategorizationRule(pattern=pattern, category_name=category, priority=priority, min_amount=min_amount)
+
+ENGINE = RuleEngine([
+    rule("ifood", "Delivery", 30),
+    rule("restaurante", "Restaurante", 10),
+    rule("pao de acucar", "Mercado", 20),
+    rule("folha", "Salário", 10, min_amount=1000),
+])
+
+def test_token_matcher_finds_overlapping_multi_token_patterns():
+    matcher = TokenMatcher([("a", "b", "c"), ("b", "c"), ("c",), ("b", "d")])
+
+    assert sorted(matcher.find(["x", "a", "b", "c"])) == [0, 1, 2]
+    assert matcher.find(["a", "b", "d"]) == [3]
+    assert matcher.find(["a", "b"]) == []
+
+def test_highest_priority_rule_wins():
+    assert ENGINE.classify("IFOOD *RESTAURANTE ", -45.9) == "Delivery"
+    assert ENGINE.classify("Restaurante Fasano", -300.0) == "Restaurante"
+    assert ENGINE.classify("PÃO DE AÇÚCAR 123", -80.0) == "Mercado"
+
+def test_matches_whole_words_only():
+    assert ENGINE.classify("PAO DE QUEIJO", -10.0) is None
+    assert ENGINE.classify("IFOODIE STORE", -10.0) is None
+
+def test_amount_predicates():
+    assert ENGINE.classify("TED FOLHA PAGAMENTO", 8500.0) == "Salário"
+    assert ENGINE.classify("TED FOLHA PAGAMENTO", 200.0) is None
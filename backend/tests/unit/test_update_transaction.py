@@ -0,0 +1,58 @@
+import uuid
+import pytest
+from decimal import Decimal
+from app.api import transactions as transactions_api
+from app.models.transaction import Transaction, Category, TransactionType
+from app.schemas.transaction import TransactionUpdate
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+class FakeSession:
+    """
+    Answers the endpoint's queries in order: the transaction, then the category lookup (if any).
+    """
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+
+    async def execute(self, stmt):
+        return FakeResult(self.answers.pop(0) if self.answers else None)
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, instance):
+        pass
+
+@pytest.fixture
+def recorded(monkeypatch):
+    calls = []
+
+    async def record_verified(session, description, amount, category_name):
+        calls.append((description, amount, category_name))
+    monkeypatch.setattr(transactions_api.categorization_cache, "record_verified", record_verified)
+    return calls
+
+def make_transaction():
+    return Transaction(id=uuid.uuid4(), description="IFOOD *Restaurante", amount=Decimal("-42.50"), category_legacy="Alimentação")
+
+@pytest.mark.asyncio
+async def test_picking_a_category_feeds_the_merchant_cache(recorded):
+    category = Category(id=uuid.uuid4(), name="Alimentação", type=TransactionType.EXPENSE)
+    session = FakeSession(make_transaction(), category)
+
+    await transactions_api.update_transaction(uuid.uuid4(), TransactionUpdate(category_legacy="Alimentação"), db=session)
+
+    assert recorded == [("IFOOD *Restaurante", -42.5, "Alimentação")]
+
+@pytest.mark.asyncio
+async def test_free_text_and_other_edits_are_not_cached(recorded):
+    await transactions_api.update_transaction(uuid.uuid4(), TransactionUpdate(category_legacy="coisas do trabalho"), db=FakeSession(make_transaction(), None))
+    await transactions_api.update_transaction(uuid.uuid4(), TransactionUpdate(description="IFOOD"), db=FakeSession(make_transaction()))
+
+    assert recorded == []
@@ -5,18 +5,19 @@ import { FinancialOverview } from "./components/FinancialOverview"
 import { CategoryBreakdownMonthly } from "./components/SourceBreakdown"
 import { CategoryBreakdown } from "./components/CategoryBreakdown"
 import { FinancialHealthWidget } from "./components/FinancialHealthWidget"
-import { useDashboardSummary, useDashboardBreakdown } from "@/hooks/useTransactions"
+import { useDashboardOverview } from "@/hooks/useTransactions"
 
 export function DashboardPage() {
     const currentYear = new Date().getFullYear()
     // Default to 2025 during dev if preferred, otherwise currentYear
     const [year, setYear] = useState(currentYear)
-    const { data: summary, isLoading: isLoadingSummary } = useDashboardSummary(year)
-    const { data: breakdown, isLoading: isLoadingBreakdown } = useDashboardBreakdown(year)
+    const { data: overview, isLoading } = useDashboardOverview(year)
+    const summary = overview?.summary
+    const breakdown = overview?.breakdown
 
     const years = Array.from({ length: 5 }, (_, i) => currentYear - 2 + i)
 
-    if (isLoadingSummary || isLoadingBreakdown) {
+    if (isLoading) {
         return (
             <DashboardLayout>
                 <div className="flex items-center justify-center h-[50vh]">
@@ -49,7 +50,7 @@ export function DashboardPage() {
                             expense={summary.total_expense}
                             balance={summary.balance}
                         />
-                        <FinancialHealthWidget year={year} />
+                        <FinancialHealthWidget year={year} health={overview?.health} />
                     </>
                 )}
 
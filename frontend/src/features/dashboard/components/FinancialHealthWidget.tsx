@@ -1,16 +1,19 @@
-import { useFinancialHealth } from "@/hooks/useTransactions"
+import { useFinancialHealth, FinancialHealth } from "@/hooks/useTransactions"
 import { Card, CardHeader, CardTitle, CardContent } from "@/components/ui"
 import { InfoIconTooltip } from "@/components/InfoIconTooltip"
 import { cn } from "@/lib/utils"
 
 interface FinancialHealthWidgetProps {
     year: number
+    // Already loaded (e.g. by the dashboard overview); skips the separate request
+    health?: FinancialHealth
 }
 
-export function FinancialHealthWidget({ year }: FinancialHealthWidgetProps) {
-    const { data: health, isLoading } = useFinancialHealth(year)
+export function FinancialHealthWidget({ year, health: preloaded }: FinancialHealthWidgetProps) {
+    const { data: fetched, isLoading } = useFinancialHealth(year, !preloaded)
+    const health = preloaded ?? fetched
 
-    if (isLoading) {
+    if (!preloaded && isLoading) {
         return (
             <Card className="col-span-2">
                 <CardHeader>
@@ -120,9 +120,17 @@ async function deleteTransaction(id: string) {
     return
 }
 
-async function fetchDashboardSummary(year = 2025) {
-    const res = await fetch(`${API_URL}/dashboard/summary?year=${year}`)
-    if (!res.ok) throw new Error('Failed to fetch dashboard summary')
+export type DashboardOverview = {
+    year: number
+    month: number | null
+    summary: DashboardSummary
+    breakdown: DashboardBreakdown
+    health: FinancialHealth
+}
+
+async function fetchDashboardOverview(year = 2025) {
+    const res = await fetch(`${API_URL}/dashboard/overview?year=${year}`)
+    if (!res.ok) throw new Error('Failed to fetch dashboard overview')
     return res.json()
 }
 
@@ -250,10 +258,19 @@ export function useUploadTransactions() {
     })
 }
 
+// The dashboard page's summary, breakdown and health share one /overview request
+export function useDashboardOverview(year: number) {
+    return useQuery<DashboardOverview>({
+        queryKey: ['dashboard', year],
+        queryFn: () => fetchDashboardOverview(year),
+    })
+}
+
 export function useDashboardSummary(year: number) {
-    return useQuery<DashboardSummary>({
+    return useQuery<DashboardOverview, Error, DashboardSummary>({
         queryKey: ['dashboard', year],
-        queryFn: () => fetchDashboardSummary(year),
+        queryFn: () => fetchDashboardOverview(year),
+        select: (overview) => overview.summary,
     })
 }
 
@@ -555,10 +572,11 @@ async function fetchFinancialHealth(year?: number) {
     return res.json()
 }
 
-export function useFinancialHealth(year?: number) {
+export function useFinancialHealth(year?: number, enabled = true) {
     return useQuery<FinancialHealth>({
         queryKey: ['financial_health', year],
         queryFn: () => fetchFinancialHealth(year),
+        enabled,
     })
 }
 